@@ -54,7 +54,17 @@ def run_database_migrations():
         if not uri.startswith('sqlite:///'):
             print("🔄 Running database migrations for non-SQLite database...")
             try:
-                from utils.db_migrations import upgrade_password_hash_column, upgrade_resume_embedding_fields
+                from utils.db_migrations import (
+                    upgrade_password_hash_column,
+                    upgrade_resume_embedding_fields,
+                    upgrade_membership_keyword_embedding,
+                    upgrade_resume_embedding_storage,
+                    upgrade_event_profile_version,
+                    upgrade_resume_processing_status,
+                    upgrade_resume_content_hash,
+                    upgrade_embedding_model_tags,
+                    upgrade_resume_has_document,
+                )
                 
                 # Migrate password_hash column
                 success, message = upgrade_password_hash_column()
@@ -67,6 +77,48 @@ def run_database_migrations():
                 print(f"   {message}")
                 if not success:
                     print("   ⚠️  Resume embedding fields migration had issues, but continuing startup...")
+                
+                # Migrate membership keyword embedding field
+                success, message = upgrade_membership_keyword_embedding()
+                print(f"   {message}")
+                if not success:
+                    print("   ⚠️  Membership keyword embedding migration had issues, but continuing startup...")
+                
+                # Convert JSON resume embeddings to the binary storage format
+                success, message = upgrade_resume_embedding_storage()
+                print(f"   {message}")
+                if not success:
+                    print("   ⚠️  Resume embedding storage migration had issues, but continuing startup...")
+                
+                # Migrate event profile version field
+                success, message = upgrade_event_profile_version()
+                print(f"   {message}")
+                if not success:
+                    print("   ⚠️  Event profile version migration had issues, but continuing startup...")
+                
+                # Migrate resume processing status fields
+                success, message = upgrade_resume_processing_status()
+                print(f"   {message}")
+                if not success:
+                    print("   ⚠️  Resume processing status migration had issues, but continuing startup...")
+                
+                # Migrate resume content hash field
+                success, message = upgrade_resume_content_hash()
+                print(f"   {message}")
+                if not success:
+                    print("   ⚠️  Resume content hash migration had issues, but continuing startup...")
+                
+                # Migrate embedding model tags
+                success, message = upgrade_embedding_model_tags()
+                print(f"   {message}")
+                if not success:
+                    print("   ⚠️  Embedding model tag migration had issues, but continuing startup...")
+                
+                # Migrate resume has_document flag
+                success, message = upgrade_resume_has_document()
+                print(f"   {message}")
+                if not success:
+                    print("   ⚠️  Resume has_document migration had issues, but continuing startup...")
             except Exception as e:
                 print(f"   ⚠️  Error during migration: {e}")
                 print("   Continuing startup... (migration may need manual intervention)")
@@ -148,6 +200,23 @@ def ensure_admin_user():
             print("   App will continue without admin user.")
 
 
+def start_model_warmup():
+    """
+    Load the matching model in a background thread so the server starts immediately.
+    
+    Until it finishes, /api/ready reports 503 so deploys can keep traffic away
+    from this worker. Disabled with MODEL_WARMUP_ON_START=false (the model then
+    loads lazily on the first matching request).
+    """
+    if not app.config.get('MODEL_WARMUP_ON_START', True):
+        print("ℹ️  Model warmup disabled; the matching model will load on first use.")
+        return
+    
+    from matching_engine import matching_engine
+    matching_engine.start_warmup()
+    print(f"🔄 Warming up matching model ({matching_engine.model_name}) in the background...")
+
+
 if __name__ == "__main__":
     # Diagnostic: print mail config at startup (ensure .env was loaded before app creation)
     print("--- Mail config (diagnostic) ---")
@@ -168,5 +237,14 @@ if __name__ == "__main__":
     # Ensure admin user exists (from environment variables)
     ensure_admin_user()
     
+    # Load the matching model without delaying startup
+    start_model_warmup()
+    
+    # Finish document processing interrupted by the last shutdown
+    from utils.resume_ingestion import requeue_unfinished_resumes
+    requeued = requeue_unfinished_resumes(app)
+    if requeued:
+        print(f"🔄 Re-queued {requeued} unfinished document upload(s) for processing")
+    
     # Start the Flask app
     app.run(host="0.0.0.0", port=5000)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Embedding Backend Benchmark
+
+Encodes the attendee profiles of a database export (scripts/import_database.py
+--export) with each model/inference configuration and reports:
+- encode throughput (profiles and texts per second) and model load time
+- score drift against the first (reference) configuration: mean and p95
+  absolute difference of the match scores, top-k agreement, and the share
+  of pairs that cross MATCH_THRESHOLD
+
+Configurations are MODEL:INFERENCE pairs, inference being one of
+MatchingEngine's INFERENCE_BACKENDS (torch, torch-int8, onnx).
+
+Examples:
+    python scripts/benchmark_embeddings.py
+    python scripts/benchmark_embeddings.py --config all-mpnet-base-v2:torch --config all-MiniLM-L6-v2:torch
+    python scripts/benchmark_embeddings.py --export exports/database_export_20251007_004333.json --json results.json
+"""
+
+import json
+import time
+import argparse
+from collections import defaultdict
+from pathlib import Path
+from script_helpers import (setup_python_path, get_project_root, print_section,
+                            print_success, print_error, print_info, print_warning)
+
+# Setup Python path to import from src
+setup_python_path()
+
+import numpy as np
+from config import Config
+from matching_engine import MatchingEngine, MATCH_THRESHOLD, INFERENCE_BACKENDS
+from utils.document_extraction import extract_text
+
+DEFAULT_CONFIGS = [
+    'all-mpnet-base-v2:torch',
+    'all-mpnet-base-v2:torch-int8',
+    'all-mpnet-base-v2:onnx',
+    'all-MiniLM-L6-v2:torch',
+]
+
+
+def find_latest_export():
+    """Latest exports/database_export_*.json and its files directory (or None)"""
+    exports_dir = get_project_root() / 'exports'
+    json_files = sorted(exports_dir.glob('database_export_*.json')) if exports_dir.exists() else []
+    if not json_files:
+        return None, None
+    latest_json = json_files[-1]
+    files_dir = exports_dir / f"files_{latest_json.stem.replace('database_', '')}"
+    return latest_json, files_dir if files_dir.exists() else None
+
+
+def load_events(export_path: Path, files_dir, max_events=None) -> dict:
+    """
+    Build the matching input of every event in an export.
+
+    Returns:
+        Dict of event_id -> list of user data dicts (keywords and document text)
+    """
+    with open(export_path) as f:
+        data = json.load(f)
+
+    resumes = {(r['user_id'], r['event_id']): r for r in data.get('resume', [])}
+    events = defaultdict(list)
+    documents = 0
+    for membership in data.get('membership', []):
+        key = (membership['user_id'], membership['event_id'])
+        keywords = [k.strip() for k in (membership.get('keywords') or '').split(',') if k.strip()]
+        document_text = ''
+        if files_dir and key in resumes:
+            file_path = files_dir / str(membership['user_id']) / resumes[key]['filename']
+            if file_path.exists():
+                try:
+                    document_text = extract_text(str(file_path), Config.DOCUMENT_MAX_PAGES,
+                                                 Config.DOCUMENT_MAX_CHARS)['text']
+                    documents += bool(document_text)
+                except Exception as e:
+                    print_warning(f"Skipping unreadable {file_path.name}: {e}")
+        events[membership['event_id']].append({
+            'user_id': membership['user_id'],
+            'keywords': keywords,
+            'document_text': document_text,
+        })
+
+    event_ids = sorted(events, key=lambda event_id: -len(events[event_id]))[:max_events]
+    print_info(f"{len(event_ids)} event(s), {sum(len(events[e]) for e in event_ids)} profile(s), "
+               f"{documents} document(s) with text")
+    return {event_id: events[event_id] for event_id in event_ids}
+
+
+def run_config(model_name: str, inference: str, events: dict) -> dict:
+    """Encode and score every event with one configuration"""
+    engine = MatchingEngine(model_name=model_name, backend='local', inference=inference)
+    # Measure the model itself: one caller, nothing to coalesce
+    engine.coalesce = False
+    started = time.perf_counter()
+    engine.warmup()
+    load_seconds = time.perf_counter() - started
+
+    calls = []
+    model_encode = engine.model.encode
+
+    def counting_encode(texts, *args, **kwargs):
+        calls.append(len(texts))
+        return model_encode(texts, *args, **kwargs)
+
+    engine.model.encode = counting_encode
+
+    encode_seconds, scores = 0.0, {}
+    for event_id, users_data in events.items():
+        started = time.perf_counter()
+        matrices = engine.build_profile_matrices(users_data)
+        encode_seconds += time.perf_counter() - started
+
+        terms = engine.keyword_term_matrix(matrices['keywords'])
+        event_scores = engine.score_profile_block(matrices, matrices, terms, terms)
+        np.fill_diagonal(event_scores, np.nan)
+        scores[event_id] = event_scores
+
+    profiles = sum(len(users_data) for users_data in events.values())
+    return {
+        'config': f'{model_name}:{inference}',
+        'load_seconds': load_seconds,
+        'encode_seconds': encode_seconds,
+        'profiles_per_second': profiles / encode_seconds if encode_seconds else None,
+        'texts_per_second': sum(calls) / encode_seconds if encode_seconds else None,
+        'model_calls': len(calls),
+        'scores': scores,
+    }
+
+
+def score_drift(reference: dict, candidate: dict, top_k: int) -> dict:
+    """Compare the match scores of two configurations over the same events"""
+    differences, agreements, flips = [], [], []
+    for event_id, ref_scores in reference.items():
+        scores = candidate[event_id]
+        pairs = ~np.isnan(ref_scores)
+        differences.append(np.abs(scores[pairs] - ref_scores[pairs]))
+        flips.append((scores[pairs] >= MATCH_THRESHOLD) != (ref_scores[pairs] >= MATCH_THRESHOLD))
+
+        k = min(top_k, len(ref_scores) - 1)
+        if k > 0:
+            ref_top = np.argsort(-np.nan_to_num(ref_scores, nan=-np.inf), axis=1)[:, :k]
+            top = np.argsort(-np.nan_to_num(scores, nan=-np.inf), axis=1)[:, :k]
+            agreements.extend(len(set(a) & set(b)) / k for a, b in zip(ref_top, top))
+
+    differences = np.concatenate(differences) if differences else np.zeros(0)
+    flips = np.concatenate(flips) if flips else np.zeros(0, dtype=bool)
+    return {
+        'mean_abs_diff': float(differences.mean()) if differences.size else 0.0,
+        'p95_abs_diff': float(np.percentile(differences, 95)) if differences.size else 0.0,
+        f'top_{top_k}_agreement': float(np.mean(agreements)) if agreements else 1.0,
+        'threshold_flips': float(flips.mean()) if flips.size else 0.0,
+    }
+
+
+def main():
+    """Main function with argument parsing."""
+    parser = argparse.ArgumentParser(description='Benchmark embedding models and CPU inference backends')
+    parser.add_argument('--export', type=Path,
+                        help='Database export JSON (default: latest in exports/)')
+    parser.add_argument('--files-dir', type=Path,
+                        help='Uploaded files of the export (default: the export\'s files_* directory)')
+    parser.add_argument('--config', action='append', metavar='MODEL:INFERENCE',
+                        help=f'Configuration to run, first is the reference (default: {", ".join(DEFAULT_CONFIGS)})')
+    parser.add_argument('--max-events', type=int, help='Only use the largest N events')
+    parser.add_argument('--top-k', type=int, default=10, help='k for the top-k agreement (default: 10)')
+    parser.add_argument('--json', type=Path, help='Also write the results to this file')
+
+    args = parser.parse_args()
+
+    print_section("Embedding Backend Benchmark", "⏱️")
+    export_path, files_dir = args.export, args.files_dir
+    if export_path is None:
+        export_path, files_dir = find_latest_export()
+        if export_path is None:
+            print_error("No export found - create one with: python scripts/import_database.py --export")
+            return
+    print_info(f"Export: {export_path}")
+    events = load_events(export_path, files_dir, args.max_events)
+    if not events:
+        print_error("The export has no event memberships")
+        return
+
+    results = []
+    for config in args.config or DEFAULT_CONFIGS:
+        model_name, _, inference = config.partition(':')
+        inference = inference or 'torch'
+        if inference not in INFERENCE_BACKENDS:
+            print_error(f"{config}: unknown inference backend (expected one of {INFERENCE_BACKENDS})")
+            continue
+        print_info(f"Running {model_name} ({inference})...")
+        try:
+            results.append(run_config(model_name, inference, events))
+        except Exception as e:
+            print_error(f"{config} failed: {e}")
+
+    if not results:
+        return
+    reference = results[0]
+    print_info(f"Reference: {reference['config']}")
+    print(f"\n{'config':<36} {'load s':>7} {'encode s':>9} {'prof/s':>8} {'texts/s':>8} "
+          f"{'mean |d|':>9} {'p95 |d|':>8} {f'top-{args.top_k}':>7} {'flips':>7}")
+    for result in results:
+        result.update(score_drift(reference['scores'], result['scores'], args.top_k))
+        print(f"{result['config']:<36} {result['load_seconds']:>7.1f} {result['encode_seconds']:>9.2f} "
+              f"{result['profiles_per_second'] or 0:>8.1f} {result['texts_per_second'] or 0:>8.1f} "
+              f"{result['mean_abs_diff']:>9.4f} {result['p95_abs_diff']:>8.4f} "
+              f"{result[f'top_{args.top_k}_agreement']:>7.1%} {result['threshold_flips']:>7.1%}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump([{key: value for key, value in result.items() if key != 'scores'} for result in results],
+                      f, indent=2)
+        print_success(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
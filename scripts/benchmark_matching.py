@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Matching Benchmark Suite
+
+Generates seeded synthetic events and measures the matching path:
+- find_best_matches (vectorized, with and without score pruning)
+- the cached event ranking the matching page uses (profile matrix cache,
+  keyword index, ANN shortlist for large events)
+- the full GET /event/<id> request through the Flask test client, against an
+  in-memory database
+
+For every path it reports p50/p95 latency, model inference calls and the
+top-k agreement with the reference scalar scorer (calculate_match_score for
+every pair), plus the process's peak RSS after each event size. Results can
+be written as JSON to compare commits.
+
+Attendees get 2-6 keywords, mostly from one of a few topics of uneven
+popularity, and keyword/document embeddings scattered around their topic's
+centroid; about 60% have a document. Stored embeddings are used throughout,
+so by default a synthetic encoder stands in for the sentence-transformer and
+only counts calls (--real-model loads the configured model instead).
+
+Examples:
+    python scripts/benchmark_matching.py
+    python scripts/benchmark_matching.py --sizes 100 1000 --queries 50 --json results.json
+    python scripts/benchmark_matching.py --sizes 10000 --scalar-queries 3 --skip-route
+"""
+
+import io
+import json
+import time
+import zlib
+import argparse
+import resource
+import subprocess
+from contextlib import redirect_stdout
+from pathlib import Path
+from script_helpers import (setup_python_path, get_project_root, print_section,
+                            print_success, print_info)
+
+# Setup Python path to import from src
+setup_python_path()
+
+import numpy as np
+from matching_engine import matching_engine
+
+TOPICS = {
+    'ai': ['machine learning', 'deep learning', 'nlp', 'computer vision', 'python', 'data science', 'llms'],
+    'finance': ['investment banking', 'private equity', 'fintech', 'trading', 'accounting', 'venture capital'],
+    'design': ['ux design', 'product design', 'figma', 'branding', 'illustration', 'typography'],
+    'health': ['biology', 'public health', 'medtech', 'genomics', 'neuroscience', 'nutrition'],
+    'energy': ['renewable energy', 'sustainability', 'climate tech', 'solar', 'policy', 'economics'],
+    'software': ['web development', 'cloud', 'devops', 'security', 'javascript', 'databases', 'python'],
+    'business': ['marketing', 'sales', 'startups', 'operations', 'consulting', 'strategy'],
+    'hardware': ['robotics', 'embedded systems', 'electronics', 'iot', 'manufacturing', 'cad'],
+}
+
+
+class CountingModel:
+    """Sentence-transformer stand-in (or wrapper) that counts encode calls and texts"""
+
+    def __init__(self, dim: int, model=None):
+        self.dim = dim
+        self.model = model
+        self.calls = 0
+        self.texts = 0
+
+    def encode(self, texts, *args, **kwargs):
+        self.calls += 1
+        self.texts += len(texts)
+        if self.model is not None:
+            return self.model.encode(texts, *args, **kwargs)
+        return np.stack([
+            np.random.default_rng(zlib.crc32(text.encode('utf-8'))).normal(size=self.dim).astype(np.float32)
+            for text in texts
+        ]) if len(texts) else np.zeros((0, self.dim), dtype=np.float32)
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+
+def synthetic_event(size: int, dim: int, seed: int) -> list:
+    """
+    Seeded attendee profiles in find_best_matches format (with cached embeddings).
+
+    Returns:
+        List of user data dicts; user ids are 1..size
+    """
+    rng = np.random.default_rng(seed)
+    topic_names = list(TOPICS)
+    centroids = rng.normal(size=(len(topic_names), dim))
+    # Uneven topic popularity, like real events
+    popularity = 1.0 / np.arange(1, len(topic_names) + 1)
+    popularity /= popularity.sum()
+    vocabulary = sorted({keyword for keywords in TOPICS.values() for keyword in keywords})
+
+    users = []
+    for user_id in range(1, size + 1):
+        topic = rng.choice(len(topic_names), p=popularity)
+        own = TOPICS[topic_names[topic]]
+        count = int(rng.integers(2, 7))
+        keywords = list(rng.choice(own, size=min(count, len(own)), replace=False))
+        if rng.random() < 0.3:
+            keywords.append(str(rng.choice(vocabulary)))
+        keywords = list(dict.fromkeys(str(keyword) for keyword in keywords))
+
+        keyword_embedding = centroids[topic] + rng.normal(scale=1.2, size=dim)
+        user_data = {
+            'user_id': user_id,
+            'keywords': keywords,
+            'document_text': '',
+            'cached_doc_embedding': None,
+            'cached_keyword_embedding': keyword_embedding.astype(np.float32),
+        }
+        if rng.random() < 0.6:
+            user_data['document_text'] = f"Resume of attendee {user_id}: {', '.join(keywords)}"
+            user_data['cached_doc_embedding'] = (centroids[topic] + rng.normal(scale=1.5, size=dim)).astype(np.float32)
+        users.append(user_data)
+    return users
+
+
+def latency_stats(samples: list) -> dict:
+    """p50/p95/mean of latencies in milliseconds"""
+    if not samples:
+        return {'p50_ms': None, 'p95_ms': None, 'mean_ms': None, 'samples': 0}
+    values = np.asarray(samples) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'mean_ms': round(float(values.mean()), 3),
+        'samples': len(samples),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (MB)"""
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(maxrss / (1024 * 1024 if maxrss > 1 << 32 else 1024), 1)
+
+
+def scalar_top_k(current: dict, users: list, top_k: int) -> list:
+    """Reference ranking: calculate_match_score for every pair"""
+    from matching_engine import MATCH_THRESHOLD
+
+    scored = [
+        (user_data['user_id'], matching_engine.calculate_match_score(current, user_data))
+        for user_data in users if user_data['user_id'] != current['user_id']
+    ]
+    scored = [(user_id, score) for user_id, score in scored if score > MATCH_THRESHOLD]
+    scored.sort(key=lambda item: -item[1])
+    return [user_id for user_id, _ in scored[:top_k]]
+
+
+def agreement(ranking: list, reference: list) -> float:
+    """Share of the reference top-k found in a ranking (1.0 when both are empty)"""
+    if not reference:
+        return 1.0 if not ranking else 0.0
+    return len(set(ranking) & set(reference)) / len(reference)
+
+
+def timed_path(run, queries: list, model: CountingModel, references: dict) -> dict:
+    """Time run(current) -> ranked user ids over the queries and compare with the scalar reference"""
+    latencies, agreements = [], []
+    calls_before = model.calls
+    for current in queries:
+        started = time.perf_counter()
+        ranking = run(current)
+        latencies.append(time.perf_counter() - started)
+        if current['user_id'] in references:
+            agreements.append(agreement(ranking, references[current['user_id']]))
+    return {
+        **latency_stats(latencies),
+        'inference_calls': model.calls - calls_before,
+        'top_k_agreement': round(float(np.mean(agreements)), 4) if agreements else None,
+    }
+
+
+def populate_database(users: list, model_name: str):
+    """Insert the synthetic event into the current (in-memory) database"""
+    from models import db, User, Event, Membership, Resume
+
+    event = Event(name='Benchmark Event', code=f'BENCH{len(users)}', is_published=True)
+    db.session.add(event)
+    db.session.add_all([
+        User(id=user_data['user_id'], name=f"Attendee {user_data['user_id']}",
+             email=f"attendee{user_data['user_id']}@bench.test", password_hash='benchmark')
+        for user_data in users
+    ])
+    db.session.flush()
+    for user_data in users:
+        membership = Membership(user_id=user_data['user_id'], event_id=event.id,
+                                keywords=', '.join(user_data['keywords']))
+        membership.set_keyword_embedding(user_data['cached_keyword_embedding'], model_name=model_name)
+        db.session.add(membership)
+        if user_data['cached_doc_embedding'] is not None:
+            resume = Resume(user_id=user_data['user_id'], event_id=event.id, filename='cv.pdf',
+                            original_name='cv.pdf', mime_type='application/pdf', file_size=1,
+                            extracted_text=user_data['document_text'])
+            resume.set_embedding(user_data['cached_doc_embedding'], model_name=model_name)
+            db.session.add(resume)
+    db.session.commit()
+    return event.id
+
+
+def bench_event_paths(users: list, queries: list, model: CountingModel, references: dict,
+                      top_k: int, skip_route: bool) -> dict:
+    """Cached ranking (as the matching page does it) and the full request, in a fresh app"""
+    from flask import current_app
+    from app import create_app
+    from models import db, Event
+    from utils.event_matrix_cache import get_event_matrix_cache, get_event_profile_matrices
+
+    app = create_app('testing')
+    results = {}
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        event_id = populate_database(users, matching_engine.model_name)
+        print_info(f"Inserted {len(users)} attendees in {time.perf_counter() - started:.1f}s")
+        get_event_matrix_cache().clear()
+
+        event = Event.query.get(event_id)
+        calls_before = model.calls
+        started = time.perf_counter()
+        get_event_profile_matrices(event)
+        results['cache_build'] = {
+            'seconds': round(time.perf_counter() - started, 3),
+            'inference_calls': model.calls - calls_before,
+        }
+
+        def cached_ranking(current):
+            entry = get_event_profile_matrices(event)
+            profile = matching_engine.build_profile_matrices([current])
+            eligible = np.ones(len(entry), dtype=bool)
+            eligible[entry.row_index[current['user_id']]] = False
+            shortlist = entry.ann_shortlist(
+                matching_engine.profile_query_vectors(profile), eligible,
+                nprobe=current_app.config.get('ANN_NPROBE', 8),
+                min_size=current_app.config.get('ANN_MIN_SHORTLIST', 200)
+            )
+            ranked = matching_engine.rank_profile_matrices(profile, entry.matrices, top_k=top_k, eligible=eligible,
+                                                           shortlist=shortlist, keyword_index=entry.keyword_index)
+            return [int(entry.user_ids[row]) for row, _ in ranked]
+
+        results['cached_ranking'] = timed_path(cached_ranking, queries, model, references)
+
+    if not skip_route:
+        client = app.test_client()
+        latencies, statuses = [], set()
+        calls_before = model.calls
+        for current in queries:
+            with client.session_transaction() as session:
+                session['_user_id'] = str(current['user_id'])
+                session['_fresh'] = True
+            started = time.perf_counter()
+            # The route prints debug output for small events
+            with redirect_stdout(io.StringIO()):
+                response = client.get(f'/event/{event_id}')
+            latencies.append(time.perf_counter() - started)
+            statuses.add(response.status_code)
+        results['route'] = {
+            **latency_stats(latencies),
+            'inference_calls': model.calls - calls_before,
+            'status_codes': sorted(statuses),
+        }
+    return results
+
+
+def run_size(size: int, args, model: CountingModel) -> dict:
+    """All measurements for one synthetic event size"""
+    users = synthetic_event(size, matching_engine.embedding_dim, args.seed + size)
+    rng = np.random.default_rng(args.seed)
+    queries = [users[i] for i in rng.choice(size, size=min(args.queries, size), replace=False)]
+
+    references, scalar_latencies = {}, []
+    for current in queries[:args.scalar_queries]:
+        started = time.perf_counter()
+        references[current['user_id']] = scalar_top_k(current, users, args.top_k)
+        scalar_latencies.append(time.perf_counter() - started)
+
+    result = {
+        'attendees': size,
+        'with_documents': sum(user_data['cached_doc_embedding'] is not None for user_data in users),
+        'scalar_reference': latency_stats(scalar_latencies),
+    }
+    for name, prune in (('find_best_matches', False), ('find_best_matches_pruned', True)):
+        pruned_before = matching_engine.pruned_pairs
+
+        def run(current, prune=prune):
+            matching_engine.score_pruning = prune
+            return [user_data['user_id'] for user_data, _ in
+                    matching_engine.find_best_matches(current, users, top_k=args.top_k)]
+
+        result[name] = timed_path(run, queries, model, references)
+        result[name]['pruned_pairs'] = matching_engine.pruned_pairs - pruned_before
+    matching_engine.score_pruning = args.pruning
+
+    result.update(bench_event_paths(users, queries, model, references, args.top_k, args.skip_route))
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def git_commit():
+    """Current commit of the repository (None outside a git checkout)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=get_project_root(),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """Main function with argument parsing."""
+    parser = argparse.ArgumentParser(description='Benchmark matching latency and quality on synthetic events')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help='Attendees per synthetic event (default: 100 1000 10000)')
+    parser.add_argument('--queries', type=int, default=30, help='Users matched per event (default: 30)')
+    parser.add_argument('--scalar-queries', type=int, default=5,
+                        help='Queries also ranked by the scalar reference scorer (default: 5)')
+    parser.add_argument('--top-k', type=int, default=20, help='Matches per query (default: 20)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
+    parser.add_argument('--skip-route', action='store_true', help='Skip the full /event/<id> requests')
+    parser.add_argument('--real-model', action='store_true',
+                        help='Load the configured sentence-transformer instead of the synthetic encoder')
+    parser.add_argument('--json', type=Path, help='Also write the results to this file')
+
+    args = parser.parse_args()
+    args.pruning = matching_engine.score_pruning
+
+    print_section("Matching Benchmark", "⏱️")
+    model = CountingModel(matching_engine.embedding_dim, matching_engine.model if args.real_model else None)
+    matching_engine.model = model
+
+    results = []
+    for size in args.sizes:
+        print_info(f"Event with {size} attendees...")
+        result = run_size(size, args, model)
+        results.append(result)
+
+        print(f"\n{'path':<26} {'p50 ms':>9} {'p95 ms':>9} {'calls':>6} {'top-k agree':>12}")
+        for path in ('scalar_reference', 'find_best_matches', 'find_best_matches_pruned', 'cached_ranking', 'route'):
+            if path in result:
+                stats = result[path]
+                agree = stats.get('top_k_agreement')
+                print(f"{path:<26} {stats['p50_ms'] or 0:>9.2f} {stats['p95_ms'] or 0:>9.2f} "
+                      f"{stats.get('inference_calls', 0):>6} {'' if agree is None else f'{agree:.1%}':>12}")
+        print(f"cache build {result['cache_build']['seconds']}s, "
+              f"pruned pairs {result['find_best_matches_pruned']['pruned_pairs']}, "
+              f"peak RSS {result['peak_rss_mb']} MB\n")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'commit': git_commit(),
+                'seed': args.seed,
+                'top_k': args.top_k,
+                'model': matching_engine.model_name,
+                'synthetic_encoder': not args.real_model,
+                'results': results,
+            }, f, indent=2)
+        print_success(f"Results written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
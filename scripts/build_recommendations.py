@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Recommendation Build Script
+
+Precomputes every attendee's top-N candidates for one or more events
+(utils.recommendations). The matching page serves these lists until an
+attendee profile change makes them stale.
+
+Run it after bulk imports or periodically (e.g. from cron) during an event.
+"""
+
+import argparse
+import sys
+from script_helpers import setup_python_path, print_section, print_success, print_error, print_info
+
+# Setup Python path to import from src
+setup_python_path()
+
+from app import app
+from models import Event
+from utils.recommendations import build_event_recommendations
+
+
+def main():
+    """Main function with argument parsing."""
+    parser = argparse.ArgumentParser(
+        description='Build precomputed recommendation lists',
+        epilog='Examples:\n'
+               '  %(prog)s --event 3              Build lists for event 3\n'
+               '  %(prog)s --all --top-n 100     Build lists for every event\n',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    target_group = parser.add_mutually_exclusive_group(required=True)
+    target_group.add_argument('--event', type=int, metavar='EVENT_ID', action='append',
+                              help='Event to build (can be repeated)')
+    target_group.add_argument('--all', action='store_true',
+                              help='Build every event')
+
+    parser.add_argument('--top-n', type=int,
+                        help='Candidates kept per attendee (default: RECOMMENDATIONS_TOP_N)')
+    parser.add_argument('--block-size', type=int,
+                        help='Score tile size (default: RECOMMENDATIONS_BLOCK_SIZE)')
+
+    args = parser.parse_args()
+
+    print_section("Building Recommendations", "🧮")
+    failures = 0
+    with app.app_context():
+        event_ids = [event.id for event in Event.query.order_by(Event.id).all()] if args.all else args.event
+
+        for event_id in event_ids:
+            try:
+                stats = build_event_recommendations(event_id, top_n=args.top_n, block_size=args.block_size)
+                print_success(
+                    f"Event {event_id}: {stats['recommendations']} recommendations for "
+                    f"{stats['attendees']} attendees in {stats['seconds']}s"
+                )
+            except Exception as e:
+                failures += 1
+                print_error(f"Event {event_id}: {e}")
+
+        if not event_ids:
+            print_info("No events found.")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
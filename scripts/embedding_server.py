@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Embedding Server Script
+
+Runs the shared embedding server (utils.embedding_service): one process that
+owns the sentence-transformer and serves encode requests from every web
+worker. Start it next to the web server and set EMBEDDING_BACKEND=server in
+the workers' environment.
+
+Examples:
+    python scripts/embedding_server.py                                 # EMBEDDING_SERVER_URL
+    python scripts/embedding_server.py --url http://127.0.0.1:8765
+"""
+
+import argparse
+from script_helpers import setup_python_path, print_section, print_success, print_info
+
+# Setup Python path to import from src
+setup_python_path()
+
+from config import Config
+from matching_engine import MatchingEngine, INFERENCE_BACKENDS
+from utils.embedding_service import create_embedding_server
+
+
+def main():
+    """Main function with argument parsing."""
+    parser = argparse.ArgumentParser(description='Run the shared embedding server')
+    parser.add_argument('--url', default=Config.EMBEDDING_SERVER_URL,
+                        help=f'unix:///path.sock or http://127.0.0.1:PORT (default: {Config.EMBEDDING_SERVER_URL})')
+    parser.add_argument('--model', default=Config.EMBEDDING_MODEL,
+                        help=f'Sentence-transformer model (default: {Config.EMBEDDING_MODEL})')
+    parser.add_argument('--inference', default=Config.EMBEDDING_INFERENCE, choices=INFERENCE_BACKENDS,
+                        help=f'CPU inference backend (default: {Config.EMBEDDING_INFERENCE})')
+    parser.add_argument('--batch-size', type=int, default=Config.EMBEDDING_BATCH_SIZE,
+                        help='Default texts per model call')
+
+    args = parser.parse_args()
+
+    print_section("Embedding Server", "🧠")
+    # The server always owns the model itself
+    engine = MatchingEngine(model_name=args.model, backend='local', inference=args.inference)
+    print_info(f"Loading {args.model} ({args.inference})...")
+    engine.warmup()
+
+    server = create_embedding_server(engine, args.url, batch_size=args.batch_size)
+    print_success(f"Serving embeddings on {args.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print_info("Shutting down")
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
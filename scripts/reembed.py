@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Bulk Re-embedding Script
+
+Recomputes the stored embeddings of Resume rows (document embedding) and
+Membership rows (keyword embedding) with batched model calls
+(MatchingEngine.embed_documents / encode_many). Use it after changing the embedding model
+(--stale-only converts just the vectors tagged with another model, which
+matching ignores until then), or with --missing-only to backfill legacy rows
+whose embedding is NULL.
+
+Progress is checkpointed after every committed page, so an interrupted run
+continues where it stopped when started again with the same arguments.
+"""
+
+import os
+import json
+import argparse
+from script_helpers import (setup_python_path, get_project_root, print_section,
+                            print_success, print_error, print_info)
+
+# Setup Python path to import from src
+setup_python_path()
+
+import numpy as np
+from sqlalchemy.orm import undefer
+from app import app
+from config import Config
+from models import db, Event, Membership, Resume
+from utils.profile_embeddings import bump_profile_version
+
+DEFAULT_CHECKPOINT = get_project_root() / 'instance' / 'reembed_checkpoint.json'
+
+
+def load_checkpoint(path, scope: dict) -> dict:
+    """
+    Load the checkpoint for this scope (event/missing-only), or start a new one.
+
+    Args:
+        path: Checkpoint file path
+        scope: Arguments identifying the run
+
+    Returns:
+        Dict with the scope and the last processed id per table
+    """
+    if os.path.exists(path):
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('scope') == scope:
+            print_info(f"Resuming from checkpoint {path}")
+            return checkpoint
+        print_info("Checkpoint is for a different run; starting over")
+    return {'scope': scope, 'resume_last_id': 0, 'membership_last_id': 0}
+
+
+def save_checkpoint(path, checkpoint: dict) -> None:
+    """Write the checkpoint atomically (rename over the previous file)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def _valid_vector(vector: np.ndarray):
+    """Zero rows mean empty text or a failed encode - never store them"""
+    return vector if np.any(vector) else None
+
+
+def reembed_resumes(engine, event_id, missing_only, stale_only, page_size, batch_size,
+                    checkpoint, checkpoint_path) -> int:
+    """Re-embed resumes page by page; returns the number of rows re-embedded"""
+    # extracted_text is deferred on the model; every row here needs it
+    query = Resume.query.options(undefer(Resume.extracted_text))
+    if event_id:
+        query = query.filter(Resume.event_id == event_id)
+    if missing_only:
+        query = query.filter(Resume.embedding_vector.is_(None), Resume.embedding.is_(None))
+    if stale_only:
+        query = query.filter(db.or_(Resume.embedding_vector.isnot(None), Resume.embedding.isnot(None)))
+
+    total = query.filter(Resume.id > checkpoint['resume_last_id']).count()
+    done = embedded = 0
+    while True:
+        page = (
+            query.filter(Resume.id > checkpoint['resume_last_id'])
+            .order_by(Resume.id)
+            .limit(page_size)
+            .all()
+        )
+        if not page:
+            break
+        rows = page
+        if stale_only:
+            rows = [resume for resume in page if not engine.is_current_embedding(
+                resume.get_embedding(), resume.embedding_model, resume.embedding_normalized)]
+
+        texts = []
+        for resume in rows:
+            if not resume.extracted_text:
+                # Legacy rows without cached text: extract from the uploaded file
+                file_path = os.path.join(app.config['UPLOAD_FOLDER'], str(resume.user_id), resume.filename)
+                resume.extracted_text = engine.extract_text_from_document(file_path)
+            texts.append(resume.extracted_text or "")
+
+        vectors = engine.embed_documents(texts, batch_size=batch_size)
+        for resume, vector in zip(rows, vectors):
+            resume.set_embedding(_valid_vector(vector), model_name=engine.model_name,
+                                 normalized=engine.normalize_embeddings)
+        for changed_event_id in {resume.event_id for resume in rows}:
+            bump_profile_version(changed_event_id)
+        db.session.commit()
+
+        checkpoint['resume_last_id'] = page[-1].id
+        save_checkpoint(checkpoint_path, checkpoint)
+        done += len(page)
+        embedded += len(rows)
+        print_info(f"Resumes: {done}/{total}")
+
+    return embedded
+
+
+def reembed_memberships(engine, event_id, missing_only, stale_only, page_size, batch_size,
+                        checkpoint, checkpoint_path) -> int:
+    """Re-embed membership keywords page by page; returns the number of rows re-embedded"""
+    query = Membership.query.filter(Membership.keywords.isnot(None), Membership.keywords != '')
+    if event_id:
+        query = query.filter(Membership.event_id == event_id)
+    if missing_only:
+        query = query.filter(Membership.keyword_embedding.is_(None))
+    if stale_only:
+        query = query.filter(Membership.keyword_embedding.isnot(None))
+
+    total = query.filter(Membership.id > checkpoint['membership_last_id']).count()
+    done = embedded = 0
+    while True:
+        page = (
+            query.filter(Membership.id > checkpoint['membership_last_id'])
+            .order_by(Membership.id)
+            .limit(page_size)
+            .all()
+        )
+        if not page:
+            break
+        rows = page
+        if stale_only:
+            rows = [membership for membership in page if not engine.is_current_embedding(
+                membership.get_keyword_embedding(), membership.keyword_embedding_model,
+                membership.keyword_embedding_normalized)]
+
+        # Joined exactly like MatchingEngine.embed_keywords
+        vectors = engine.encode_many([", ".join(m.get_keywords_list()) for m in rows], batch_size=batch_size)
+        for membership, vector in zip(rows, vectors):
+            membership.set_keyword_embedding(_valid_vector(vector), model_name=engine.model_name,
+                                             normalized=engine.normalize_embeddings)
+        for changed_event_id in {membership.event_id for membership in rows}:
+            bump_profile_version(changed_event_id)
+        db.session.commit()
+
+        checkpoint['membership_last_id'] = page[-1].id
+        save_checkpoint(checkpoint_path, checkpoint)
+        done += len(page)
+        embedded += len(rows)
+        print_info(f"Memberships: {done}/{total}")
+
+    return embedded
+
+
+def main():
+    """Main function with argument parsing."""
+    parser = argparse.ArgumentParser(
+        description='Re-embed stored resume and keyword embeddings',
+        epilog='Examples:\n'
+               '  %(prog)s --all                     Re-embed everything (e.g. after a model change)\n'
+               '  %(prog)s --all --missing-only      Backfill rows with no embedding\n'
+               '  %(prog)s --all --stale-only        Convert vectors of a previous EMBEDDING_MODEL\n'
+               '  %(prog)s --event 3                 Re-embed one event\n',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    target_group = parser.add_mutually_exclusive_group(required=True)
+    target_group.add_argument('--event', type=int, metavar='EVENT_ID',
+                              help='Only re-embed rows of this event')
+    target_group.add_argument('--all', action='store_true',
+                              help='Re-embed rows of every event')
+
+    filter_group = parser.add_mutually_exclusive_group()
+    filter_group.add_argument('--missing-only', action='store_true',
+                              help='Only embed rows that have no embedding yet')
+    filter_group.add_argument('--stale-only', action='store_true',
+                              help='Only re-embed rows embedded by another model')
+    parser.add_argument('--batch-size', type=int,
+                        help='Texts per model call (default: EMBEDDING_BATCH_SIZE)')
+    parser.add_argument('--page-size', type=int, default=200,
+                        help='Rows committed per checkpoint (default: 200)')
+    parser.add_argument('--checkpoint', default=str(DEFAULT_CHECKPOINT),
+                        help=f'Checkpoint file (default: {DEFAULT_CHECKPOINT})')
+    parser.add_argument('--restart', action='store_true',
+                        help='Ignore an existing checkpoint and start over')
+
+    args = parser.parse_args()
+
+    print_section("Re-embedding", "🧬")
+    scope = {'event': args.event, 'missing_only': args.missing_only, 'stale_only': args.stale_only,
+             'model': Config.EMBEDDING_MODEL}
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    with app.app_context():
+        if args.event and not Event.query.get(args.event):
+            print_error(f"Event {args.event} not found")
+            return
+
+        from matching_engine import matching_engine
+        checkpoint = load_checkpoint(args.checkpoint, scope)
+        batch_size = args.batch_size or app.config.get('EMBEDDING_BATCH_SIZE', 32)
+
+        resumes = reembed_resumes(matching_engine, args.event, args.missing_only, args.stale_only,
+                                  args.page_size, batch_size, checkpoint, args.checkpoint)
+        memberships = reembed_memberships(matching_engine, args.event, args.missing_only, args.stale_only,
+                                          args.page_size, batch_size, checkpoint, args.checkpoint)
+
+    # Finished: the next run starts from scratch
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    print_success(f"Re-embedded {resumes} resume(s) and {memberships} membership(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -27,7 +27,7 @@ def create_app(config_name=None):
     # For SQLite: ensure the database directory exists and use absolute path
     # For Postgres: don't override DATABASE_URL (it's already set from config/environment)
     db_uri = app.config.get('SQLALCHEMY_DATABASE_URI', '')
-    if db_uri.startswith('sqlite:///'):
+    if db_uri.startswith('sqlite:///') and db_uri != 'sqlite:///:memory:':
         # Extract path and make it absolute relative to PROJECT_ROOT
         db_path = db_uri.replace('sqlite:///', '', 1)
         # If it's a relative path, make it absolute relative to PROJECT_ROOT
@@ -41,10 +41,116 @@ class Config:
     APP_VERSION = '1.0.0'
     
     # Matching Configuration
-    # Maximum number of attendees to process in a single matching request
-    # This prevents OOM errors on Render for very large events
+    # Maximum number of attendees listed when the matching engine is unavailable
+    # (scored matching uses the ANN index below instead of truncating)
     # Set via environment variable MAX_MATCH_ATTENDEES (default: 500)
     MAX_MATCH_ATTENDEES = int(os.environ.get('MAX_MATCH_ATTENDEES', 500))
+    
+    # Approximate nearest-neighbour index for large events
+    # Events with at least ANN_MIN_EVENT_SIZE members are searched through an IVF
+    # index; ANN_NPROBE inverted lists are probed (higher = better recall, slower)
+    # and the search widens until ANN_MIN_SHORTLIST eligible candidates are found.
+    ANN_MIN_EVENT_SIZE = int(os.environ.get('ANN_MIN_EVENT_SIZE', 2000))
+    ANN_NPROBE = int(os.environ.get('ANN_NPROBE', 8))
+    ANN_MIN_SHORTLIST = int(os.environ.get('ANN_MIN_SHORTLIST', 200))
+    
+    # Rank candidates by their cheap keyword score first and only compute document
+    # similarities for those whose best possible score could still make the top-k.
+    # Same results; pruned/scored pair counters are reported by /api/ready
+    MATCH_SCORE_PRUNING = os.environ.get('MATCH_SCORE_PRUNING', 'true').lower() in ['true', 'on', '1']
+    
+    # Load the sentence-transformer in a background thread at boot (main.py). When
+    # disabled it loads lazily on the first matching request and /api/ready
+    # doesn't wait for it.
+    MODEL_WARMUP_ON_START = os.environ.get('MODEL_WARMUP_ON_START', 'true').lower() in ['true', 'on', '1']
+    
+    # Sentence-transformer model and how it runs on CPU: 'torch' (full precision),
+    # 'torch-int8' (dynamic int8 quantization) or 'onnx' (ONNX Runtime; optionally a
+    # quantized graph from the model repo via EMBEDDING_ONNX_FILE). A smaller model
+    # such as all-MiniLM-L6-v2 is faster still; after changing the model, stored
+    # vectors are re-embedded lazily (see below). Compare options with
+    # scripts/benchmark_embeddings.py
+    EMBEDDING_MODEL = os.environ.get('EMBEDDING_MODEL', 'all-mpnet-base-v2')
+    EMBEDDING_INFERENCE = os.environ.get('EMBEDDING_INFERENCE', 'torch')
+    EMBEDDING_ONNX_FILE = os.environ.get('EMBEDDING_ONNX_FILE') or None
+    
+    # Stored vectors from another model are never scored. Building an event's
+    # matching data re-embeds up to this many stale documents (keywords are
+    # always re-embedded); the rest wait for scripts/reembed.py --stale-only
+    EMBEDDING_LAZY_REEMBED_LIMIT = int(os.environ.get('EMBEDDING_LAZY_REEMBED_LIMIT', 64))
+    
+    # Where embeddings are computed: 'local' loads the model in every worker, 'server'
+    # sends encode requests to one shared embedding server (scripts/embedding_server.py)
+    # at EMBEDDING_SERVER_URL ('unix:///path.sock' or 'http://127.0.0.1:8765'),
+    # falling back to a local model if the server can't be reached
+    EMBEDDING_BACKEND = os.environ.get('EMBEDDING_BACKEND', 'local')
+    EMBEDDING_SERVER_URL = os.environ.get('EMBEDDING_SERVER_URL', 'unix:///tmp/prophere-embeddings.sock')
+    EMBEDDING_SERVER_TIMEOUT = float(os.environ.get('EMBEDDING_SERVER_TIMEOUT', 30))
+    
+    # Background threads extracting and embedding uploaded documents (utils.resume_ingestion)
+    RESUME_INGEST_WORKERS = int(os.environ.get('RESUME_INGEST_WORKERS', 2))
+    # Seconds an upload may stay pending/processing before the status endpoint
+    # assumes its job was lost (e.g. with a restarted worker) and queues it again
+    RESUME_PROCESSING_TIMEOUT = int(os.environ.get('RESUME_PROCESSING_TIMEOUT', 300))
+    
+    # Background match jobs started by the matching loading page (utils.match_jobs):
+    # worker threads, seconds a finished candidate list is kept for the deck render,
+    # and seconds after which a job still 'running' is assumed lost with its worker
+    MATCH_JOB_WORKERS = int(os.environ.get('MATCH_JOB_WORKERS', 2))
+    MATCH_RESULT_TTL_SECONDS = int(os.environ.get('MATCH_RESULT_TTL_SECONDS', 60))
+    MATCH_JOB_TIMEOUT_SECONDS = int(os.environ.get('MATCH_JOB_TIMEOUT_SECONDS', 300))
+    
+    # Stored swipe decks (utils.swipe_deck): candidates ranked per deck, and cards
+    # per page (the matching page's first page and the deck endpoint's default)
+    SWIPE_DECK_SIZE = int(os.environ.get('SWIPE_DECK_SIZE', 50))
+    SWIPE_DECK_PAGE_SIZE = int(os.environ.get('SWIPE_DECK_PAGE_SIZE', 20))
+    
+    # Texts per sentence-transformer call when embedding in bulk (MatchingEngine.encode_many)
+    EMBEDDING_BATCH_SIZE = int(os.environ.get('EMBEDDING_BATCH_SIZE', 32))
+    
+    # Coalesce concurrent encode calls (e.g. one keyword string per request) into
+    # one model call: a batch is sent once EMBEDDING_COALESCE_MAX_BATCH texts are
+    # queued or the oldest has waited EMBEDDING_COALESCE_WAIT_MS (utils.encode_batcher)
+    EMBEDDING_COALESCE = os.environ.get('EMBEDDING_COALESCE', 'true').lower() in ['true', 'on', '1']
+    EMBEDDING_COALESCE_MAX_BATCH = int(os.environ.get('EMBEDDING_COALESCE_MAX_BATCH', 64))
+    EMBEDDING_COALESCE_WAIT_MS = float(os.environ.get('EMBEDDING_COALESCE_WAIT_MS', 5))
+    
+    # Text extraction budgets per uploaded document: reading stops after
+    # DOCUMENT_MAX_PAGES PDF pages or DOCUMENT_MAX_CHARS characters
+    DOCUMENT_MAX_PAGES = int(os.environ.get('DOCUMENT_MAX_PAGES', 25))
+    DOCUMENT_MAX_CHARS = int(os.environ.get('DOCUMENT_MAX_CHARS', 60000))
+    
+    # Parse documents in a child process (utils.document_extraction) that is
+    # killed after DOCUMENT_EXTRACTION_TIMEOUT seconds and limited to
+    # DOCUMENT_EXTRACTION_MEMORY_MB of address space; at most
+    # DOCUMENT_EXTRACTION_PROCESSES run at once
+    DOCUMENT_EXTRACTION_SANDBOX = os.environ.get('DOCUMENT_EXTRACTION_SANDBOX', 'true').lower() in ['true', 'on', '1']
+    DOCUMENT_EXTRACTION_TIMEOUT = float(os.environ.get('DOCUMENT_EXTRACTION_TIMEOUT', 30))
+    DOCUMENT_EXTRACTION_MEMORY_MB = int(os.environ.get('DOCUMENT_EXTRACTION_MEMORY_MB', 512))
+    DOCUMENT_EXTRACTION_PROCESSES = int(os.environ.get('DOCUMENT_EXTRACTION_PROCESSES', 2))
+    
+    # Document embeddings: 'chunked' splits long text into chunks of about
+    # DOCUMENT_CHUNK_WORDS words (kept under the model's token limit), encodes at
+    # most DOCUMENT_MAX_CHUNKS of them (spread over the whole document) and pools
+    # them ('mean' or 'max'); 'single' encodes the text in one call, which the
+    # model truncates at its token limit
+    DOCUMENT_EMBEDDING_MODE = os.environ.get('DOCUMENT_EMBEDDING_MODE', 'chunked')
+    DOCUMENT_CHUNK_WORDS = int(os.environ.get('DOCUMENT_CHUNK_WORDS', 200))
+    DOCUMENT_MAX_CHUNKS = int(os.environ.get('DOCUMENT_MAX_CHUNKS', 16))
+    DOCUMENT_POOLING = os.environ.get('DOCUMENT_POOLING', 'mean')
+    
+    # Storage dtype for embedding vectors ('float32' or 'float16')
+    # float16 halves storage again at a small precision cost
+    EMBEDDING_STORAGE_DTYPE = os.environ.get('EMBEDDING_STORAGE_DTYPE', 'float32')
+    
+    # Memory budget (MB) for the per-process cache of event profile matrices
+    # Least-recently-used events are evicted when the budget is exceeded
+    EVENT_MATRIX_CACHE_MB = int(os.environ.get('EVENT_MATRIX_CACHE_MB', 256))
+    
+    # Precomputed recommendation lists (utils.recommendations): candidates kept
+    # per attendee, and the row/column block size of the batch job's score tiles
+    RECOMMENDATIONS_TOP_N = int(os.environ.get('RECOMMENDATIONS_TOP_N', 50))
+    RECOMMENDATIONS_BLOCK_SIZE = int(os.environ.get('RECOMMENDATIONS_BLOCK_SIZE', 512))
 
 class DevelopmentConfig(Config):
     """Development environment configuration"""
@@ -7,33 +7,202 @@ MEMORY OPTIMIZATIONS:
 - Uses cached embeddings from Resume model to avoid recomputation
 - Processes matches in batches to reduce peak memory usage
 - Avoids storing large document text in memory during matching
+- Scores all candidates at once with stacked float32 matrices (see score_candidates)
+- Encodes uncached texts in length-sorted batches (see encode_many)
+- Embeds long documents as a capped number of pooled chunks (see embed_documents)
+- Streams PDF/Word text page by page within page/character budgets, in a
+  resource-limited child process (see extract_document)
+- Loads the sentence transformer lazily / in a background warmup, not at import
+- Coalesces concurrent encode calls into shared model calls (utils.encode_batcher)
+- Never scores stored vectors of another model (see is_current_embedding)
+- Skips document similarities of candidates whose score upper bound can't
+  make the top-k (see rank_profile_matrices)
 """
 
 import os
 import logging
 import json
-from typing import List, Dict, Tuple, Optional
+import threading
+import time
+from typing import List, Dict, Tuple, Optional, Union
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
-import PyPDF2
-from docx import Document
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Minimum match score for a candidate to be recommended (chosen from evaluation)
+MATCH_THRESHOLD = 0.26
+
+# Use all-mpnet-base-v2 for high accuracy
+DEFAULT_MODEL_NAME = 'all-mpnet-base-v2'
+
+# Output dimensions of the supported models (MiniLM models are ~4-5x faster on CPU)
+EMBEDDING_DIMENSIONS = {
+    'all-mpnet-base-v2': 768,
+    'all-MiniLM-L12-v2': 384,
+    'all-MiniLM-L6-v2': 384,
+    'paraphrase-MiniLM-L3-v2': 384,
+}
+
+# CPU inference backends for the local model (EMBEDDING_INFERENCE)
+INFERENCE_BACKENDS = ('torch', 'torch-int8', 'onnx')
+
 class MatchingEngine:
-    def __init__(self):
-        """Initialize the matching engine with the sentence transformer model"""
+    def __init__(self, model_name: Optional[str] = None, backend: Optional[str] = None,
+                 server_url: Optional[str] = None, inference: Optional[str] = None):
+        """
+        Initialize the matching engine.
+        
+        The sentence transformer (~420 MB) is loaded lazily on first use, or
+        ahead of time by warmup()/start_warmup(), so importing this module is cheap.
+        
+        Args:
+            model_name: Sentence-transformer model name; default EMBEDDING_MODEL
+            backend: 'local' (model in this process) or 'server' (shared embedding
+                     server, see utils.embedding_service); default EMBEDDING_BACKEND
+            server_url: Embedding server address; default EMBEDDING_SERVER_URL
+            inference: How the local model runs on CPU: 'torch' (full precision),
+                       'torch-int8' (dynamically quantized Linear layers) or 'onnx'
+                       (ONNX Runtime); default EMBEDDING_INFERENCE
+        """
+        from config import Config
+        self.model_name = model_name or Config.EMBEDDING_MODEL
+        self.inference = inference or Config.EMBEDDING_INFERENCE
+        self.onnx_file = Config.EMBEDDING_ONNX_FILE
+        self.backend = backend or Config.EMBEDDING_BACKEND
+        self.server_url = server_url or Config.EMBEDDING_SERVER_URL
+        self.server_timeout = Config.EMBEDDING_SERVER_TIMEOUT
+        self.coalesce = Config.EMBEDDING_COALESCE
+        self.coalesce_max_batch = Config.EMBEDDING_COALESCE_MAX_BATCH
+        self.coalesce_wait_ms = Config.EMBEDDING_COALESCE_WAIT_MS
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._model_error = None
+        self._warmup_thread = None
+        self.document_mode = Config.DOCUMENT_EMBEDDING_MODE
+        self.document_chunk_words = Config.DOCUMENT_CHUNK_WORDS
+        self.document_max_chunks = Config.DOCUMENT_MAX_CHUNKS
+        self.document_pooling = Config.DOCUMENT_POOLING
+        self.document_max_pages = Config.DOCUMENT_MAX_PAGES
+        self.document_max_chars = Config.DOCUMENT_MAX_CHARS
+        self.extraction_sandbox = Config.DOCUMENT_EXTRACTION_SANDBOX
+        self.extraction_timeout = Config.DOCUMENT_EXTRACTION_TIMEOUT
+        self.extraction_memory_mb = Config.DOCUMENT_EXTRACTION_MEMORY_MB
+        self.extraction_processes = Config.DOCUMENT_EXTRACTION_PROCESSES
+        # Stored vectors are raw model output (normalized at scoring time)
+        self.normalize_embeddings = False
+        self.score_pruning = Config.MATCH_SCORE_PRUNING
+        # Candidate pairs scored in full / skipped by pruning (see _rank_pruned)
+        self._pruning_lock = threading.Lock()
+        self.scored_pairs = 0
+        self.pruned_pairs = 0
+    
+    @property
+    def model(self):
+        """The sentence transformer, loaded on first access (thread-safe)"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        self._model = model
+    
+    def _load_model(self):
+        if self.backend == 'server':
+            from utils.embedding_service import RemoteEmbeddingModel
+            logger.info(f"Using embedding server at {self.server_url}")
+            model = RemoteEmbeddingModel(
+                self.server_url, timeout=self.server_timeout, fallback_factory=self._load_local_model
+            )
+        else:
+            model = self._load_local_model()
+        if self.coalesce:
+            # Concurrent requests share model calls (one round trip to the server)
+            from utils.encode_batcher import BatchingEncoder
+            model = BatchingEncoder(model, max_batch=self.coalesce_max_batch, max_wait_ms=self.coalesce_wait_ms)
+        return model
+    
+    def _load_local_model(self):
         try:
-            # Use all-mpnet-base-v2 for high accuracy
-            self.model = SentenceTransformer('all-mpnet-base-v2')
-            logger.info("Sentence transformer model loaded successfully")
+            from sentence_transformers import SentenceTransformer
+            started = time.perf_counter()
+            if self.inference == 'torch':
+                model = SentenceTransformer(self.model_name)
+            elif self.inference == 'torch-int8':
+                import torch
+                model = torch.ao.quantization.quantize_dynamic(
+                    SentenceTransformer(self.model_name, device='cpu'), {torch.nn.Linear}, dtype=torch.qint8
+                )
+            elif self.inference == 'onnx':
+                # Needs the onnx extra (pip install "sentence-transformers[onnx]"); EMBEDDING_ONNX_FILE
+                # selects a pre-exported graph in the model repo, e.g. a quantized onnx/model_qint8_avx2.onnx
+                model_kwargs = {'file_name': self.onnx_file} if self.onnx_file else None
+                model = SentenceTransformer(self.model_name, device='cpu', backend='onnx', model_kwargs=model_kwargs)
+            else:
+                raise ValueError(f"Unknown inference backend {self.inference!r} (expected one of {INFERENCE_BACKENDS})")
+            self._model_error = None
+            logger.info(f"Sentence transformer model loaded successfully "
+                        f"({self.model_name}, {self.inference}, {time.perf_counter() - started:.1f}s)")
+            return model
         except Exception as e:
+            self._model_error = str(e)
             logger.error(f"Failed to load sentence transformer model: {e}")
             raise
     
+    @property
+    def is_model_loaded(self) -> bool:
+        return self._model is not None
+    
+    @property
+    def embedding_dim(self) -> int:
+        """Embedding dimension of the model (known without loading it)"""
+        get_dimension = getattr(self._model, 'get_sentence_embedding_dimension', None)
+        dimension = get_dimension() if get_dimension else None
+        return dimension or EMBEDDING_DIMENSIONS.get(self.model_name, 768)
+    
+    def warmup(self) -> bool:
+        """
+        Load the model and run one encode so the first request doesn't pay for it.
+        
+        Returns:
+            True if the model is ready, False if loading failed
+        """
+        try:
+            self.model.encode(["warmup"], show_progress_bar=False)
+            return True
+        except Exception as e:
+            logger.error(f"Model warmup failed: {e}")
+            return False
+    
+    def start_warmup(self) -> threading.Thread:
+        """Run warmup() in a background thread (at most one at a time)"""
+        with self._model_lock:
+            if self._warmup_thread is None or not self._warmup_thread.is_alive():
+                self._warmup_thread = threading.Thread(target=self.warmup, name='model-warmup', daemon=True)
+                self._warmup_thread.start()
+            return self._warmup_thread
+    
+    def status(self) -> Dict:
+        """Readiness information for health checks"""
+        batching_stats = getattr(self._model, 'stats', None)
+        return {
+            'encode_batching': batching_stats() if batching_stats else None,
+            'model': self.model_name,
+            'backend': self.backend,
+            'inference': self.inference,
+            'loaded': self.is_model_loaded,
+            'warming': self._warmup_thread is not None and self._warmup_thread.is_alive(),
+            'error': self._model_error,
+            'score_pruning': self.score_pruning,
+            'scored_pairs': self.scored_pairs,
+            'pruned_pairs': self.pruned_pairs,
+        }
+    
     def extract_text_from_document(self, file_path: str) -> str:
         """
         Extract text content from various document formats
@@ -42,51 +211,52 @@ class MatchingEngine:
             file_path: Path to the document file
             
         Returns:
-            Extracted text content
+            Extracted text content (within the extraction budgets, see extract_document)
+        """
+        return self.extract_document(file_path)['text']
+    
+    def extract_document(self, file_path: str) -> Dict:
+        """
+        Extract text from a document within the page and character budgets.
+        
+        Pages (PDF) or paragraphs (Word) are streamed one at a time and reading
+        stops once document_max_pages pages or document_max_chars characters
+        have been collected, so a 200-page PDF costs no more than its first pages.
+        With extraction_sandbox the parser runs in a resource-limited child
+        process (see utils.document_extraction).
+        
+        Args:
+            file_path: Path to the document file
+            
+        Returns:
+            Dict with 'text', 'truncated' (bool), 'note' (what was left out, or None)
+            and 'error' (why extraction failed, or None)
         """
+        from utils import document_extraction
+        
+        result = {'text': "", 'truncated': False, 'note': None, 'error': None}
         try:
             if not os.path.exists(file_path):
                 logger.warning(f"File not found: {file_path}")
-                return ""
+                return result
             
-            file_extension = os.path.splitext(file_path)[1].lower()
-            
-            if file_extension == '.pdf':
-                return self._extract_pdf_text(file_path)
-            elif file_extension in ['.doc', '.docx']:
-                return self._extract_word_text(file_path)
+            if self.extraction_sandbox:
+                result.update(document_extraction.extract_text_sandboxed(
+                    file_path, self.document_max_pages, self.document_max_chars,
+                    timeout=self.extraction_timeout, memory_mb=self.extraction_memory_mb,
+                    max_processes=self.extraction_processes
+                ))
             else:
-                logger.warning(f"Unsupported file format: {file_extension}")
-                return ""
+                result.update(document_extraction.extract_text(
+                    file_path, self.document_max_pages, self.document_max_chars
+                ))
+            if result['truncated']:
+                logger.info(f"Truncated text of {file_path}: {result['note']}")
+            return result
                 
         except Exception as e:
             logger.error(f"Error extracting text from {file_path}: {e}")
-            return ""
-    
-    def _extract_pdf_text(self, file_path: str) -> str:
-        """Extract text from PDF files"""
-        try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text.strip()
-        except Exception as e:
-            logger.error(f"Error reading PDF {file_path}: {e}")
-            return ""
-    
-    def _extract_word_text(self, file_path: str) -> str:
-        """Extract text from Word documents"""
-        try:
-            doc = Document(file_path)
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
-        except Exception as e:
-            logger.error(f"Error reading Word document {file_path}: {e}")
-            return ""
+            return {'text': "", 'truncated': False, 'note': None, 'error': 'Document could not be read'}
     
     def preprocess_text(self, text: str) -> str:
         """
@@ -113,44 +283,191 @@ class MatchingEngine:
         
         return text.strip()
     
-    def get_text_embedding(self, text: str, cached_embedding: Optional[str] = None) -> np.ndarray:
+    @staticmethod
+    def _has_cached_embedding(cached_embedding: Optional[Union[str, np.ndarray]]) -> bool:
+        """True if a cached embedding (numpy vector or legacy JSON string) is present"""
+        return cached_embedding is not None and len(cached_embedding) > 0
+    
+    def is_current_embedding(self, vector: Optional[np.ndarray], model_name: Optional[str],
+                             normalized: Optional[bool] = False) -> bool:
+        """
+        True if a stored vector can be scored against this engine's embeddings.
+        
+        Vectors from another model, of another dimension or with different
+        normalization are stale: they must be re-embedded, never compared.
+        Int8/ONNX inference of the same model produces compatible vectors.
+        
+        Args:
+            vector: Decoded stored vector (None is never current)
+            model_name: Model tag stored with the vector (None: legacy row, default model)
+            normalized: Normalization tag stored with the vector (None: legacy row, raw)
+        """
+        if vector is None:
+            return False
+        return ((model_name or DEFAULT_MODEL_NAME) == self.model_name
+                and vector.shape[-1] == self.embedding_dim
+                and bool(normalized) == self.normalize_embeddings)
+    
+    def get_text_embedding(self, text: str, cached_embedding: Optional[Union[str, np.ndarray]] = None) -> np.ndarray:
         """
         Convert text to semantic embedding vector.
         
-        MEMORY OPTIMIZATION: If cached_embedding (JSON string) is provided, use it instead
+        MEMORY OPTIMIZATION: If cached_embedding is provided, use it instead
         of recomputing. This avoids loading the transformer model and processing text
         on every match calculation.
         
         Args:
             text: Input text (used if cached_embedding is None)
-            cached_embedding: Optional JSON string of pre-computed embedding array
+            cached_embedding: Optional pre-computed embedding, either a numpy vector
+                              (binary storage format) or a legacy JSON string
             
         Returns:
-            Embedding vector (768 dimensions for all-mpnet-base-v2)
+            Embedding vector (embedding_dim components, 768 for all-mpnet-base-v2)
         """
         # Use cached embedding if available (memory optimization)
-        if cached_embedding:
+        cached_vector = self._decode_cached_embedding(cached_embedding)
+        if cached_vector is not None:
+            return cached_vector
+        
+        if not text:
+            # Return zero vector for empty text
+            return np.zeros(self.embedding_dim, dtype=np.float32)
+        
+        try:
+            return self.encode_many([text])[0]
+        except Exception as e:
+            logger.error(f"Error generating embedding: {e}")
+            return np.zeros(self.embedding_dim, dtype=np.float32)
+    
+    @staticmethod
+    def _decode_cached_embedding(cached_embedding: Optional[Union[str, np.ndarray]]) -> Optional[np.ndarray]:
+        """Return a cached embedding as a float32 vector, or None if absent or unparseable"""
+        # Decoded binary embeddings need no parsing at all
+        if isinstance(cached_embedding, np.ndarray) and cached_embedding.size:
+            return cached_embedding.astype(np.float32, copy=False)
+        
+        if isinstance(cached_embedding, str) and cached_embedding:
             try:
-                embedding_list = json.loads(cached_embedding)
-                return np.array(embedding_list, dtype=np.float32)
+                return np.array(json.loads(cached_embedding), dtype=np.float32)
             except (json.JSONDecodeError, ValueError, TypeError) as e:
                 logger.warning(f"Failed to parse cached embedding, recomputing: {e}")
-                # Fall through to recompute
+        return None
+    
+    def encode_many(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Embed many texts with batched model calls.
+        
+        Texts are preprocessed like get_text_embedding and sorted by length so
+        each batch pads to similar lengths; rows are returned in input order.
+        Empty texts get zero rows without reaching the model.
+        
+        Args:
+            texts: Texts to embed
+            batch_size: Texts per model call (default: EMBEDDING_BATCH_SIZE, 32)
+            
+        Returns:
+            float32 matrix of shape (len(texts), embedding_dim)
+        """
+        if batch_size is None:
+            try:
+                from flask import current_app
+                batch_size = current_app.config.get('EMBEDDING_BATCH_SIZE', 32)
+            except RuntimeError:
+                batch_size = 32
+        batch_size = max(1, batch_size)
+        
+        cleaned = [self.preprocess_text(text) if text else "" for text in texts]
+        embeddings = np.zeros((len(texts), self.embedding_dim), dtype=np.float32)
+        order = sorted((i for i, text in enumerate(cleaned) if text), key=lambda i: len(cleaned[i]), reverse=True)
+        
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encoded = self.model.encode(
+                [cleaned[i] for i in batch], batch_size=len(batch), show_progress_bar=False
+            )
+            encoded = np.asarray(encoded, dtype=np.float32)
+            if encoded.shape[1] != embeddings.shape[1]:
+                embeddings = np.zeros((len(texts), encoded.shape[1]), dtype=np.float32)
+            embeddings[batch] = encoded
+        return embeddings
+    
+    def chunk_document(self, text: str) -> List[str]:
+        """
+        Split a document into chunks that fit the model's token limit.
+        
+        Chunks are runs of document_chunk_words whitespace-separated words
+        (~1.3 tokens per word keeps 200 words under mpnet's 384 tokens). If
+        there are more than document_max_chunks, evenly spaced chunks are kept
+        so the whole document is still represented; only the kept chunks are
+        preprocessed and encoded.
         
+        Args:
+            text: Raw document text
+            
+        Returns:
+            List of chunk texts (empty for empty text)
+        """
         if not text:
-            # Return zero vector for empty text
-            return np.zeros(768, dtype=np.float32)  # all-mpnet-base-v2 has 768 dimensions
+            return []
+        words = text.split()
+        size = max(1, self.document_chunk_words)
+        starts = list(range(0, len(words), size))
+        max_chunks = max(1, self.document_max_chunks)
+        if len(starts) > max_chunks:
+            keep = np.linspace(0, len(starts) - 1, max_chunks).round().astype(int)
+            starts = [starts[i] for i in keep]
+        return [" ".join(words[start:start + size]) for start in starts]
+    
+    def embed_documents(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Embed documents, pooling chunk embeddings in 'chunked' mode.
         
-        try:
-            # Preprocess text
-            cleaned_text = self.preprocess_text(text)
+        The chunks of all documents are encoded together by encode_many and
+        pooled per document with document_pooling ('mean' or 'max'). In
+        'single' mode each text is encoded whole (truncated by the model).
+        
+        Args:
+            texts: Document texts
+            batch_size: Chunks per model call (see encode_many)
             
-            # Generate embedding
-            embedding = self.model.encode([cleaned_text], show_progress_bar=False)[0]
-            return embedding.astype(np.float32)  # Use float32 to save memory
+        Returns:
+            float32 matrix of shape (len(texts), embedding_dim); zero rows for empty texts
+        """
+        if self.document_mode != 'chunked':
+            return self.encode_many(texts, batch_size=batch_size)
+        
+        chunks, owners = [], []
+        for i, text in enumerate(texts):
+            document_chunks = self.chunk_document(text)
+            chunks.extend(document_chunks)
+            owners.extend([i] * len(document_chunks))
+        encoded = self.encode_many(chunks, batch_size=batch_size)
+        owners = np.asarray(owners, dtype=np.int64)
+        
+        embeddings = np.zeros((len(texts), encoded.shape[1]), dtype=np.float32)
+        for i in range(len(texts)):
+            rows = encoded[owners == i]
+            # Chunks that produced nothing (e.g. only punctuation) don't count
+            rows = rows[np.any(rows, axis=1)]
+            if len(rows):
+                embeddings[i] = rows.max(axis=0) if self.document_pooling == 'max' else rows.mean(axis=0)
+        return embeddings
+    
+    def embed_document(self, text: str) -> Optional[np.ndarray]:
+        """
+        Embed one document (see embed_documents).
+        
+        Returns:
+            float32 embedding vector, or None for empty text or a failed encode
+        """
+        if not text:
+            return None
+        try:
+            embedding = self.embed_documents([text])[0]
         except Exception as e:
-            logger.error(f"Error generating embedding: {e}")
-            return np.zeros(768, dtype=np.float32)
+            logger.error(f"Error generating document embedding: {e}")
+            return None
+        return embedding if np.any(embedding) else None
     
     def calculate_keyword_similarity(self, keywords1: List[str], keywords2: List[str], 
                                      cached_embedding1: Optional[str] = None,
@@ -223,8 +540,12 @@ class MatchingEngine:
         
         try:
             # Get embeddings (use cached if available - major memory optimization)
-            embedding1 = self.get_text_embedding(doc_text1, cached_embedding1)
-            embedding2 = self.get_text_embedding(doc_text2, cached_embedding2)
+            embedding1 = self._decode_cached_embedding(cached_embedding1)
+            if embedding1 is None:
+                embedding1 = self.embed_documents([doc_text1])[0]
+            embedding2 = self._decode_cached_embedding(cached_embedding2)
+            if embedding2 is None:
+                embedding2 = self.embed_documents([doc_text2])[0]
             
             # Calculate cosine similarity
             similarity = cosine_similarity([embedding1], [embedding2])[0][0]
@@ -252,8 +573,8 @@ class MatchingEngine:
         """
         try:
             # Check document availability (use cached text or document_text field)
-            user1_has_doc = bool(user1_data.get('document_text', '').strip()) or bool(user1_data.get('cached_doc_embedding'))
-            user2_has_doc = bool(user2_data.get('document_text', '').strip()) or bool(user2_data.get('cached_doc_embedding'))
+            user1_has_doc = bool(user1_data.get('document_text', '').strip()) or self._has_cached_embedding(user1_data.get('cached_doc_embedding'))
+            user2_has_doc = bool(user2_data.get('document_text', '').strip()) or self._has_cached_embedding(user2_data.get('cached_doc_embedding'))
             
             # Get cached embeddings if available (memory optimization)
             user1_doc_embedding = user1_data.get('cached_doc_embedding')
@@ -333,64 +654,568 @@ class MatchingEngine:
             logger.error(f"Error calculating match score: {e}")
             return 0.0
     
+    def build_profile_matrices(self, users_data: List[Dict]) -> Dict:
+        """
+        Stack the keyword and document embeddings of several users into matrices.
+        
+        Rows are L2-normalized float32 vectors (zero rows where a vector is not
+        needed), so a single matrix product yields cosine similarities. Embeddings
+        are resolved exactly like the scalar path: cached embedding first, then
+        computed from the keyword/document text. The result holds no document
+        text, so it can be cached and reused across requests.
+        
+        Args:
+            users_data: List of user data dicts (same shape as calculate_match_score).
+                A true 'has_document' stands in for a document_text that wasn't
+                loaded because its 'cached_doc_embedding' is used instead.
+            
+        Returns:
+            Dict with 'keyword' and 'document' matrices, the boolean masks
+            'has_keywords', 'has_doc' and 'has_doc_text', and the 'keywords' lists
+        """
+        n = len(users_data)
+        keyword_rows = []
+        document_rows = []
+        has_keywords = np.zeros(n, dtype=bool)
+        has_doc = np.zeros(n, dtype=bool)
+        has_doc_text = np.zeros(n, dtype=bool)
+        
+        for i, user_data in enumerate(users_data):
+            keywords = user_data.get('keywords', [])
+            document_text = user_data.get('document_text', '')
+            cached_doc_embedding = user_data.get('cached_doc_embedding')
+            
+            has_keywords[i] = bool(keywords)
+            has_doc[i] = bool(document_text.strip()) or self._has_cached_embedding(cached_doc_embedding)
+            has_doc_text[i] = bool(document_text) or bool(user_data.get('has_document'))
+            
+            keyword_rows.append(
+                self._decode_cached_embedding(user_data.get('cached_keyword_embedding')) if has_keywords[i] else None
+            )
+            document_rows.append(
+                self._decode_cached_embedding(cached_doc_embedding) if has_doc_text[i] else None
+            )
+        
+        # Anything without a usable cached embedding is encoded in batched calls
+        # (documents chunked and pooled like the stored embeddings)
+        for rows, pending, encode in (
+            (keyword_rows, [(i, ", ".join(users_data[i].get('keywords', [])))
+                            for i in range(n) if has_keywords[i] and keyword_rows[i] is None], self.encode_many),
+            (document_rows, [(i, users_data[i].get('document_text', ''))
+                             for i in range(n) if has_doc_text[i] and document_rows[i] is None], self.embed_documents),
+        ):
+            if not pending:
+                continue
+            try:
+                encoded = encode([text for _, text in pending])
+            except Exception as e:
+                logger.error(f"Error generating embeddings: {e}")
+                encoded = np.zeros((len(pending), self.embedding_dim), dtype=np.float32)
+            for (i, _), embedding in zip(pending, encoded):
+                rows[i] = embedding
+        
+        return {
+            'keyword': self._normalized_matrix(keyword_rows),
+            'document': self._normalized_matrix(document_rows),
+            'has_keywords': has_keywords,
+            'has_doc': has_doc,
+            'has_doc_text': has_doc_text,
+            'keywords': [user_data.get('keywords', []) for user_data in users_data],
+        }
+    
+    def _normalized_matrix(self, rows: List[Optional[np.ndarray]]) -> np.ndarray:
+        """Stack vectors into an L2-normalized float32 matrix (None -> zero row, of the model's width if all are None)"""
+        dim = next((row.shape[0] for row in rows if row is not None), None) or self.embedding_dim
+        matrix = np.zeros((len(rows), dim), dtype=np.float32)
+        for i, row in enumerate(rows):
+            if row is not None:
+                matrix[i] = row
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # Zero vectors stay zero, matching sklearn's cosine_similarity behaviour
+        norms[norms == 0] = 1.0
+        return matrix / norms
+    
+    @staticmethod
+    def _exact_keyword_overlaps(keywords: List[str], candidates_keywords: List[List[str]]) -> np.ndarray:
+        """Count case-insensitive exact keyword matches between one user and each candidate"""
+        keyword_set = set(k.lower() for k in keywords)
+        return np.fromiter(
+            (len(keyword_set.intersection(k.lower() for k in candidate_keywords))
+             for candidate_keywords in candidates_keywords),
+            dtype=np.int64,
+            count=len(candidates_keywords)
+        )
+    
+    def score_candidates(self, current_user_data: Dict, candidates_data: List[Dict]) -> np.ndarray:
+        """
+        Calculate match scores between one user and many candidates at once.
+        
+        Vectorized equivalent of calling calculate_match_score for every candidate.
+        
+        Args:
+            current_user_data: Current user's data (same keys as calculate_match_score)
+            candidates_data: List of candidate users' data
+            
+        Returns:
+            float64 array of match scores, aligned with candidates_data
+        """
+        if not candidates_data:
+            return np.zeros(0, dtype=np.float64)
+        
+        return self.score_profile_matrices(
+            self.build_profile_matrices([current_user_data]),
+            self.build_profile_matrices(candidates_data)
+        )
+    
+    def keyword_scores(self, current: Dict, candidates: Dict,
+                       exact_matches: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Keyword component of the match score for every candidate row.
+        
+        Semantic keyword similarity (one matrix-vector product), overridden by
+        the exact-match boost, and 0 wherever either side has no keywords.
+        
+        Args:
+            current: build_profile_matrices() result for the current user (one row)
+            candidates: build_profile_matrices() result for the candidates (only
+                        'keyword', 'has_keywords' and 'keywords' are read)
+            exact_matches: Optional precomputed exact keyword overlap per candidate
+                           (e.g. KeywordIndex.overlap_counts), counted here if None
+            
+        Returns:
+            float64 array, one keyword similarity per candidate row
+        """
+        current_keywords = current['keywords'][0]
+        candidates_keywords = candidates['keywords']
+        if exact_matches is None:
+            exact_matches = self._exact_keyword_overlaps(current_keywords, candidates_keywords)
+        
+        keyword_similarity = (candidates['keyword'] @ current['keyword'][0]).astype(np.float64)
+        keyword_similarity = self._boost_exact_matches(
+            keyword_similarity, exact_matches, len(current_keywords), self._keyword_counts(candidates_keywords)
+        )
+        keyword_similarity[~(candidates['has_keywords'] & current['has_keywords'][0])] = 0.0
+        return keyword_similarity
+    
+    @staticmethod
+    def _keyword_counts(keywords_lists: List[List[str]]) -> np.ndarray:
+        """Number of keywords of each user"""
+        return np.fromiter((len(k) for k in keywords_lists), dtype=np.int64, count=len(keywords_lists))
+    
+    @staticmethod
+    def _boost_exact_matches(keyword_similarity, exact_matches, current_counts, candidate_counts) -> np.ndarray:
+        """Replace the semantic keyword similarity with the exact-match score wherever keywords overlap exactly"""
+        longest = np.maximum(np.maximum(candidate_counts, current_counts), 1)
+        exact_score = np.maximum(np.minimum(exact_matches / longest, 1.0), 0.3)
+        return np.where(exact_matches > 0, exact_score, keyword_similarity)
+    
+    @staticmethod
+    def _weighted_score(keyword_similarity, doc_to_doc, current_keywords_to_candidate_doc,
+                        candidate_keywords_to_current_doc, current_has_doc, candidate_has_doc) -> np.ndarray:
+        """Combine the score components with the document-availability weighting branches"""
+        return np.select(
+            [
+                candidate_has_doc & current_has_doc,
+                ~candidate_has_doc & current_has_doc,
+                candidate_has_doc & ~current_has_doc,
+            ],
+            [
+                keyword_similarity * 0.7
+                + doc_to_doc * 0.15
+                + current_keywords_to_candidate_doc * 0.075
+                + candidate_keywords_to_current_doc * 0.075,
+                keyword_similarity * 0.8 + candidate_keywords_to_current_doc * 0.2,
+                keyword_similarity * 0.8 + current_keywords_to_candidate_doc * 0.2,
+            ],
+            default=keyword_similarity
+        )
+    
+    def score_profile_matrices(self, current: Dict, candidates: Dict,
+                               exact_matches: Optional[np.ndarray] = None,
+                               keyword_similarity: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Score one user against every row of a candidate profile matrix set.
+        
+        Keyword, doc-to-doc and cross keyword/document similarities come from
+        three matrix-vector products; the exact-keyword boost and the four
+        document-availability weighting branches are applied with boolean masks.
+        
+        Args:
+            current: build_profile_matrices() result for the current user (one row)
+            candidates: build_profile_matrices() result for the candidates
+            exact_matches: Optional precomputed exact keyword overlap per candidate
+                           (e.g. KeywordIndex.overlap_counts), counted here if None
+            keyword_similarity: Optional precomputed keyword_scores() of the candidates
+            
+        Returns:
+            float64 array of match scores, one per candidate row
+        """
+        current_keyword_vector = current['keyword'][0]
+        current_document_vector = current['document'][0]
+        current_has_keywords = current['has_keywords'][0]
+        current_has_doc_text = current['has_doc_text'][0]
+        
+        keyword_matrix = candidates['keyword']
+        document_matrix = candidates['document']
+        
+        # Keyword component: semantic similarity, overridden by the exact-match boost
+        if keyword_similarity is None:
+            keyword_similarity = self.keyword_scores(current, candidates, exact_matches)
+        
+        # Document components (zeroed wherever the scalar path would return 0.0)
+        doc_to_doc = (document_matrix @ current_document_vector).astype(np.float64)
+        doc_to_doc[~(candidates['has_doc_text'] & current_has_doc_text)] = 0.0
+        
+        current_keywords_to_candidate_doc = (document_matrix @ current_keyword_vector).astype(np.float64)
+        current_keywords_to_candidate_doc[~(candidates['has_doc_text'] & current_has_keywords)] = 0.0
+        
+        candidate_keywords_to_current_doc = (keyword_matrix @ current_document_vector).astype(np.float64)
+        candidate_keywords_to_current_doc[~(candidates['has_keywords'] & current_has_doc_text)] = 0.0
+        
+        # Dynamic weighting based on document availability
+        return self._weighted_score(keyword_similarity, doc_to_doc, current_keywords_to_candidate_doc,
+                                    candidate_keywords_to_current_doc, current['has_doc'][0], candidates['has_doc'])
+    
+    def score_upper_bounds(self, current: Dict, candidates: Dict, keyword_similarity: np.ndarray) -> np.ndarray:
+        """
+        Highest match score each candidate could reach, from the keyword component alone.
+        
+        Every document component is a cosine similarity of L2-normalized
+        vectors, so it is at most 1 where it applies (and 0 where it doesn't);
+        only the keyword component has to be known exactly.
+        
+        Args:
+            current: build_profile_matrices() result for the current user (one row)
+            candidates: build_profile_matrices() result for the candidates (masks only)
+            keyword_similarity: keyword_scores() of the candidates
+            
+        Returns:
+            float64 array of score upper bounds, one per candidate row
+        """
+        current_has_keywords = current['has_keywords'][0]
+        current_has_doc_text = current['has_doc_text'][0]
+        candidate_has_doc_text = candidates['has_doc_text']
+        
+        upper = self._weighted_score(
+            keyword_similarity,
+            (candidate_has_doc_text & current_has_doc_text).astype(np.float64),
+            (candidate_has_doc_text & current_has_keywords).astype(np.float64),
+            (candidates['has_keywords'] & current_has_doc_text).astype(np.float64),
+            current['has_doc'][0], candidates['has_doc']
+        )
+        # Headroom for float32 rounding of cosines of normalized vectors
+        return upper + 1e-6
+    
+    @staticmethod
+    def keyword_term_matrix(keywords_lists: List[List[str]]):
+        """
+        Binary user x keyword matrix for counting exact keyword overlaps in bulk.
+
+        Keywords are lowercased and de-duplicated per user, so the product of
+        two row blocks counts exactly what _exact_keyword_overlaps counts.
+
+        Args:
+            keywords_lists: Keyword list of each user (e.g. matrices['keywords'])
+
+        Returns:
+            scipy.sparse CSR matrix of shape (len(keywords_lists), vocabulary size)
+        """
+        from scipy import sparse
+
+        vocabulary = {}
+        indptr = [0]
+        indices = []
+        for keywords in keywords_lists:
+            terms = {vocabulary.setdefault(k.lower(), len(vocabulary)) for k in keywords}
+            indices.extend(sorted(terms))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float32)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(keywords_lists), max(len(vocabulary), 1)))
+
+    def score_profile_block(self, rows: Dict, cols: Dict, row_terms, col_terms) -> np.ndarray:
+        """
+        Score every pair between two blocks of users.
+
+        Matrix-matrix version of score_profile_matrices: entry [i, j] equals
+        score_profile_matrices(row i, cols)[j]. The match score is symmetric,
+        so a batch job only needs to score each pair of blocks once.
+
+        Args:
+            rows: build_profile_matrices() result for the row users
+            cols: build_profile_matrices() result for the column users
+            row_terms: keyword_term_matrix() rows for the row users
+            col_terms: keyword_term_matrix() rows for the column users (same vocabulary)
+
+        Returns:
+            float64 array of shape (len(rows), len(cols))
+        """
+        def pair_mask(row_mask, col_mask):
+            return row_mask[:, None] & col_mask[None, :]
+
+        exact_matches = (row_terms @ col_terms.T).toarray()
+        keyword_similarity = (rows['keyword'] @ cols['keyword'].T).astype(np.float64)
+        keyword_similarity = self._boost_exact_matches(
+            keyword_similarity, exact_matches,
+            self._keyword_counts(rows['keywords'])[:, None], self._keyword_counts(cols['keywords'])[None, :]
+        )
+        keyword_similarity[~pair_mask(rows['has_keywords'], cols['has_keywords'])] = 0.0
+
+        doc_to_doc = (rows['document'] @ cols['document'].T).astype(np.float64)
+        doc_to_doc[~pair_mask(rows['has_doc_text'], cols['has_doc_text'])] = 0.0
+
+        row_keywords_to_col_doc = (rows['keyword'] @ cols['document'].T).astype(np.float64)
+        row_keywords_to_col_doc[~pair_mask(rows['has_keywords'], cols['has_doc_text'])] = 0.0
+
+        col_keywords_to_row_doc = (rows['document'] @ cols['keyword'].T).astype(np.float64)
+        col_keywords_to_row_doc[~pair_mask(rows['has_doc_text'], cols['has_keywords'])] = 0.0
+
+        return self._weighted_score(keyword_similarity, doc_to_doc, row_keywords_to_col_doc, col_keywords_to_row_doc,
+                                    rows['has_doc'][:, None], cols['has_doc'][None, :])
+
+    @staticmethod
+    def subset_profile_matrices(matrices: Dict, rows: np.ndarray) -> Dict:
+        """Select rows of a build_profile_matrices() result"""
+        return {
+            key: (value[rows] if isinstance(value, np.ndarray) else [value[i] for i in rows])
+            for key, value in matrices.items()
+        }
+    
+    @staticmethod
+    def profile_query_vectors(current: Dict) -> List[np.ndarray]:
+        """
+        Query vector for the combined [keyword, document] profile space.
+        
+        Its inner product with a candidate's [keyword, document] rows reproduces
+        the linear (non exact-match) part of score_profile_matrices, so it can
+        route approximate nearest-neighbour searches.
+        
+        Args:
+            current: build_profile_matrices() result for the current user (one row)
+            
+        Returns:
+            List of [keyword_part, document_part] query vectors
+        """
+        keyword_vector = current['keyword'][0]
+        document_vector = current['document'][0]
+        if current['has_doc'][0]:
+            return [
+                keyword_vector * 0.7 + document_vector * 0.075,
+                document_vector * 0.15 + keyword_vector * 0.075,
+            ]
+        return [keyword_vector * 0.8, keyword_vector * 0.2]
+    
+    def rank_profile_matrices(self, current: Dict, candidates: Dict, top_k: int = 10,
+                              eligible: Optional[np.ndarray] = None,
+                              shortlist: Optional[np.ndarray] = None,
+                              keyword_index=None, prune: Optional[bool] = None) -> List[Tuple[int, float]]:
+        """
+        Rank candidate rows for one user.
+        
+        Without a shortlist every row is scored. With a shortlist (e.g. from an
+        approximate nearest-neighbour index) only those rows are rescored
+        exactly, plus any row with an exact keyword overlap, whose boosted
+        score the approximate search can't see.
+        
+        With pruning, the keyword component is computed first and the document
+        components only for candidates whose score upper bound can still pass
+        the threshold and the current k-th best (see _rank_pruned). The
+        scores are the same either way.
+        
+        Args:
+            current: build_profile_matrices() result for the current user (one row)
+            candidates: build_profile_matrices() result for the candidates
+            top_k: Number of matches to return
+            eligible: Optional boolean mask of rows that may be recommended
+            shortlist: Optional array of candidate rows to rescore
+            keyword_index: Optional utils.keyword_index.KeywordIndex over the
+                           candidate rows (exact overlaps from its posting lists)
+            prune: Use score upper-bound pruning (default MATCH_SCORE_PRUNING)
+            
+        Returns:
+            List of (row, score) tuples above the match threshold, best first
+        """
+        n = len(candidates['keywords'])
+        if eligible is None:
+            eligible = np.ones(n, dtype=bool)
+        
+        if keyword_index is not None:
+            exact_matches = keyword_index.overlap_counts(current['keywords'][0])
+        else:
+            exact_matches = self._exact_keyword_overlaps(current['keywords'][0], candidates['keywords'])
+        
+        prune = self.score_pruning if prune is None else prune
+        
+        if shortlist is None:
+            if not prune:
+                scores = np.where(eligible, self.score_profile_matrices(current, candidates, exact_matches), -np.inf)
+                return [(int(row), float(scores[row])) for row in self.select_top_k(scores, top_k)]
+            rows = np.flatnonzero(eligible)
+        else:
+            rows = np.union1d(np.asarray(shortlist, dtype=np.int64), np.flatnonzero(exact_matches))
+            rows = rows[eligible[rows]]
+        if len(rows) == 0:
+            return []
+        
+        if prune:
+            return self._rank_pruned(current, candidates, rows, exact_matches, top_k)
+        scores = self.score_profile_matrices(current, self.subset_profile_matrices(candidates, rows),
+                                             exact_matches[rows])
+        return [(int(rows[i]), float(scores[i])) for i in self.select_top_k(scores, top_k)]
+    
+    def _rank_pruned(self, current: Dict, candidates: Dict, rows: np.ndarray,
+                     exact_matches: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        """
+        Top-k of the given candidate rows, with score upper-bound pruning.
+        
+        Candidates are visited in blocks by decreasing upper bound
+        (score_upper_bounds). Those whose bound can't pass the match threshold
+        are never scored, and the scan stops at the first bound below the k-th
+        best exact score found so far, so document similarities are only
+        computed where they can still change the result.
+        
+        Args:
+            current: build_profile_matrices() result for the current user (one row)
+            candidates: build_profile_matrices() result for the candidates
+            rows: Eligible candidate rows, ascending
+            exact_matches: Exact keyword overlap of every candidate row
+            top_k: Number of matches to return
+            
+        Returns:
+            List of (row, score) tuples above the match threshold, best first
+        """
+        if top_k <= 0:
+            return []
+        
+        if len(rows) == len(candidates['keywords']):
+            keyword_part, keyword_exact = candidates, exact_matches
+        else:
+            # Only the keyword matrix and the masks are needed for the bounds
+            keyword_part = self.subset_profile_matrices(
+                {key: candidates[key] for key in ('keyword', 'keywords', 'has_keywords', 'has_doc', 'has_doc_text')},
+                rows
+            )
+            keyword_exact = exact_matches[rows]
+        keyword_similarity = self.keyword_scores(current, keyword_part, keyword_exact)
+        upper = self.score_upper_bounds(current, keyword_part, keyword_similarity)
+        
+        # Best bounds first; candidates that can't pass the threshold are never scored
+        order = np.argsort(-upper, kind='stable')
+        order = order[upper[order] > MATCH_THRESHOLD]
+        
+        block_size = max(4 * top_k, 256)
+        positions, scores = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        kth_best = -np.inf
+        for start in range(0, len(order), block_size):
+            block = order[start:start + block_size]
+            # Bounds equal to the k-th best are still scored: they could tie it
+            block = block[upper[block] >= kth_best]
+            if len(block) == 0:
+                break
+            block_scores = self.score_profile_matrices(
+                current, self.subset_profile_matrices(candidates, rows[block]),
+                keyword_similarity=keyword_similarity[block]
+            )
+            positions = np.concatenate([positions, block])
+            scores = np.concatenate([scores, block_scores])
+            if len(scores) >= top_k:
+                kth_best = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+        
+        with self._pruning_lock:
+            self.scored_pairs += len(positions)
+            self.pruned_pairs += len(rows) - len(positions)
+        
+        # Back to row order, so equal scores are listed like the unpruned path lists them
+        ascending = np.argsort(positions, kind='stable')
+        positions, scores = positions[ascending], scores[ascending]
+        return [(int(rows[positions[i]]), float(scores[i])) for i in self.select_top_k(scores, top_k)]
+    
+    @staticmethod
+    def select_top_k(scores: np.ndarray, top_k: int, threshold: float = MATCH_THRESHOLD) -> np.ndarray:
+        """
+        Select the best scores above the match threshold.
+        
+        Args:
+            scores: Array of match scores (use -inf to exclude a candidate)
+            top_k: Maximum number of indices to return
+            threshold: Minimum score (exclusive)
+            
+        Returns:
+            Indices of the top_k scores above threshold, highest first
+        """
+        eligible = np.flatnonzero(scores > threshold)
+        if top_k <= 0 or len(eligible) == 0:
+            return eligible[:0]
+        if len(eligible) > top_k:
+            # argpartition is O(N); only the k survivors need a full sort
+            partition = np.argpartition(-scores[eligible], top_k - 1)[:top_k]
+            eligible = eligible[partition]
+        return eligible[np.argsort(-scores[eligible], kind='stable')]
+    
     def find_best_matches(self, current_user_data: Dict, all_users_data: List[Dict], 
                          top_k: int = 10, batch_size: int = 50) -> List[Tuple[Dict, float]]:
         """
         Find the best matches for a user based on semantic similarity.
         
-        MEMORY OPTIMIZATION: Processes users in batches to reduce peak memory usage.
-        Instead of computing all scores at once and storing them, we process in chunks
-        and only keep the top_k matches in memory.
+        Candidates are ranked in one vectorized pass (rank_profile_matrices),
+        with score upper-bound pruning when MATCH_SCORE_PRUNING is enabled.
         
         Args:
             current_user_data: Current user's data
             all_users_data: List of all other users' data
             top_k: Number of top matches to return
-            batch_size: Number of users to process at once (default 50 to limit memory)
+            batch_size: Kept for backward compatibility; scoring is vectorized
         
         Returns:
             List of tuples (user_data, match_score) sorted by score
         """
         try:
-            # Use a heap to efficiently track top_k matches without storing all scores
-            # This reduces memory from O(N) to O(k) where N is number of users
-            import heapq
-            top_matches = []  # Min-heap of size at most top_k
-            
-            # Process users in batches to limit peak memory
-            for i in range(0, len(all_users_data), batch_size):
-                batch = all_users_data[i:i + batch_size]
-                
-                for user_data in batch:
-                    # Skip self-matching
-                    if user_data.get('user_id') == current_user_data.get('user_id'):
-                        continue
-                    
-                    # Calculate match score
-                    score = self.calculate_match_score(current_user_data, user_data)
-                    
-                    # Only include matches with optimal threshold (0.26) based on evaluation
-                    if score > 0.26:
-                        # Use negative score for min-heap (we want max scores)
-                        if len(top_matches) < top_k:
-                            heapq.heappush(top_matches, (score, user_data))
-                        elif score > top_matches[0][0]:
-                            # Replace lowest score if current is higher
-                            heapq.heapreplace(top_matches, (score, user_data))
-                
-                # Clear batch from memory (let GC handle it)
-                del batch
+            # Skip self-matching
+            candidates = [
+                user_data for user_data in all_users_data
+                if user_data.get('user_id') != current_user_data.get('user_id')
+            ]
+            
+            if not candidates:
+                return []
             
-            # Convert heap to sorted list (highest first)
-            matches = [(user_data, score) for score, user_data in top_matches]
-            matches.sort(key=lambda x: x[1], reverse=True)
-            return matches
+            ranked = self.rank_profile_matrices(
+                self.build_profile_matrices([current_user_data]),
+                self.build_profile_matrices(candidates),
+                top_k=top_k
+            )
+            return [(candidates[row], score) for row, score in ranked]
             
         except Exception as e:
             logger.error(f"Error finding best matches: {e}")
             return []
 
-    def extract_and_embed_document(self, file_path: str) -> Tuple[str, str]:
+    def embed_keywords(self, keywords: List[str]) -> Optional[np.ndarray]:
+        """
+        Compute the keyword embedding for a membership.
+        
+        The keyword list is joined exactly as calculate_keyword_similarity does, so
+        the stored vector can be used as 'cached_keyword_embedding'.
+        
+        Args:
+            keywords: List of keywords
+            
+        Returns:
+            float32 embedding vector, or None if there are no keywords or encoding fails
+        """
+        if not keywords:
+            return None
+        
+        try:
+            embedding = self.get_text_embedding(", ".join(keywords))
+            if not np.any(embedding):
+                # Encoding failed (zero vector) - don't persist it as a valid cache
+                return None
+            return embedding
+        except Exception as e:
+            logger.error(f"Error embedding keywords: {e}")
+            return None
+    
+    def extract_and_embed_document(self, file_path: str) -> Tuple[str, Optional[np.ndarray]]:
         """
         Extract text from a document and compute its embedding.
         
@@ -401,28 +1226,25 @@ class MatchingEngine:
             file_path: Path to the document file
             
         Returns:
-            Tuple of (extracted_text, embedding_json_string)
-            Returns ("", "") if extraction fails
+            Tuple of (extracted_text, float32 embedding vector)
+            Returns ("", None) if extraction fails
         """
         try:
             # Extract text
             extracted_text = self.extract_text_from_document(file_path)
             
             if not extracted_text:
-                return "", ""
-            
-            # Compute embedding
-            embedding = self.get_text_embedding(extracted_text)
+                return "", None
             
-            # Convert to JSON string for database storage
-            embedding_json = json.dumps(embedding.tolist())
+            # Compute embedding (chunked and pooled for long documents)
+            embedding = self.embed_document(extracted_text)
             
-            return extracted_text, embedding_json
+            return extracted_text, embedding
             
         except Exception as e:
             logger.error(f"Error extracting and embedding document {file_path}: {e}")
-            return "", ""
+            return "", None
 
 
-# Global instance
+# Global instance (cheap: the model loads on first use or warmup)
 matching_engine = MatchingEngine()
@@ -1,6 +1,9 @@
+import json
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy.orm import validates
 from datetime import datetime
+from utils.embedding_codec import encode_embedding, decode_embedding, embedding_from_json
 
 db = SQLAlchemy()
 
@@ -33,6 +36,9 @@ class Event(db.Model):
     end_date = db.Column(db.DateTime, nullable=True)  # Optional initially, required to publish
     is_published = db.Column(db.Boolean, default=False, nullable=False)  # Controls public availability
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Bumped whenever an attendee joins/leaves or changes keywords/resume;
+    # invalidates cached matching data (see utils.event_matrix_cache)
+    profile_version = db.Column(db.Integer, default=0, nullable=False)
     
     # Relationships
     memberships = db.relationship('Membership', backref='event', lazy=True)
@@ -48,6 +54,19 @@ class Membership(db.Model):
     keywords = db.Column(db.Text, nullable=True)  # Store keywords as comma-separated string
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Cached embedding of the keyword string, computed on join/keyword update
+    # so the matching page never has to run the transformer for other attendees.
+    # Cleared (and recomputed) whenever keywords change.
+    # Stored as raw little-endian bytes (see utils.embedding_codec)
+    keyword_embedding = db.Column(db.LargeBinary, nullable=True)
+    keyword_embedding_dim = db.Column(db.Integer, nullable=True)
+    keyword_embedding_dtype = db.Column(db.String(10), nullable=True)  # 'float32' or 'float16'
+    # Model that produced the vector and whether it is L2-normalized; vectors from
+    # another model are stale (MatchingEngine.is_current_embedding). NULL = legacy
+    # row from before tagging, produced by the default model
+    keyword_embedding_model = db.Column(db.String(100), nullable=True)
+    keyword_embedding_normalized = db.Column(db.Boolean, nullable=True)
+    
     # Ensure unique user-event pairs
     __table_args__ = (db.UniqueConstraint('user_id', 'event_id', name='unique_user_event'),)
     
@@ -59,6 +78,16 @@ class Membership(db.Model):
         if self.keywords:
             return [keyword.strip() for keyword in self.keywords.split(',') if keyword.strip()]
         return []
+    
+    def get_keyword_embedding(self):
+        """Return the cached keyword embedding as a numpy array (or None)"""
+        return decode_embedding(self.keyword_embedding, self.keyword_embedding_dim, self.keyword_embedding_dtype)
+    
+    def set_keyword_embedding(self, vector, dtype=None, model_name=None, normalized=False):
+        """Store (or clear, with None) the cached keyword embedding, tagged with its model"""
+        self.keyword_embedding, self.keyword_embedding_dim, self.keyword_embedding_dtype = encode_embedding(vector, dtype)
+        self.keyword_embedding_model = model_name if vector is not None else None
+        self.keyword_embedding_normalized = bool(normalized) if vector is not None else None
 
 class Resume(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -72,17 +101,67 @@ class Resume(db.Model):
     
     # Cached extracted text and embedding for memory-efficient matching
     # These are computed once on upload and stored to avoid re-extraction/re-embedding
-    # extracted_text: Full text content extracted from the document (can be large, but stored once)
-    # embedding: Pre-computed 768-dim embedding vector stored as JSON string
-    #            This avoids loading the transformer model and recomputing embeddings on every match
-    extracted_text = db.Column(db.Text, nullable=True)  # Nullable for backward compatibility
-    embedding = db.Column(db.Text, nullable=True)  # JSON string of embedding array
+    # extracted_text: Full text content extracted from the document (can be large, but stored once).
+    #                 Deferred: it is only loaded when accessed (re-embedding, the content store), so
+    #                 Resume queries on the matching path never pull it; has_document says whether it's set
+    # embedding_vector: Pre-computed embedding as raw little-endian float32/float16 bytes
+    #                   (see utils.embedding_codec), with its dimension and dtype alongside.
+    #                   This avoids loading the transformer model and recomputing embeddings on every match
+    # embedding: Legacy JSON string of the embedding array, converted to embedding_vector by
+    #            utils.db_migrations.upgrade_resume_embedding_storage
+    extracted_text = db.deferred(db.Column(db.Text, nullable=True))  # Nullable for backward compatibility
+    has_document = db.Column(db.Boolean, default=False, nullable=False)  # Kept in sync with extracted_text
+    embedding = db.Column(db.Text, nullable=True)  # Legacy JSON string of embedding array
+    embedding_vector = db.Column(db.LargeBinary, nullable=True)
+    embedding_dim = db.Column(db.Integer, nullable=True)
+    embedding_dtype = db.Column(db.String(10), nullable=True)  # 'float32' or 'float16'
+    embedding_model = db.Column(db.String(100), nullable=True)  # see Membership.keyword_embedding_model
+    embedding_normalized = db.Column(db.Boolean, nullable=True)
+    
+    # Text extraction and embedding run in a background worker after upload
+    # (see utils.resume_ingestion): pending -> processing -> ready | failed
+    processing_status = db.Column(db.String(20), default='ready', nullable=False)
+    processing_error = db.Column(db.String(255), nullable=True)
+    extraction_note = db.Column(db.String(255), nullable=True)  # e.g. what the extraction budget left out
+    processing_started_at = db.Column(db.DateTime, nullable=True)  # when the current job was queued or started
+    
+    # SHA-256 of the uploaded bytes; identical uploads share one DocumentContent
+    content_hash = db.Column(db.String(64), nullable=True, index=True)
     
     # Ensure unique user-event resume pairs (one resume per user per event)
     __table_args__ = (db.UniqueConstraint('user_id', 'event_id', name='unique_user_event_resume'),)
     
     def __repr__(self):
         return f'<Resume {self.original_name} for User {self.user_id} in Event {self.event_id}>'
+    
+    @validates('extracted_text')
+    def _track_has_document(self, key, text):
+        self.has_document = bool(text and text.strip())
+        return text
+    
+    @property
+    def has_embedding(self):
+        """True if a document embedding is stored (binary or legacy JSON)"""
+        return self.embedding_vector is not None or bool(self.embedding)
+    
+    def get_embedding(self):
+        """Return the document embedding as a numpy array (or None)"""
+        if self.embedding_vector is not None:
+            return decode_embedding(self.embedding_vector, self.embedding_dim, self.embedding_dtype)
+        # Legacy row that hasn't been migrated to the binary format yet
+        return embedding_from_json(self.embedding)
+    
+    def set_embedding(self, vector, dtype=None, model_name=None, normalized=False):
+        """Store (or clear, with None) the document embedding in the binary format, tagged with its model"""
+        self.embedding_vector, self.embedding_dim, self.embedding_dtype = encode_embedding(vector, dtype)
+        self.embedding_model = model_name if vector is not None else None
+        self.embedding_normalized = bool(normalized) if vector is not None else None
+        self.embedding = None
+    
+    @property
+    def is_processed(self):
+        """True once background extraction has finished (successfully or not)"""
+        return self.processing_status in ('ready', 'failed')
 
 class Match(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -243,3 +322,125 @@ class Meeting(db.Model):
     
     def __repr__(self):
         return f'<Meeting Match {self.match_id} at {self.start_time}>'
+
+class RecommendationBuild(db.Model):
+    """One precomputed recommendation build per event (see utils.recommendations)"""
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False, unique=True)
+    # Event.profile_version the lists were built from; any later profile change makes them stale
+    profile_version = db.Column(db.Integer, nullable=False)
+    top_n = db.Column(db.Integer, nullable=False)
+    attendee_count = db.Column(db.Integer, nullable=False, default=0)
+    duration_seconds = db.Column(db.Float, nullable=True)
+    built_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Relationships
+    event = db.relationship('Event', backref=db.backref('recommendation_build', uselist=False))
+    
+    def is_fresh(self, event):
+        """True if the lists reflect the event's current attendee profiles"""
+        return self.profile_version == (event.profile_version or 0)
+    
+    def __repr__(self):
+        return f'<RecommendationBuild Event {self.event_id} v{self.profile_version} at {self.built_at}>'
+
+class Recommendation(db.Model):
+    """Precomputed top-N candidate of an attendee in an event"""
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    candidate_user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    rank = db.Column(db.Integer, nullable=False)  # 1 = best
+    built_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.Index('ix_recommendation_event_user_rank', 'event_id', 'user_id', 'rank'),
+    )
+    
+    def __repr__(self):
+        return f'<Recommendation User {self.user_id} -> User {self.candidate_user_id} ({self.score:.3f}) in Event {self.event_id}>'
+
+class SwipeDeck(db.Model):
+    """An attendee's ranked candidate deck for an event, served page by page (see utils.swipe_deck)"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    cross_session = db.Column(db.Boolean, default=False, nullable=False)  # ranked without the shared-session filter
+    # Event.profile_version the deck was ranked at; any later profile change rebuilds it
+    profile_version = db.Column(db.Integer, nullable=False)
+    candidate_ids = db.Column(db.Text, nullable=False, default='[]')  # JSON list of user ids, best first
+    cursor = db.Column(db.Integer, default=0, nullable=False)  # index of the next candidate to serve
+    no_matches_reason = db.Column(db.String(40), nullable=True)  # why the deck was built empty
+    built_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'event_id', 'cross_session', name='unique_user_event_swipe_deck'),
+    )
+    
+    def get_candidate_ids(self):
+        """Ranked candidate user ids as a list"""
+        return json.loads(self.candidate_ids or '[]')
+    
+    def set_candidate_ids(self, user_ids):
+        self.candidate_ids = json.dumps([int(user_id) for user_id in user_ids])
+    
+    def is_fresh(self, event):
+        """True if the deck was ranked from the event's current attendee profiles"""
+        return self.profile_version == (event.profile_version or 0)
+    
+    def __repr__(self):
+        return f'<SwipeDeck User {self.user_id} in Event {self.event_id} at {self.cursor}/{len(self.get_candidate_ids())}>'
+
+class MatchJobRecord(db.Model):
+    """State of an attendee's background match job, shared by all workers (see utils.match_jobs)"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey('event.id'), nullable=False)
+    cross_session = db.Column(db.Boolean, default=False, nullable=False)
+    # Event.profile_version the job computes (or computed) the deck for
+    profile_version = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), default='running', nullable=False)  # running -> ready | failed
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    error = db.Column(db.String(255), nullable=True)
+    
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'event_id', 'cross_session', name='unique_user_event_match_job'),
+    )
+    
+    def __repr__(self):
+        return f'<MatchJobRecord User {self.user_id} in Event {self.event_id}: {self.status} v{self.profile_version}>'
+
+class DocumentContent(db.Model):
+    """
+    Extracted text and embedding of an uploaded file, keyed by the SHA-256 of its bytes.
+    
+    Re-uploading the same CV (e.g. to another event) reuses this row instead of
+    re-extracting and re-embedding. ref_count is the number of Resume rows with
+    this content_hash; the row is deleted when it drops to zero
+    (see utils.document_store).
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), unique=True, nullable=False)
+    extracted_text = db.Column(db.Text, nullable=True)
+    extraction_note = db.Column(db.String(255), nullable=True)
+    embedding_vector = db.Column(db.LargeBinary, nullable=True)
+    embedding_dim = db.Column(db.Integer, nullable=True)
+    embedding_dtype = db.Column(db.String(10), nullable=True)
+    model_name = db.Column(db.String(100), nullable=False)  # model that produced the embedding
+    embedding_normalized = db.Column(db.Boolean, nullable=True)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def get_embedding(self):
+        """Return the embedding as a numpy array (or None)"""
+        return decode_embedding(self.embedding_vector, self.embedding_dim, self.embedding_dtype)
+    
+    def set_embedding(self, vector, dtype=None, normalized=False):
+        """Store (or clear, with None) the embedding in the binary format"""
+        self.embedding_vector, self.embedding_dim, self.embedding_dtype = encode_embedding(vector, dtype)
+        self.embedding_normalized = bool(normalized) if vector is not None else None
+    
+    def __repr__(self):
+        return f'<DocumentContent {self.content_hash[:12]} refs={self.ref_count}>'
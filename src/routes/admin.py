@@ -4,11 +4,14 @@ Handles event creation, user management, and system administration.
 """
 from flask import render_template, request, flash, redirect, url_for, current_app
 from flask_login import login_required, current_user
-from models import db, User, Event, Membership, Resume
+from models import (db, User, Event, Membership, Resume, Recommendation, RecommendationBuild, SwipeDeck,
+                    MatchJobRecord)
 from datetime import datetime
 import os
 from . import admin_bp
 from .utils import admin_required, cleanup_orphaned_files
+from utils.document_store import release_document_contents
+from utils.profile_embeddings import bump_profile_version
 
 DEV_GRAPH_DATASETS = {
     'small': {
@@ -157,7 +160,12 @@ def admin_delete_event(event_id):
             os.remove(file_path_event)
             
     # Delete associated records
+    Recommendation.query.filter_by(event_id=event_id).delete()
+    RecommendationBuild.query.filter_by(event_id=event_id).delete()
+    SwipeDeck.query.filter_by(event_id=event_id).delete()
+    MatchJobRecord.query.filter_by(event_id=event_id).delete()
     Membership.query.filter_by(event_id=event_id).delete()
+    release_document_contents(resumes)
     Resume.query.filter_by(event_id=event_id).delete()
     
     # Delete event
@@ -167,6 +175,21 @@ def admin_delete_event(event_id):
     flash(f'Event "{event.name}" deleted successfully!', 'success')
     return redirect(url_for('admin.admin_events'))
 
+@admin_bp.route('/events/<int:event_id>/recommendations/build', methods=['POST'])
+@login_required
+@admin_required
+def admin_build_recommendations(event_id):
+    """Start a background rebuild of the event's precomputed recommendation lists"""
+    event = Event.query.get_or_404(event_id)
+    
+    from utils.recommendations import start_recommendation_build
+    if start_recommendation_build(current_app._get_current_object(), event.id):
+        flash(f'Building recommendations for "{event.name}" in the background.', 'success')
+    else:
+        flash(f'Recommendations for "{event.name}" are already being built.', 'info')
+    
+    return redirect(url_for('admin.admin_events'))
+
 @admin_bp.route('/users')
 @login_required
 @admin_required
@@ -208,9 +231,22 @@ def admin_delete_user(user_id):
     
     try:
         # Delete associated data first
+        # Invalidate cached matching data for every event the user belonged to
+        for membership in Membership.query.filter_by(user_id=user_id).all():
+            bump_profile_version(membership.event_id)
+        
         # Delete memberships
         Membership.query.filter_by(user_id=user_id).delete()
         
+        # Delete precomputed recommendations from and to this user
+        Recommendation.query.filter(
+            db.or_(Recommendation.user_id == user_id, Recommendation.candidate_user_id == user_id)
+        ).delete(synchronize_session=False)
+        
+        # Delete the user's swipe decks (decks listing them are rebuilt after the version bump above)
+        SwipeDeck.query.filter_by(user_id=user_id).delete()
+        MatchJobRecord.query.filter_by(user_id=user_id).delete()
+        
         # Delete resumes and associated files
         resumes = Resume.query.filter_by(user_id=user_id).all()
         deleted_files = []
@@ -240,6 +276,7 @@ def admin_delete_user(user_id):
                     failed_files.append(f"{resume.filename}: File not found")
         
         # Delete resume records from database
+        release_document_contents(resumes)
         Resume.query.filter_by(user_id=user_id).delete()
         
         # Finally delete the user
@@ -1,6 +1,6 @@
 """
 API routes for Prophere.
-Handles JSON endpoints for graph data.
+Handles JSON endpoints for graph data and readiness checks.
 """
 from flask import jsonify, current_app
 from flask_login import login_required, current_user
@@ -15,6 +15,22 @@ DEV_GRAPH_GENERATORS = {
     'large': generate_large_graph,
 }
 
+@api_bp.route('/ready', methods=['GET'])
+def api_ready():
+    """Readiness probe: 200 once the matching model is loaded, 503 while it is cold"""
+    from matching_engine import matching_engine
+    
+    warmup_on_start = current_app.config.get('MODEL_WARMUP_ON_START', True)
+    status = matching_engine.status()
+    if warmup_on_start and not status['loaded'] and not status['warming'] and not status['error']:
+        # Under a WSGI server (e.g. gunicorn 'src.app:app') main.py's boot warmup never
+        # ran: the first probe starts it, so the worker becomes ready without traffic
+        matching_engine.start_warmup()
+        status = matching_engine.status()
+    # Without boot warmup the model is loaded lazily on demand, so a cold worker still serves
+    status['ready'] = status['loaded'] or not warmup_on_start
+    return jsonify(status), 200 if status['ready'] else 503
+
 @api_bp.route('/event/<int:event_id>/graph', methods=['GET'])
 @login_required
 def api_event_graph(event_id):
@@ -4,14 +4,21 @@ Handles event matching, likes, passes, matches, and graph processing.
 
 MEMORY OPTIMIZATIONS:
 - Uses cached embeddings from Resume model to avoid recomputation
-- Enforces MAX_MATCH_ATTENDEES limit to prevent OOM
-- Processes matches in batches
+- Caches per-event profile matrices in-process (utils.event_matrix_cache)
+- Scores all candidates in one vectorized pass (ANN shortlist for large events)
+- Serves precomputed recommendation lists when they are current (utils.recommendations)
 - Avoids loading full document text into memory
+- The loading page computes the deck in a background job it polls (utils.match_jobs)
+- Ranked decks are stored per attendee and served page by page (utils.swipe_deck)
 """
 from flask import render_template, request, redirect, url_for, flash, current_app
 from flask_login import login_required, current_user
 from models import db, Event, Membership, Resume, UserInteraction, Match, ParticipantAvailability, Meeting, User
+from utils.profile_embeddings import backfill_keyword_embeddings
+from utils.match_jobs import submit_match_job, get_match_job, get_match_result
+from utils.swipe_deck import next_deck_page
 from . import matching_bp
+from functools import partial
 import os
 import json
 import logging
@@ -20,6 +27,9 @@ import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Largest page the deck endpoint serves
+MAX_DECK_PAGE_SIZE = 50
+
 @matching_bp.route('/<int:event_id>/loading')
 @login_required
 def matching_loading(event_id):
@@ -43,7 +53,42 @@ def matching_loading(event_id):
         flash('You are not a member of this event!', 'error')
         return redirect(url_for('user.dashboard'))
     
-    return render_template('matching_loading.html', event=event, event_id=event_id)
+    show_cross_session = request.args.get('cross_session', 'false').lower() == 'true'
+    _start_match_job(event, show_cross_session)
+    return render_template('matching_loading.html', event=event, event_id=event_id,
+                           show_cross_session=show_cross_session)
+
+@matching_bp.route('/<int:event_id>/loading/status')
+@login_required
+def matching_status(event_id):
+    """Poll the background match job started by the loading page"""
+    if current_user.is_admin:
+        return {'success': False, 'message': 'Super admin accounts cannot access matching'}, 403
+    
+    event = Event.query.get(event_id)
+    if not event:
+        return {'success': False, 'message': 'Event not found'}, 404
+    
+    membership = Membership.query.filter_by(user_id=current_user.id, event_id=event_id).first()
+    if not membership:
+        return {'success': False, 'message': 'You are not a member of this event'}, 403
+    
+    show_cross_session = request.args.get('cross_session', 'false').lower() == 'true'
+    # Jobs of other workers (or expired here) are looked up, or restarted, through their MatchJobRecord
+    job = get_match_job((current_user.id, event_id, show_cross_session)) or _start_match_job(event, show_cross_session)
+    matching_url = (url_for('matching.event_matching', event_id=event_id, cross_session='true') if show_cross_session
+                    else url_for('matching.event_matching', event_id=event_id))
+    return {'success': True, 'status': job.status, 'matching_url': matching_url}
+
+def _start_match_job(event, show_cross_session):
+    """Compute the current user's deck in the background (deduplicated per user, event and filter)"""
+    return submit_match_job(
+        current_app._get_current_object(),
+        (current_user.id, event.id, show_cross_session),
+        event.profile_version,
+        partial(_first_deck_page, event.id, current_user.id, show_cross_session),
+        ttl=current_app.config.get('MATCH_RESULT_TTL_SECONDS', 60)
+    )
 
 @matching_bp.route('/<int:event_id>')
 @login_required
@@ -72,202 +117,276 @@ def event_matching(event_id):
         flash('You are not a member of this event!', 'error')
         return redirect(url_for('user.dashboard'))
     
-    # Get all other users who are members of this event (excluding current user)
-    other_memberships = Membership.query.filter(
-        Membership.event_id == event_id,
-        Membership.user_id != current_user.id
-    ).all()
-    
     # Check if user wants to see cross-session matches
     show_cross_session = request.args.get('cross_session', 'false').lower() == 'true'
     
+    # The loading page computes the first deck page in the background (utils.match_jobs);
+    # direct links, expired and failed jobs serve it here
+    page = get_match_result((current_user.id, event_id, show_cross_session), event.profile_version)
+    potential_matches = None
+    if page is not None:
+        # Drop anyone interacted with since the job ran; copy so the template can't mutate the cached result
+        interacted_user_ids = {
+            target_user_id for (target_user_id,) in db.session.query(UserInteraction.target_user_id).filter(
+                UserInteraction.user_id == current_user.id,
+                UserInteraction.event_id == event_id,
+                UserInteraction.target_user_id.in_([match['user_id'] for match in page['candidates']])
+            )
+        }
+        potential_matches = [dict(match) for match in page['candidates'] if match['user_id'] not in interacted_user_ids]
+        if potential_matches or not page['candidates']:
+            print(f"   ✅ Served {len(potential_matches)} matches computed in the background", flush=True)
+        else:
+            # Everyone on it was swiped since: serve the deck's next cards instead
+            potential_matches = None
+    if potential_matches is None:
+        page = _first_deck_page(event_id, current_user.id, show_cross_session)
+        potential_matches = page['candidates']
+    
+    no_matches_reason = page['no_matches_reason']
+    if not potential_matches and not page['has_more'] and no_matches_reason is None:
+        no_matches_reason = 'no_similar_interests'
+    
+    return render_template('event_matching.html', 
+                         event=event, 
+                         membership=membership,
+                         potential_matches=potential_matches,
+                         no_matches_reason=no_matches_reason,
+                         has_more=page['has_more'],
+                         show_cross_session=show_cross_session)
+
+
+@matching_bp.route('/<int:event_id>/deck')
+@login_required
+def deck_page(event_id):
+    """Next page of the current user's ranked deck (JSON), so swiping never needs a reload"""
+    if current_user.is_admin:
+        return {'success': False, 'message': 'Super admin accounts cannot access matching'}, 403
+    
+    event = Event.query.get(event_id)
+    if not event:
+        return {'success': False, 'message': 'Event not found'}, 404
+    
+    membership = Membership.query.filter_by(user_id=current_user.id, event_id=event_id).first()
+    if not membership:
+        return {'success': False, 'message': 'You are not a member of this event'}, 403
+    
+    show_cross_session = request.args.get('cross_session', 'false').lower() == 'true'
+    page_size = current_app.config.get('SWIPE_DECK_PAGE_SIZE', 20)
+    limit = min(max(request.args.get('limit', page_size, type=int), 1), MAX_DECK_PAGE_SIZE)
+    # Without a cursor the page continues where the previous one (stored on the deck) ended
+    cursor = request.args.get('cursor', type=int)
+    
+    page = _deck_page(event, current_user.id, show_cross_session, limit, cursor=cursor)
+    return {'success': True, **page}
+
+
+def _deck_page(event, member_id, show_cross_session, limit, cursor=None):
+    """Serve a page of a member's swipe deck, ranking it with _find_potential_matches when needed"""
+    return next_deck_page(
+        event, member_id, show_cross_session, limit,
+        partial(_find_potential_matches, event.id, member_id, show_cross_session),
+        deck_size=current_app.config.get('SWIPE_DECK_SIZE', 50),
+        cursor=cursor
+    )
+
+
+def _first_deck_page(event_id, member_id, show_cross_session):
+    """First page of the matching page's deck, from the top so cards not swiped yet come back on a reload"""
+    event = db.session.get(Event, event_id)
+    return _deck_page(event, member_id, show_cross_session,
+                      current_app.config.get('SWIPE_DECK_PAGE_SIZE', 20), cursor=0)
+
+
+def _find_potential_matches(event_id, member_id, show_cross_session, top_k=20):
+    """
+    Rank a member's candidates for the swipe deck.
+    
+    Runs in the request or in a background match job, so it only uses its
+    arguments, never current_user or the request.
+    
+    Args:
+        event_id: Event ID
+        member_id: User ID of the member the deck is for
+        show_cross_session: Include attendees who share no session with the member
+        top_k: Candidates to return
+        
+    Returns:
+        Tuple of (potential_matches: list of profile dicts, no_matches_reason: str or None)
+    """
+    event = db.session.get(Event, event_id)
+    membership = Membership.query.filter_by(user_id=member_id, event_id=event_id).first()
+    
     # Get current user's session availability
     user_sessions = ParticipantAvailability.query.filter_by(
-        user_id=current_user.id,
+        user_id=member_id,
         event_id=event_id,
         is_available=True
     ).all()
     user_session_ids = {avail.session_id for avail in user_sessions}
     
-    # Filter by shared sessions unless cross_session is enabled
+    # Users who share at least one session with current user (None = no session filtering)
+    shared_session_user_ids = None
     if not show_cross_session and user_session_ids:
-        # Get users who share at least one session with current user
-        shared_session_user_ids = set()
         shared_availabilities = ParticipantAvailability.query.filter(
             ParticipantAvailability.event_id == event_id,
             ParticipantAvailability.session_id.in_(user_session_ids),
             ParticipantAvailability.is_available == True,
-            ParticipantAvailability.user_id != current_user.id
+            ParticipantAvailability.user_id != member_id
         ).all()
-        
-        for avail in shared_availabilities:
-            shared_session_user_ids.add(avail.user_id)
-        
-        # Filter memberships to only shared session users
-        other_memberships = [mem for mem in other_memberships if mem.user_id in shared_session_user_ids]
-    
-    if not other_memberships:
-        # No other members to match with
-        no_matches_reason = 'no_shared_sessions' if not show_cross_session else 'no_attendees'
-        print(f"   ⚠️ No other memberships found (reason: {no_matches_reason})", flush=True)
-        return render_template('event_matching.html', 
-                             event=event, 
-                             membership=membership,
-                             potential_matches=[],
-                             no_matches_reason=no_matches_reason,
-                             show_cross_session=show_cross_session)
-    
-    # Filter out users that current user has already interacted with
-    interacted_user_ids = set()
+        shared_session_user_ids = {avail.user_id for avail in shared_availabilities}
+    
+    # Users that current user has already interacted with
     interactions = UserInteraction.query.filter_by(
-        user_id=current_user.id,
+        user_id=member_id,
         event_id=event_id
     ).all()
-    for interaction in interactions:
-        interacted_user_ids.add(interaction.target_user_id)
-    
-    # Remove already interacted users from potential matches
-    available_memberships = [mem for mem in other_memberships if mem.user_id not in interacted_user_ids]
-    
-    if not available_memberships:
-        print("   ⚠️ No available memberships (all already interacted)", flush=True)
-        return render_template('event_matching.html', 
-                             event=event, 
-                             membership=membership,
-                             potential_matches=[],
-                             no_matches_reason='no_similar_interests')
-    
-    print(f"   ✅ Found {len(available_memberships)} available memberships", flush=True)
-    
-    # MEMORY OPTIMIZATION: Enforce MAX_MATCH_ATTENDEES limit to prevent OOM
-    max_attendees = current_app.config.get('MAX_MATCH_ATTENDEES', 500)
-    if len(available_memberships) > max_attendees:
-        print(f"   ⚠️  Limiting matching to {max_attendees} attendees (found {len(available_memberships)})", flush=True)
-        available_memberships = available_memberships[:max_attendees]
-        flash(f'This event has many attendees. Showing matches from the first {max_attendees} participants.', 'info')
+    interacted_user_ids = {interaction.target_user_id for interaction in interactions}
     
     # Import matching engine
     try:
-        from matching_engine import matching_engine
+        from matching_engine import matching_engine, MATCH_THRESHOLD
+        from utils.event_matrix_cache import get_event_profile_matrices
+        from utils.matching_data import load_candidate_profiles
+        from utils.recommendations import get_stored_recommendations
         print("   ✅ Matching engine imported successfully", flush=True)
+
+        # Precomputed lists (utils.recommendations) are used while they match the
+        # event's profile_version; they only need filtering, whatever the event size.
+        stored = get_stored_recommendations(event, member_id)
+        if stored is not None:
+            candidates, complete = stored
+            top_candidates = [
+                (user_id, score) for user_id, score in candidates
+                if user_id not in interacted_user_ids
+                and (shared_session_user_ids is None or user_id in shared_session_user_ids)
+            ][:top_k]
+            # An incomplete list filtered below top_k may hide lower-ranked candidates: score live
+            if top_candidates and (len(top_candidates) == top_k or complete):
+                profiles = load_candidate_profiles(event_id, [user_id for user_id, _ in top_candidates])
+                potential_matches = [profiles[user_id] for user_id, _ in top_candidates if user_id in profiles]
+                print(f"   ✅ Served {len(potential_matches)} precomputed recommendations", flush=True)
+                return potential_matches, None if potential_matches else 'no_similar_interests'
+
+        # MEMORY OPTIMIZATION: Event-wide profile matrices are cached per process and
+        # only rebuilt when the event's profile_version changes, so a hot event is
+        # filtered and scored entirely in memory.
+        event_profiles = get_event_profile_matrices(event)
+        
+        # Get all other users who are members of this event (excluding current user)
+        other_user_ids = [user_id for user_id in event_profiles.user_ids.tolist() if user_id != member_id]
+        
+        # Filter by shared sessions unless cross_session is enabled
+        if shared_session_user_ids is not None:
+            other_user_ids = [user_id for user_id in other_user_ids if user_id in shared_session_user_ids]
+        
+        if not other_user_ids:
+            # No other members to match with
+            no_matches_reason = 'no_shared_sessions' if not show_cross_session else 'no_attendees'
+            print(f"   ⚠️ No other memberships found (reason: {no_matches_reason})", flush=True)
+            return [], no_matches_reason
+        
+        # Remove already interacted users from potential matches
+        available_user_ids = [user_id for user_id in other_user_ids if user_id not in interacted_user_ids]
         
-        # MEMORY OPTIMIZATION: Use cached extracted_text and embedding from Resume model
-        # This avoids loading full document files and recomputing embeddings
-        current_user_resume = Resume.query.filter_by(user_id=current_user.id, event_id=event_id).first()
+        if not available_user_ids:
+            print("   ⚠️ No available memberships (all already interacted)", flush=True)
+            return [], 'no_similar_interests'
+        
+        print(f"   ✅ Found {len(available_user_ids)} available memberships", flush=True)
+        
+        # MEMORY OPTIMIZATION: Use the cached embedding from the Resume model
+        # This avoids loading full document files and recomputing embeddings; the
+        # (deferred) extracted text is only loaded when the embedding must be recomputed
+        current_user_resume = Resume.query.filter_by(user_id=member_id, event_id=event_id).first()
         current_user_doc_text = ""
         current_user_doc_embedding = None
-        current_user_kw_embedding = None
+        current_user_has_document = False
         
         if current_user_resume:
-            # Use cached text if available, otherwise extract (backward compatibility)
-            if current_user_resume.extracted_text:
-                current_user_doc_text = current_user_resume.extracted_text
-                current_user_doc_embedding = current_user_resume.embedding
-            else:
+            # Use the cached embedding if text was extracted, otherwise extract (backward compatibility)
+            if current_user_resume.has_document:
+                current_user_doc_embedding = current_user_resume.get_embedding()
+                if matching_engine.is_current_embedding(current_user_doc_embedding,
+                                                        current_user_resume.embedding_model,
+                                                        current_user_resume.embedding_normalized):
+                    current_user_has_document = True
+                else:
+                    # Missing, or from another model: embed the text now rather than score a stale vector
+                    current_user_doc_embedding = None
+                    current_user_doc_text = current_user_resume.extracted_text
+            elif current_user_resume.processing_status == 'ready':
                 # Fallback: extract on-the-fly (slower, but works for old resumes)
-                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], str(current_user.id), current_user_resume.filename)
+                # Uploads still being processed in the background are skipped
+                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], str(member_id), current_user_resume.filename)
                 current_user_doc_text = matching_engine.extract_text_from_document(file_path)
                 # Note: embedding not computed here to save memory - will be computed on-demand if needed
         
-        # Compute keyword embedding for current user (small, so OK to compute)
-        current_user_keywords = membership.get_keywords_list()
-        if current_user_keywords:
-            kw_text = ", ".join(current_user_keywords)
-            kw_embedding = matching_engine.get_text_embedding(kw_text)
-            current_user_kw_embedding = json.dumps(kw_embedding.tolist())
+        # Keyword embeddings are stored on Membership (computed on join/keyword update,
+        # recomputed here if missing or from another model)
+        if backfill_keyword_embeddings([membership]):
+            db.session.commit()
+        current_user_keyword_embedding = membership.get_keyword_embedding()
+        if not matching_engine.is_current_embedding(current_user_keyword_embedding,
+                                                    membership.keyword_embedding_model,
+                                                    membership.keyword_embedding_normalized):
+            current_user_keyword_embedding = None
         
         current_user_data = {
-            'user_id': current_user.id,
-            'keywords': current_user_keywords,
+            'user_id': member_id,
+            'keywords': membership.get_keywords_list(),
             'document_text': current_user_doc_text,
+            'has_document': current_user_has_document,
             'cached_doc_embedding': current_user_doc_embedding,
-            'cached_keyword_embedding': current_user_kw_embedding
+            'cached_keyword_embedding': current_user_keyword_embedding
         }
-        
-        # MEMORY OPTIMIZATION: Prepare user data using cached embeddings
-        # Don't load full document text into memory - use cached embeddings instead
-        all_users_data = []
-        for mem in available_memberships:
-            user = mem.user
-            user_resume = Resume.query.filter_by(user_id=user.id, event_id=event_id).first()
-            
-            # Use cached data if available (memory optimization)
-            user_doc_text = ""
-            user_doc_embedding = None
-            user_kw_embedding = None
-            
-            if user_resume:
-                if user_resume.extracted_text:
-                    # Use cached text and embedding (major memory savings)
-                    user_doc_text = user_resume.extracted_text
-                    user_doc_embedding = user_resume.embedding
-                # Note: We don't load full document text if embedding exists
-                # This saves significant memory for large documents
-            
-            # Compute keyword embedding (small, so OK)
-            user_keywords = mem.get_keywords_list()
-            if user_keywords:
-                kw_text = ", ".join(user_keywords)
-                kw_embedding = matching_engine.get_text_embedding(kw_text)
-                user_kw_embedding = json.dumps(kw_embedding.tolist())
-            
-            user_data = {
-                'user_id': user.id,
-                'name': user.name,
-                'email': user.email,
-                'keywords': user_keywords,
-                'document_text': user_doc_text,  # May be empty if using cached embedding
-                'cached_doc_embedding': user_doc_embedding,  # Used for matching
-                'cached_keyword_embedding': user_kw_embedding,
-                'has_resume': user_resume is not None,
-                'resume_name': user_resume.original_name if user_resume else None,
-                'joined_at': mem.joined_at.strftime('%B %Y') if mem.joined_at else 'Recently'
-            }
-            all_users_data.append(user_data)
-        
-        # MEMORY OPTIMIZATION: Use batch processing in find_best_matches
-        # This processes users in chunks and only keeps top_k matches in memory
-        best_matches = matching_engine.find_best_matches(
-            current_user_data, 
-            all_users_data, 
-            top_k=20,
-            batch_size=50  # Process 50 users at a time to limit peak memory
+        current_user_profile = matching_engine.build_profile_matrices([current_user_data])
+        
+        # Mask of event members who are eligible candidates for this request
+        available_rows = [event_profiles.row_index[user_id] for user_id in available_user_ids]
+        eligible = np.zeros(len(event_profiles), dtype=bool)
+        eligible[available_rows] = True
+        
+        # Large events: an ANN index narrows everyone down to a shortlist that is
+        # rescored exactly, so no attendee is ever dropped from consideration.
+        # Small events (shortlist None): every member is scored in one vectorized pass.
+        shortlist = event_profiles.ann_shortlist(
+            matching_engine.profile_query_vectors(current_user_profile),
+            eligible,
+            nprobe=current_app.config.get('ANN_NPROBE', 8),
+            min_size=current_app.config.get('ANN_MIN_SHORTLIST', 200)
         )
-        
-        # Calculate scores for ALL users (for debugging) - but only if small enough
-        # MEMORY OPTIMIZATION: Skip debug scoring for large events
+        best_matches = [
+            (event_profiles.profiles[row], score)
+            for row, score in matching_engine.rank_profile_matrices(
+                current_user_profile, event_profiles.matrices,
+                top_k=top_k, eligible=eligible, shortlist=shortlist,
+                keyword_index=event_profiles.keyword_index
+            )
+        ]
+        
+        # Collect scores for ALL users (for debugging) - but only if small enough
+        # MEMORY OPTIMIZATION: Skip debug output for large events
         all_scores = []
-        if len(all_users_data) <= 100:  # Only compute all scores for small events
-            for user_data in all_users_data:
-                score = matching_engine.calculate_match_score(current_user_data, user_data)
-                all_scores.append((user_data, score))
+        if len(available_rows) <= 100:  # Only list all scores for small events
+            # Scores the available rows only: the rest of a large event stays unscanned
+            scores = matching_engine.score_profile_matrices(
+                current_user_profile,
+                matching_engine.subset_profile_matrices(event_profiles.matrices, np.array(available_rows))
+            )
+            all_scores = [(event_profiles.profiles[row], float(score)) for row, score in zip(available_rows, scores)]
             
             # Sort all scores by value (highest first)
             all_scores.sort(key=lambda x: x[1], reverse=True)
         
-        # Extract just the user data (without scores) for the template
-        # MEMORY OPTIMIZATION: Remove cached embeddings from user_data before passing to template
-        # (they're not needed in the frontend and take up memory)
-        potential_matches = []
-        for match_data, score in best_matches:
-            # Create a clean copy without cached embeddings for template
-            clean_data = {
-                'user_id': match_data['user_id'],
-                'name': match_data['name'],
-                'email': match_data['email'],
-                'keywords': match_data['keywords'],
-                'has_resume': match_data['has_resume'],
-                'resume_name': match_data['resume_name'],
-                'joined_at': match_data['joined_at']
-            }
-            potential_matches.append(clean_data)
+        # Copy the cached profiles so the template can't mutate the shared cache entry
+        potential_matches = [dict(match_data) for match_data, score in best_matches]
         
         # Debug: Print matching scores to terminal (with immediate flush)
         # MEMORY OPTIMIZATION: Only print debug info if we computed all scores
         if all_scores:
-            MATCH_THRESHOLD = 0.26  # Matching threshold from matching_engine
             print(f"\n=== MATCHING SCORES DEBUG ===", flush=True)
-            print(f"Current User: {current_user.name} (ID: {current_user.id})", flush=True)
+            print(f"Current User ID: {member_id}", flush=True)
             print(f"Event: {event.name}", flush=True)
             print(f"Session Filtering: {'Disabled (showing all)' if show_cross_session else 'Enabled (same-session only)'}", flush=True)
             print(f"User's Sessions: {list(user_session_ids)}", flush=True)
@@ -302,45 +421,30 @@ def event_matching(event_id):
         if len(potential_matches) == 0:
             no_matches_reason = 'no_similar_interests'
         
-        return render_template('event_matching.html', 
-                             event=event, 
-                             membership=membership,
-                             potential_matches=potential_matches,
-                             no_matches_reason=no_matches_reason,
-                             show_cross_session=show_cross_session)
+        return potential_matches, no_matches_reason
         
     except ImportError as e:
         # Fallback to simple matching if engine fails
         print(f"   ❌ ImportError: {str(e)}", flush=True)
         print("   ⚠️ Falling back to simple matching (no scores)", flush=True)
         
+        from utils.matching_data import candidate_profile, load_event_members
+        
+        # Members, users and resumes in one query
+        available_members = [
+            (mem, user, resume) for mem, user, resume in load_event_members(event_id)
+            if mem.user_id != member_id
+            and (shared_session_user_ids is None or mem.user_id in shared_session_user_ids)
+            and mem.user_id not in interacted_user_ids
+        ]
+        
         # MEMORY OPTIMIZATION: Limit fallback matching too
         max_attendees = current_app.config.get('MAX_MATCH_ATTENDEES', 500)
-        if len(available_memberships) > max_attendees:
-            available_memberships = available_memberships[:max_attendees]
-        
-        potential_matches = []
-        for mem in available_memberships:
-            user = mem.user
-            user_resume = Resume.query.filter_by(user_id=user.id, event_id=event_id).first()
-            
-            match_data = {
-                'user_id': user.id,
-                'name': user.name,
-                'email': user.email,
-                'keywords': mem.get_keywords_list(),
-                'has_resume': user_resume is not None,
-                'resume_name': user_resume.original_name if user_resume else None,
-                'joined_at': mem.joined_at.strftime('%B %Y') if mem.joined_at else 'Recently'
-            }
-            potential_matches.append(match_data)
-    
-        return render_template('event_matching.html', 
-                             event=event, 
-                             membership=membership,
-                             potential_matches=potential_matches,
-                             no_matches_reason=None,
-                             show_cross_session=show_cross_session)
+        potential_matches = [
+            candidate_profile(mem, user, resume) for mem, user, resume in available_members[:max_attendees]
+        ]
+    
+        return potential_matches, None
 
 @matching_bp.route('/<int:event_id>/like/<int:target_user_id>', methods=['POST'])
 @login_required
@@ -2,10 +2,16 @@
 User routes for Prophere.
 Handles dashboard, events, resumes, and keywords.
 """
-from flask import render_template, request, redirect, url_for, flash, send_file
+from flask import render_template, request, redirect, url_for, flash, send_file, jsonify
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from models import db, User, Event, Membership, Resume, UserInteraction
+from utils.profile_embeddings import refresh_keyword_embedding, bump_profile_version
+from utils.recommendations import refresh_member_recommendations
+from utils.resume_ingestion import submit_resume_processing, requeue_stalled_resume, resume_status
+from utils.document_store import (hash_file, find_document_content, apply_document_content,
+                                  link_document_content, release_document_content)
+from matching_engine import matching_engine
 import os
 from datetime import datetime
 from . import user_bp
@@ -89,8 +95,13 @@ def join_event():
         event_id=event.id,
         keywords=keywords
     )
+    # Store the keyword embedding now so matching never re-encodes it
+    refresh_keyword_embedding(membership)
     db.session.add(membership)
+    bump_profile_version(event.id)
     db.session.commit()
+    # Add the newcomer to the precomputed lists (or rebuild them if they can't be patched)
+    refresh_member_recommendations(current_app._get_current_object(), event.id, current_user.id)
     
     flash(f'Successfully joined "{event.name}" with interests: {", ".join(keyword_list)}!', 'success')
     return redirect(url_for('user.dashboard'))
@@ -130,11 +141,15 @@ def leave_event():
                     pass  # Log error but don't fail the operation
             
             # Delete resume record from database
+            release_document_content(resume.content_hash)
             db.session.delete(resume)
         
         # Delete the membership
         db.session.delete(membership)
+        bump_profile_version(event_id)
         db.session.commit()
+        # Take them out of the precomputed lists (or rebuild them if they can't be patched)
+        refresh_member_recommendations(current_app._get_current_object(), event.id, current_user.id)
         
         flash(f'Successfully left "{event_name}"! Your document has been removed.', 'success')
         
@@ -231,35 +246,24 @@ def upload_resume(event_id):
             flash('Error saving file. Please try again.', 'error')
             return redirect(url_for('user.upload_resume', event_id=event_id))
         
-        # Extract text and compute embedding for memory-efficient matching
-        # This is done once on upload to avoid recomputation during matching
-        extracted_text = ""
-        embedding_json = ""
         try:
-            from matching_engine import matching_engine
-            extracted_text, embedding_json = matching_engine.extract_and_embed_document(file_path)
-            if extracted_text:
-                current_app.logger.info(f"Extracted {len(extracted_text)} chars and computed embedding for resume {unique_filename}")
-        except Exception as e:
-            # Non-fatal: matching will still work, just slower (will recompute embeddings)
-            current_app.logger.warning(f"Failed to extract text/embedding for resume (non-fatal): {e}")
+            content_hash = hash_file(file_path)
+        except OSError:
+            content_hash = None
         
         # Check if user already has a resume for this event
-        existing_resume = Resume.query.filter_by(
+        resume = Resume.query.filter_by(
             user_id=current_user.id,
             event_id=event_id
         ).first()
         
-        if existing_resume:
+        if resume:
             # Update existing resume
-            existing_resume.filename = unique_filename
-            existing_resume.original_name = file.filename
-            existing_resume.mime_type = file.content_type
-            existing_resume.file_size = file_size
-            existing_resume.uploaded_at = datetime.utcnow()
-            # Update cached text and embedding
-            existing_resume.extracted_text = extracted_text
-            existing_resume.embedding = embedding_json
+            resume.filename = unique_filename
+            resume.original_name = file.filename
+            resume.mime_type = file.content_type
+            resume.file_size = file_size
+            resume.uploaded_at = datetime.utcnow()
         else:
             # Create new resume record
             resume = Resume(
@@ -268,17 +272,54 @@ def upload_resume(event_id):
                 filename=unique_filename,
                 original_name=file.filename,
                 mime_type=file.content_type,
-                file_size=file_size,
-                extracted_text=extracted_text,
-                embedding=embedding_json
+                file_size=file_size
             )
             db.session.add(resume)
         
+        # The same file uploaded before (e.g. to another event) reuses its stored
+        # text and embedding (utils.document_store); anything else is extracted
+        # and embedded in the background (utils.resume_ingestion)
+        link_document_content(resume, content_hash)
+        content = find_document_content(content_hash, matching_engine.model_name)
+        if content is not None:
+            apply_document_content(resume, content)
+        else:
+            # The old document's cached text/embedding no longer applies
+            resume.extracted_text = None
+            resume.set_embedding(None)
+            resume.processing_status = 'pending'
+            resume.processing_started_at = datetime.utcnow()
+            resume.processing_error = None
+            resume.extraction_note = None
+        
+        # A pending upload changes the profile once, when its job stores the result
+        # (utils.resume_ingestion); patching now would drop the document in between
+        if resume.processing_status == 'ready':
+            bump_profile_version(event_id)
         db.session.commit()
-        flash(f'Document uploaded successfully for "{event.name}"!', 'success')
-        return redirect(url_for('user.dashboard'))
+        if resume.processing_status == 'ready':
+            refresh_member_recommendations(current_app._get_current_object(), event_id, current_user.id)
+        
+        if content is not None:
+            flash(f'Document uploaded for "{event.name}"!', 'success')
+        else:
+            submit_resume_processing(current_app._get_current_object(), resume.id, unique_filename)
+            flash(f'Document uploaded for "{event.name}"! We\'re processing it now.', 'success')
+        return redirect(url_for('user.upload_resume', event_id=event_id))
     
-    return render_template('upload_resume.html', event=event)
+    resume = Resume.query.filter_by(user_id=current_user.id, event_id=event_id).first()
+    return render_template('upload_resume.html', event=event, resume=resume)
+
+@user_bp.route('/resume_status/<int:event_id>')
+@login_required
+def resume_processing_status(event_id):
+    """JSON processing status of the current user's document for an event (polled by the upload page)"""
+    resume = Resume.query.filter_by(user_id=current_user.id, event_id=event_id).first()
+    if resume is None:
+        return jsonify({'status': 'none'}), 404
+    # Jobs live in the worker that queued them; pick up one lost with its worker
+    requeue_stalled_resume(current_app._get_current_object(), resume)
+    return jsonify(resume_status(resume))
 
 @user_bp.route('/view_resume/<int:resume_id>')
 @login_required
@@ -351,8 +392,12 @@ def delete_resume(resume_id):
                 pass  # Log error but don't fail the operation
         
         # Delete resume record from database
+        event_id = resume.event_id
+        release_document_content(resume.content_hash)
         db.session.delete(resume)
+        bump_profile_version(event_id)
         db.session.commit()
+        refresh_member_recommendations(current_app._get_current_object(), event_id, current_user.id)
         
         flash('Document deleted successfully!', 'success')
         
@@ -412,10 +457,18 @@ def update_keywords():
             flash('Keywords can only contain letters, numbers, spaces, and hyphens.', 'error')
             return redirect(url_for('user.dashboard'))
     
-    # Update keywords
-    membership.keywords = keywords.strip()
+    # Update keywords (and invalidate the cached keyword embedding if they changed)
+    keywords_changed = membership.keywords != keywords.strip()
+    if keywords_changed:
+        membership.keywords = keywords.strip()
+        refresh_keyword_embedding(membership)
+        bump_profile_version(event_id)
     db.session.commit()
     
+    # Only this attendee's scores changed: patch the precomputed lists in place
+    if keywords_changed:
+        refresh_member_recommendations(current_app._get_current_object(), event_id, current_user.id)
+    
     flash('Keywords updated successfully!', 'success')
     return redirect(url_for('user.dashboard'))
 
@@ -3,6 +3,7 @@ from flask import flash, redirect, url_for, current_app
 from flask_login import current_user
 import os
 from models import Resume
+from utils.document_store import reconcile_document_contents
 
 def admin_required(f):
     """Decorator to require admin access"""
@@ -63,6 +64,11 @@ def cleanup_orphaned_files():
             except Exception as e:
                 pass  # Log error but don't fail the operation
         
+        # Drop stored document text/embeddings no resume references any more
+        removed_contents = reconcile_document_contents()
+        if removed_contents:
+            current_app.logger.info(f"Removed {removed_contents} unreferenced document content row(s)")
+        
         return len(orphaned_files)
         
     except Exception as e:
@@ -0,0 +1,180 @@
+"""
+Approximate nearest-neighbour index for large events (pure NumPy).
+
+IVFIndex is an inverted-file index: profile vectors are partitioned with
+spherical k-means (coarse quantization) and a query only looks at the ids in
+the `nprobe` lists whose centroids are closest to it. nprobe is the recall
+knob - probing every list is an exact search.
+
+Vectors are given as a list of "parts" (e.g. [keyword_matrix, document_matrix])
+that together form the combined profile vector; the parts are never
+concatenated, so indexing an event doesn't copy its embedding matrices. The
+index stores ids only - callers rescore the returned shortlist exactly.
+"""
+import logging
+from typing import Callable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _dot_parts(parts: List[np.ndarray], other_parts: List[np.ndarray]) -> np.ndarray:
+    """Inner products between row-stacked combined vectors, computed part by part"""
+    return sum(part @ other.T for part, other in zip(parts, other_parts))
+
+
+class IVFIndex:
+    """Inverted-file index with spherical k-means coarse quantization"""
+
+    def __init__(self, centroid_parts: List[np.ndarray], trained_size: int = 0):
+        self.centroid_parts = [np.ascontiguousarray(part, dtype=np.float32) for part in centroid_parts]
+        self.trained_size = trained_size
+        self._lists = [set() for _ in range(self.n_lists)]
+        self._list_of = {}
+        self._list_arrays = {}
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroid_parts[0].shape[0]
+
+    def __len__(self):
+        return len(self._list_of)
+
+    def __contains__(self, item_id):
+        return item_id in self._list_of
+
+    @classmethod
+    def train(cls, parts: List[np.ndarray], n_lists: Optional[int] = None, n_iter: int = 10,
+              sample_size: Optional[int] = None, seed: int = 0) -> 'IVFIndex':
+        """
+        Learn coarse centroids with spherical k-means.
+
+        Args:
+            parts: Row-aligned matrices forming the combined vectors
+            n_lists: Number of inverted lists (default: ~sqrt(N))
+            n_iter: Lloyd iterations
+            sample_size: Rows used for training (default: 64 per list)
+            seed: Random seed (training is deterministic for a given seed)
+
+        Returns:
+            Untrained-for-ids IVFIndex (call add() to insert vectors)
+        """
+        n = parts[0].shape[0]
+        if n == 0:
+            raise ValueError("Cannot train an IVF index on zero vectors")
+
+        n_lists = max(1, min(n_lists or int(round(np.sqrt(n))), n))
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(n, sample_size or 64 * n_lists)
+        sample_rows = np.sort(rng.choice(n, size=sample_size, replace=False))
+        sample = [part[sample_rows] for part in parts]
+
+        centroids = [part[rng.choice(sample_size, size=n_lists, replace=False)].copy() for part in sample]
+        for _ in range(n_iter):
+            assignment = np.argmax(_dot_parts(sample, centroids), axis=1)
+            counts = np.bincount(assignment, minlength=n_lists)
+            for p, part in enumerate(sample):
+                sums = np.zeros_like(centroids[p])
+                np.add.at(sums, assignment, part)
+                centroids[p] = sums
+            # Re-seed empty lists from random sample points
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                refill = rng.choice(sample_size, size=len(empty), replace=False)
+                for p, part in enumerate(sample):
+                    centroids[p][empty] = part[refill]
+            # Spherical k-means: project centroids back onto the unit sphere
+            norms = np.sqrt(sum(np.sum(c * c, axis=1) for c in centroids))
+            norms[norms == 0] = 1.0
+            centroids = [c / norms[:, None] for c in centroids]
+
+        return cls(centroids, trained_size=n)
+
+    def copy(self) -> 'IVFIndex':
+        """Copy with shared centroids and independent lists (for copy-on-write updates)"""
+        clone = IVFIndex.__new__(IVFIndex)
+        clone.centroid_parts = self.centroid_parts
+        clone.trained_size = self.trained_size
+        clone._lists = [set(ids) for ids in self._lists]
+        clone._list_of = dict(self._list_of)
+        clone._list_arrays = dict(self._list_arrays)
+        return clone
+
+    def add(self, ids: Iterable[int], parts: List[np.ndarray]) -> None:
+        """
+        Insert (or re-insert) vectors without retraining the centroids.
+
+        Args:
+            ids: Item ids, aligned with the rows of parts
+            parts: Row-aligned matrices forming the combined vectors
+        """
+        ids = list(ids)
+        if not ids:
+            return
+        self.remove(ids)
+        assignment = np.argmax(_dot_parts(parts, self.centroid_parts), axis=1)
+        for item_id, list_no in zip(ids, assignment.tolist()):
+            self._lists[list_no].add(item_id)
+            self._list_of[item_id] = list_no
+            self._list_arrays.pop(list_no, None)
+
+    def remove(self, ids: Iterable[int]) -> None:
+        """Remove ids from the index (unknown ids are ignored)"""
+        for item_id in ids:
+            list_no = self._list_of.pop(item_id, None)
+            if list_no is not None:
+                self._lists[list_no].discard(item_id)
+                self._list_arrays.pop(list_no, None)
+
+    def _list_array(self, list_no: int) -> np.ndarray:
+        array = self._list_arrays.get(list_no)
+        if array is None:
+            array = np.fromiter(self._lists[list_no], dtype=np.int64, count=len(self._lists[list_no]))
+            self._list_arrays[list_no] = array
+        return array
+
+    def probe(self, query_parts: List[np.ndarray], nprobe: int) -> np.ndarray:
+        """
+        Return the ids stored in the nprobe lists closest to the query.
+
+        Args:
+            query_parts: Query vector split like the indexed parts
+            nprobe: Number of lists to visit (recall knob)
+
+        Returns:
+            Array of candidate ids
+        """
+        nprobe = max(1, min(nprobe, self.n_lists))
+        centroid_scores = sum(centroids @ query for centroids, query in zip(self.centroid_parts, query_parts))
+        if nprobe < self.n_lists:
+            probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        else:
+            probed = np.arange(self.n_lists)
+        arrays = [self._list_array(list_no) for list_no in probed.tolist()]
+        return np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64)
+
+    def search(self, query_parts: List[np.ndarray], k: int, nprobe: int,
+               score_fn: Callable[[np.ndarray], np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k query: probe nprobe lists and rank their ids with score_fn.
+
+        Args:
+            query_parts: Query vector split like the indexed parts
+            k: Number of results
+            nprobe: Number of lists to visit (recall knob)
+            score_fn: Exact scorer mapping an id array to a score array
+
+        Returns:
+            Tuple of (ids, scores), best first
+        """
+        ids = self.probe(query_parts, nprobe)
+        if len(ids) == 0:
+            return ids, np.zeros(0, dtype=np.float64)
+        scores = np.asarray(score_fn(ids))
+        if len(ids) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+        return ids[order], scores[order]
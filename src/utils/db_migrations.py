@@ -5,7 +5,7 @@ This module provides helper functions to safely upgrade database schemas,
 particularly for production deployments where manual migrations may not be feasible.
 """
 
-from sqlalchemy import inspect, text
+from sqlalchemy import bindparam, inspect, select, text, update
 from flask import current_app
 
 
@@ -168,3 +168,311 @@ def upgrade_resume_embedding_fields():
         error_msg = f"❌ Error during resume embedding fields migration: {e}"
         current_app.logger.error(error_msg, exc_info=True)
         return False, error_msg
+
+
+def _binary_column_type(db_uri):
+    """SQL type for LargeBinary columns on the given database"""
+    return 'BYTEA' if 'postgresql' in db_uri.lower() else 'BLOB'
+
+
+def _add_missing_columns(table_name, column_definitions):
+    """
+    Add any columns from column_definitions that don't exist yet on table_name.
+    
+    Args:
+        table_name: Name of the table to alter
+        column_definitions: Ordered dict of column name -> SQL column definition
+    
+    Returns:
+        tuple: (columns_added: list, message: str)
+    """
+    from models import db
+    
+    db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI', '')
+    inspector = inspect(db.engine)
+    
+    if table_name not in inspector.get_table_names():
+        return [], f"{table_name} table doesn't exist yet - will be created with correct schema"
+    
+    column_names = {col['name'] for col in inspector.get_columns(table_name)}
+    columns_to_add = [name for name in column_definitions if name not in column_names]
+    
+    if not columns_to_add:
+        return [], f"{table_name} columns already exist - no migration needed"
+    
+    with db.engine.begin() as conn:
+        for name in columns_to_add:
+            if 'postgresql' in db_uri.lower():
+                conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS {name} {column_definitions[name]}'))
+            else:
+                conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN {name} {column_definitions[name]}'))
+    
+    return columns_to_add, f"✅ Successfully added columns to {table_name} table: {', '.join(columns_to_add)}"
+
+
+def upgrade_membership_keyword_embedding():
+    """
+    Add the keyword_embedding column to the Membership table.
+    
+    Existing rows start with NULL and are backfilled lazily by the matching
+    route (see utils.profile_embeddings.backfill_keyword_embeddings).
+    
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    try:
+        db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI', '')
+        
+        if db_uri.startswith('sqlite:///'):
+            return True, "SQLite database detected - columns will be added automatically on next schema update"
+        
+        _, message = _add_missing_columns('membership', {
+            'keyword_embedding': _binary_column_type(db_uri),
+            'keyword_embedding_dim': 'INTEGER',
+            'keyword_embedding_dtype': 'VARCHAR(10)',
+        })
+        return True, message
+    
+    except Exception as e:
+        error_msg = f"❌ Error during membership keyword embedding migration: {e}"
+        current_app.logger.error(error_msg, exc_info=True)
+        return False, error_msg
+
+
+def upgrade_resume_embedding_storage(batch_size=200):
+    """
+    Move Resume embeddings from JSON text to the compact binary format.
+    
+    Adds the embedding_vector/embedding_dim/embedding_dtype columns if needed,
+    then converts every row that still only has a JSON embedding, in batches.
+    Converted rows have their JSON embedding cleared. Safe to run repeatedly.
+    
+    Args:
+        batch_size: Number of rows converted per transaction
+    
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    from models import db, Resume
+    from utils.embedding_codec import embedding_from_json, encode_embedding
+    
+    try:
+        db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI', '')
+        
+        messages = []
+        if not db_uri.startswith('sqlite:///'):
+            _, message = _add_missing_columns('resume', {
+                'embedding_vector': _binary_column_type(db_uri),
+                'embedding_dim': 'INTEGER',
+                'embedding_dtype': 'VARCHAR(10)',
+            })
+            messages.append(message)
+        
+        if 'resume' not in inspect(db.engine).get_table_names():
+            return True, "Resume table doesn't exist yet - will be created with correct schema"
+        
+        # Core statements on just these columns: this runs before the migrations adding
+        # the Resume model's later columns, so a full ORM SELECT would fail on them
+        resume = Resume.__table__
+        pending = (
+            select(resume.c.id, resume.c.embedding)
+            .where(resume.c.embedding.isnot(None), resume.c.embedding_vector.is_(None))
+            .limit(batch_size)
+        )
+        store = (
+            update(resume)
+            .where(resume.c.id == bindparam('resume_id'))
+            .values(embedding_vector=bindparam('vector'), embedding_dim=bindparam('dim'),
+                    embedding_dtype=bindparam('dtype'), embedding=None)
+        )
+        
+        converted = 0
+        unreadable = 0
+        while True:
+            with db.engine.begin() as conn:
+                rows = conn.execute(pending).all()
+                if not rows:
+                    break
+                
+                params = []
+                for resume_id, embedding in rows:
+                    vector = embedding_from_json(embedding)
+                    if vector is None:
+                        unreadable += 1
+                    else:
+                        converted += 1
+                    # Clears the JSON text either way, so unreadable rows aren't retried
+                    encoded, dim, dtype = encode_embedding(vector)
+                    params.append({'resume_id': resume_id, 'vector': encoded, 'dim': dim, 'dtype': dtype})
+                conn.execute(store, params)
+        
+        messages.append(f"✅ Converted {converted} resume embeddings to binary format"
+                        + (f" ({unreadable} unreadable embeddings cleared)" if unreadable else ""))
+        return True, "; ".join(messages)
+    
+    except Exception as e:
+        db.session.rollback()
+        error_msg = f"❌ Error during resume embedding storage migration: {e}"
+        current_app.logger.error(error_msg, exc_info=True)
+        return False, error_msg
+
+
+def upgrade_event_profile_version():
+    """
+    Add the profile_version column to the Event table.
+    
+    The version is bumped on every attendee profile change and invalidates
+    cached matching data (see utils.event_matrix_cache).
+    
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    try:
+        db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI', '')
+        
+        if db_uri.startswith('sqlite:///'):
+            return True, "SQLite database detected - columns will be added automatically on next schema update"
+        
+        _, message = _add_missing_columns('event', {'profile_version': 'INTEGER NOT NULL DEFAULT 0'})
+        return True, message
+    
+    except Exception as e:
+        error_msg = f"❌ Error during event profile version migration: {e}"
+        current_app.logger.error(error_msg, exc_info=True)
+        return False, error_msg
+
+
+def upgrade_resume_processing_status():
+    """
+    Add the processing_status, processing_error, extraction_note and processing_started_at
+    columns to the Resume table.
+    
+    Existing resumes were processed inline on upload, so they default to 'ready'.
+    
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    try:
+        db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI', '')
+        
+        if db_uri.startswith('sqlite:///'):
+            return True, "SQLite database detected - columns will be added automatically on next schema update"
+        
+        _, message = _add_missing_columns('resume', {
+            'processing_status': "VARCHAR(20) NOT NULL DEFAULT 'ready'",
+            'processing_error': 'VARCHAR(255)',
+            'extraction_note': 'VARCHAR(255)',
+            'processing_started_at': 'TIMESTAMP',
+        })
+        return True, message
+    
+    except Exception as e:
+        error_msg = f"❌ Error during resume processing status migration: {e}"
+        current_app.logger.error(error_msg, exc_info=True)
+        return False, error_msg
+
+
+def upgrade_resume_content_hash():
+    """
+    Add the content_hash column (and its index) to the Resume table.
+    
+    Existing resumes keep a NULL hash: they simply never hit the document
+    content store (see utils.document_store) until re-uploaded.
+    
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    from models import db
+    
+    try:
+        db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI', '')
+        
+        if db_uri.startswith('sqlite:///'):
+            return True, "SQLite database detected - columns will be added automatically on next schema update"
+        
+        columns_added, message = _add_missing_columns('resume', {'content_hash': 'VARCHAR(64)'})
+        if columns_added:
+            with db.engine.begin() as conn:
+                conn.execute(text('CREATE INDEX IF NOT EXISTS ix_resume_content_hash ON resume (content_hash)'))
+        return True, message
+    
+    except Exception as e:
+        error_msg = f"❌ Error during resume content hash migration: {e}"
+        current_app.logger.error(error_msg, exc_info=True)
+        return False, error_msg
+
+
+def upgrade_embedding_model_tags():
+    """
+    Add the model/normalization tags of stored embeddings.
+    
+    Vectors stored before tagging were all produced by all-mpnet-base-v2 and
+    are raw (not normalized); they are tagged accordingly, so only a later
+    EMBEDDING_MODEL change makes them stale.
+    
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    from models import db
+    
+    try:
+        db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI', '')
+        
+        if db_uri.startswith('sqlite:///'):
+            return True, "SQLite database detected - columns will be added automatically on next schema update"
+        
+        messages = []
+        for table_name, columns, vector_column in (
+            ('resume', {'embedding_model': 'VARCHAR(100)', 'embedding_normalized': 'BOOLEAN'}, 'embedding_vector'),
+            ('membership', {'keyword_embedding_model': 'VARCHAR(100)', 'keyword_embedding_normalized': 'BOOLEAN'},
+             'keyword_embedding'),
+            ('document_content', {'embedding_normalized': 'BOOLEAN'}, None),
+        ):
+            columns_added, message = _add_missing_columns(table_name, columns)
+            messages.append(message)
+            if columns_added and vector_column:
+                model_column, normalized_column = columns
+                with db.engine.begin() as conn:
+                    conn.execute(text(
+                        f"UPDATE {table_name} SET {model_column} = 'all-mpnet-base-v2', {normalized_column} = FALSE "
+                        f"WHERE {vector_column} IS NOT NULL AND {model_column} IS NULL"
+                    ))
+        return True, "; ".join(messages)
+    
+    except Exception as e:
+        error_msg = f"❌ Error during embedding model tag migration: {e}"
+        current_app.logger.error(error_msg, exc_info=True)
+        return False, error_msg
+
+
+def upgrade_resume_has_document():
+    """
+    Add the has_document flag to the Resume table and backfill it.
+    
+    The matching path reads this flag instead of loading extracted_text,
+    so existing rows get it set from whether their text is non-empty.
+    
+    Returns:
+        tuple: (success: bool, message: str)
+    """
+    from models import db
+    
+    try:
+        db_uri = current_app.config.get('SQLALCHEMY_DATABASE_URI', '')
+        
+        if db_uri.startswith('sqlite:///'):
+            return True, "SQLite database detected - columns will be added automatically on next schema update"
+        
+        columns_added, message = _add_missing_columns('resume', {'has_document': 'BOOLEAN NOT NULL DEFAULT FALSE'})
+        if columns_added:
+            with db.engine.begin() as conn:
+                conn.execute(text(
+                    "UPDATE resume SET has_document = TRUE "
+                    "WHERE extracted_text IS NOT NULL AND TRIM(extracted_text) <> ''"
+                ))
+        return True, message
+    
+    except Exception as e:
+        error_msg = f"❌ Error during resume has_document migration: {e}"
+        current_app.logger.error(error_msg, exc_info=True)
+        return False, error_msg
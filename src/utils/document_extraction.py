@@ -0,0 +1,176 @@
+"""
+Bounded text extraction from uploaded PDF and Word documents.
+
+Pages (PDF) and paragraphs (Word) are streamed one at a time and joined once,
+stopping at the page and character budgets.
+
+PyPDF2 can spin for minutes or allocate gigabytes on a malformed PDF, so by
+default (DOCUMENT_EXTRACTION_SANDBOX) the parsing runs in a short-lived child
+process: this module executed as a script, with an address-space limit
+(RLIMIT_AS) and a CPU limit, killed when it exceeds its wall-clock timeout.
+The child imports only the two parsers, and at most
+DOCUMENT_EXTRACTION_PROCESSES children run at once. A killed or over-limit
+job comes back as a failed extraction ('error' set) instead of stalling or
+OOM-killing the worker.
+"""
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+from typing import Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Exit status of a child that hit its memory limit
+_EXIT_OUT_OF_MEMORY = 3
+
+_slots = None
+_slots_lock = threading.Lock()
+
+
+def iter_pdf_text(file_path: str) -> Iterator[str]:
+    """Yield the text of each PDF page (pages are parsed only as they are read)"""
+    import PyPDF2
+
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page in pdf_reader.pages:
+            yield page.extract_text() or ""
+
+
+def iter_word_text(file_path: str) -> Iterator[str]:
+    """Yield the text of each Word paragraph"""
+    from docx import Document
+
+    doc = Document(file_path)
+    for paragraph in doc.paragraphs:
+        yield paragraph.text
+
+
+def collect_text(parts: Iterator[str], max_parts: Optional[int], max_chars: int) -> Dict:
+    """Join streamed pages/paragraphs once, stopping at the page and character budgets"""
+    collected, length, note = [], 0, None
+    try:
+        for count, part in enumerate(parts, start=1):
+            if max_parts and count > max_parts:
+                note = f"Only the first {max_parts} pages were read"
+                break
+            if not part:
+                continue
+            if max_chars and length + len(part) > max_chars:
+                collected.append(part[:max(0, max_chars - length)])
+                note = f"Only the first {max_chars} characters were read"
+                break
+            collected.append(part)
+            length += len(part) + 1
+    finally:
+        # Closes the underlying file even when we stop early
+        parts.close()
+    return {'text': "\n".join(collected).strip(), 'truncated': note is not None, 'note': note}
+
+
+def extract_text(file_path: str, max_pages: Optional[int], max_chars: int) -> Dict:
+    """
+    Extract text in this process (raises on unreadable documents).
+
+    Args:
+        file_path: Path to a .pdf, .doc or .docx file
+        max_pages: Maximum PDF pages to read (None/0 for no limit)
+        max_chars: Maximum characters to keep (0 for no limit)
+
+    Returns:
+        Dict with 'text', 'truncated' and 'note' (what was left out, or None)
+    """
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension == '.pdf':
+        return collect_text(iter_pdf_text(file_path), max_pages, max_chars)
+    if file_extension in ['.doc', '.docx']:
+        return collect_text(iter_word_text(file_path), None, max_chars)
+    logger.warning(f"Unsupported file format: {file_extension}")
+    return {'text': "", 'truncated': False, 'note': None}
+
+
+def _acquire_slot(max_processes: int) -> threading.BoundedSemaphore:
+    global _slots
+    if _slots is None:
+        with _slots_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(max(1, max_processes))
+    _slots.acquire()
+    return _slots
+
+
+def extract_text_sandboxed(file_path: str, max_pages: Optional[int], max_chars: int,
+                           timeout: float = 30, memory_mb: int = 512, max_processes: int = 2) -> Dict:
+    """
+    Extract text in a resource-limited child process.
+
+    Args:
+        file_path: Path to a .pdf, .doc or .docx file
+        max_pages: Maximum PDF pages to read (None/0 for no limit)
+        max_chars: Maximum characters to keep (0 for no limit)
+        timeout: Wall-clock seconds before the child is killed
+        memory_mb: Address-space limit of the child (MB)
+        max_processes: Maximum concurrent extraction children
+
+    Returns:
+        Dict with 'text', 'truncated', 'note' and 'error' (None on success)
+    """
+    command = [sys.executable, os.path.abspath(__file__), file_path,
+               str(max_pages or 0), str(max_chars or 0), str(memory_mb), str(int(timeout) + 1)]
+    failed = {'text': "", 'truncated': False, 'note': None}
+
+    slots = _acquire_slot(max_processes)
+    try:
+        completed = subprocess.run(command, capture_output=True, timeout=timeout,
+                                   stdin=subprocess.DEVNULL)
+    except subprocess.TimeoutExpired:
+        # subprocess.run has already killed the child
+        logger.warning(f"Extraction of {file_path} timed out after {timeout}s")
+        return {**failed, 'error': 'Document processing timed out'}
+    finally:
+        slots.release()
+
+    if completed.returncode == _EXIT_OUT_OF_MEMORY:
+        logger.warning(f"Extraction of {file_path} exceeded its {memory_mb} MB memory limit")
+        return {**failed, 'error': 'Document is too large to process'}
+    if completed.returncode != 0:
+        # Negative: killed by a signal (e.g. SIGXCPU from the CPU limit)
+        logger.warning(f"Extraction of {file_path} failed (exit {completed.returncode}): "
+                       f"{completed.stderr.decode('utf-8', 'replace')[-500:]}")
+        return {**failed, 'error': 'Document could not be read'}
+
+    return {**json.loads(completed.stdout), 'error': None}
+
+
+def _limit_resources(memory_mb: int, cpu_seconds: int) -> None:
+    """Cap the child's address space and CPU time (where the platform supports it)"""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return
+    limits = [(resource.RLIMIT_CPU, cpu_seconds)]
+    if memory_mb:
+        limits.append((resource.RLIMIT_AS, memory_mb * 1024 * 1024))
+    for limit, value in limits:
+        try:
+            resource.setrlimit(limit, (value, value))
+        except (ValueError, OSError) as e:
+            logger.warning(f"Could not set resource limit {limit}: {e}")
+
+
+def _child_main(argv) -> int:
+    file_path, max_pages, max_chars, memory_mb, cpu_seconds = argv
+    _limit_resources(int(memory_mb), int(cpu_seconds))
+    try:
+        result = extract_text(file_path, int(max_pages), int(max_chars))
+    except MemoryError:
+        return _EXIT_OUT_OF_MEMORY
+    sys.stdout.write(json.dumps(result))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(_child_main(sys.argv[1:]))
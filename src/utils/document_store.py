@@ -0,0 +1,184 @@
+"""
+Content-addressed store of extracted document text and embeddings.
+
+Attendees upload the same CV to several events. Each upload is hashed
+(SHA-256 of the bytes) and stored on Resume.content_hash; the first
+successful processing of a hash saves its text and embedding in a
+DocumentContent row, tagged with the model that produced the embedding.
+Later uploads of the same bytes copy from that row and skip extraction and
+the transformer entirely.
+
+DocumentContent.ref_count counts the Resume rows pointing at the hash.
+Resume deletions release their reference and the row is deleted at zero.
+reconcile_document_contents() recounts every row from the Resume table, for
+drift after bulk deletes or crashes.
+"""
+import hashlib
+import logging
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """SHA-256 hex digest of a file, read in 1 MB blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def find_document_content(content_hash: Optional[str], model_name: str):
+    """
+    Stored content for a hash, if it was embedded with the given model.
+
+    Args:
+        content_hash: SHA-256 of the uploaded bytes
+        model_name: Model the embedding must come from
+
+    Returns:
+        DocumentContent or None
+    """
+    from models import DocumentContent
+
+    if not content_hash:
+        return None
+    return DocumentContent.query.filter_by(content_hash=content_hash, model_name=model_name).first()
+
+
+def apply_document_content(resume, content) -> None:
+    """Copy stored text and embedding onto a resume and mark it processed"""
+    resume.extracted_text = content.extracted_text
+    resume.set_embedding(content.get_embedding(), model_name=content.model_name,
+                         normalized=content.embedding_normalized)
+    resume.extraction_note = content.extraction_note
+    resume.processing_status = 'ready'
+    resume.processing_error = None
+
+
+def link_document_content(resume, content_hash: Optional[str]) -> None:
+    """
+    Point a resume at new uploaded content, moving its reference.
+
+    The caller is responsible for committing the session.
+
+    Args:
+        resume: Resume whose file changed
+        content_hash: SHA-256 of the new file
+    """
+    from models import DocumentContent
+
+    if resume.content_hash == content_hash:
+        return
+    release_document_content(resume.content_hash)
+    resume.content_hash = content_hash
+    if content_hash:
+        DocumentContent.query.filter_by(content_hash=content_hash).update(
+            {DocumentContent.ref_count: DocumentContent.ref_count + 1},
+            synchronize_session=False
+        )
+
+
+def release_document_content(content_hash: Optional[str]) -> None:
+    """
+    Drop one reference to a hash (a resume was deleted or replaced).
+
+    Uses atomic UPDATE/DELETE statements so concurrent releases are never
+    lost. The caller is responsible for committing the session.
+
+    Args:
+        content_hash: Resume.content_hash of the resume going away
+    """
+    from models import DocumentContent
+
+    if not content_hash:
+        return
+    DocumentContent.query.filter_by(content_hash=content_hash).update(
+        {DocumentContent.ref_count: DocumentContent.ref_count - 1},
+        synchronize_session=False
+    )
+    DocumentContent.query.filter(
+        DocumentContent.content_hash == content_hash,
+        DocumentContent.ref_count <= 0
+    ).delete(synchronize_session=False)
+
+
+def release_document_contents(resumes: Iterable) -> None:
+    """release_document_content for every resume about to be bulk-deleted"""
+    for resume in resumes:
+        release_document_content(resume.content_hash)
+
+
+def store_document_content(resume, model_name: str) -> bool:
+    """
+    Save a processed resume's text and embedding under its content hash.
+
+    Commits on its own (after the resume itself was committed); failures
+    are logged and only cost a future cache miss.
+
+    Args:
+        resume: Resume that finished processing successfully
+        model_name: Model that produced resume's embedding
+
+    Returns:
+        True if the content was stored
+    """
+    from sqlalchemy.exc import IntegrityError
+    from models import db, DocumentContent, Resume
+
+    if not resume.content_hash:
+        return False
+    try:
+        # Load the deferred text before a new row is pending (autoflush would insert it half-filled)
+        extracted_text = resume.extracted_text
+        content = DocumentContent.query.filter_by(content_hash=resume.content_hash).first()
+        if content is None:
+            content = DocumentContent(
+                content_hash=resume.content_hash,
+                ref_count=Resume.query.filter_by(content_hash=resume.content_hash).count()
+            )
+            db.session.add(content)
+        content.extracted_text = extracted_text
+        content.extraction_note = resume.extraction_note
+        content.set_embedding(resume.get_embedding(), normalized=resume.embedding_normalized)
+        content.model_name = model_name
+        db.session.commit()
+        return True
+    except IntegrityError:
+        # Another worker stored the same content first
+        db.session.rollback()
+        return False
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Failed to store document content {resume.content_hash[:12]}: {e}")
+        return False
+
+
+def reconcile_document_contents() -> int:
+    """
+    Recount every DocumentContent reference and delete unreferenced rows.
+
+    Returns:
+        Number of rows deleted
+    """
+    from models import db, DocumentContent, Resume
+
+    counts = dict(
+        db.session.query(Resume.content_hash, db.func.count(Resume.id))
+        .filter(Resume.content_hash.isnot(None))
+        .group_by(Resume.content_hash)
+        .all()
+    )
+    removed = 0
+    for content in DocumentContent.query.all():
+        references = counts.get(content.content_hash, 0)
+        if references == 0:
+            db.session.delete(content)
+            removed += 1
+        elif content.ref_count != references:
+            content.ref_count = references
+    db.session.commit()
+    return removed
@@ -0,0 +1,103 @@
+"""
+Compact binary storage format for embedding vectors.
+
+Embeddings are stored as raw little-endian float32 (or float16) bytes in a
+LargeBinary column, with the dimension and dtype kept in sibling columns.
+Compared with the legacy JSON text format this is 4-8x smaller, and decoding
+is a zero-copy np.frombuffer instead of json.loads on the matching hot path.
+"""
+import json
+from typing import Optional, Tuple
+import numpy as np
+
+# Storage dtype name -> explicit little-endian numpy dtype
+EMBEDDING_DTYPES = {
+    'float32': np.dtype('<f4'),
+    'float16': np.dtype('<f2'),
+}
+
+DEFAULT_EMBEDDING_DTYPE = 'float32'
+
+
+def get_storage_dtype() -> str:
+    """
+    Return the configured storage dtype (EMBEDDING_STORAGE_DTYPE).
+
+    Falls back to float32 outside of an application context or for unknown values.
+    """
+    try:
+        from flask import current_app
+        dtype_name = current_app.config.get('EMBEDDING_STORAGE_DTYPE', DEFAULT_EMBEDDING_DTYPE)
+    except RuntimeError:
+        dtype_name = DEFAULT_EMBEDDING_DTYPE
+
+    return dtype_name if dtype_name in EMBEDDING_DTYPES else DEFAULT_EMBEDDING_DTYPE
+
+
+def encode_embedding(vector: Optional[np.ndarray], dtype_name: Optional[str] = None) -> Tuple[Optional[bytes], Optional[int], Optional[str]]:
+    """
+    Serialize an embedding vector to raw little-endian bytes.
+
+    Args:
+        vector: 1-D embedding vector (None for no embedding)
+        dtype_name: 'float32' or 'float16' (defaults to the configured storage dtype)
+
+    Returns:
+        Tuple of (bytes, dimension, dtype_name), or (None, None, None) for no vector
+    """
+    if vector is None:
+        return None, None, None
+
+    dtype_name = dtype_name or get_storage_dtype()
+    if dtype_name not in EMBEDDING_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype_name}")
+
+    array = np.ascontiguousarray(np.asarray(vector).ravel(), dtype=EMBEDDING_DTYPES[dtype_name])
+    return array.tobytes(), int(array.shape[0]), dtype_name
+
+
+def decode_embedding(data: Optional[bytes], dim: Optional[int], dtype_name: Optional[str]) -> Optional[np.ndarray]:
+    """
+    Decode bytes written by encode_embedding.
+
+    The returned array is a read-only view over the column bytes (no copy).
+    float16 vectors are returned as float16; callers that stack them into a
+    float32 matrix convert on assignment.
+
+    Args:
+        data: Raw embedding bytes
+        dim: Number of components
+        dtype_name: Storage dtype name
+
+    Returns:
+        1-D numpy array, or None if there is no (valid) embedding
+    """
+    if not data or dtype_name not in EMBEDDING_DTYPES:
+        return None
+
+    dtype = EMBEDDING_DTYPES[dtype_name]
+    if dim is None:
+        dim = len(data) // dtype.itemsize
+    if dim * dtype.itemsize != len(data):
+        return None
+
+    return np.frombuffer(data, dtype=dtype, count=dim)
+
+
+def embedding_from_json(embedding_json: Optional[str]) -> Optional[np.ndarray]:
+    """
+    Parse a legacy JSON text embedding into a float32 vector.
+
+    Args:
+        embedding_json: JSON list of floats
+
+    Returns:
+        float32 numpy array, or None if missing or unparseable
+    """
+    if not embedding_json:
+        return None
+
+    try:
+        return np.asarray(json.loads(embedding_json), dtype=np.float32)
+    except (json.JSONDecodeError, ValueError, TypeError):
+        return None
@@ -0,0 +1,223 @@
+"""
+Local embedding service shared by all web workers.
+
+Every worker that loads the sentence-transformer holds its own ~420 MB copy
+of it. With EMBEDDING_BACKEND=server, MatchingEngine instead talks to one
+embedding server process (scripts/embedding_server.py) that owns the model,
+over a Unix socket or a localhost HTTP port, so worker memory stays flat as
+workers are added.
+
+Protocol (HTTP/1.1):
+    GET  /health  -> JSON {"model", "loaded", "encode_batching"}
+    POST /encode  <- JSON {"texts": [...], "batch_size": n}
+                  -> raw little-endian float32 matrix, shape in X-Embedding-Shape
+
+RemoteEmbeddingModel exposes the same encode() call as SentenceTransformer,
+so the engine's batching code is unchanged. If the server can't be reached
+it falls back to loading the model in-process (and retries the server after
+a back-off).
+"""
+import http.client
+import json
+import logging
+import socket
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional
+from urllib.parse import urlparse
+
+import numpy as np
+
+from utils.encode_batcher import BatchingEncoder
+
+logger = logging.getLogger(__name__)
+
+# Seconds to use the in-process fallback before trying the server again
+SERVER_RETRY_INTERVAL = 30
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket"""
+
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class RemoteEmbeddingModel:
+    """SentenceTransformer-compatible client of the embedding server"""
+
+    def __init__(self, url: str, timeout: float = 30.0,
+                 fallback_factory: Optional[Callable] = None):
+        """
+        Args:
+            url: 'unix:///path/to.sock' or 'http://127.0.0.1:8765'
+            timeout: Socket timeout per request (seconds)
+            fallback_factory: Called once to load an in-process model when the server is unavailable
+        """
+        self.url = url
+        self.timeout = timeout
+        self.fallback_factory = fallback_factory
+        self._fallback_model = None
+        self._fallback_lock = threading.Lock()
+        self._server_down_until = 0.0
+
+    def _connection(self) -> http.client.HTTPConnection:
+        parsed = urlparse(self.url)
+        if parsed.scheme == 'unix':
+            return _UnixHTTPConnection(parsed.path, self.timeout)
+        return http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=self.timeout)
+
+    def _request(self, method: str, path: str, body: Optional[bytes] = None):
+        connection = self._connection()
+        try:
+            headers = {'Content-Type': 'application/json'} if body is not None else {}
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            data = response.read()
+            if response.status != 200:
+                raise RuntimeError(f"Embedding server returned {response.status}: {data[:200]!r}")
+            return response, data
+        finally:
+            connection.close()
+
+    def health(self) -> dict:
+        """Server status (raises if the server is unreachable)"""
+        _, data = self._request('GET', '/health')
+        return json.loads(data)
+
+    def _encode_remote(self, texts: List[str], batch_size: int) -> np.ndarray:
+        body = json.dumps({'texts': texts, 'batch_size': batch_size}).encode('utf-8')
+        response, data = self._request('POST', '/encode', body)
+        rows, dim = (int(n) for n in response.getheader('X-Embedding-Shape').split(','))
+        return np.frombuffer(data, dtype='<f4').reshape(rows, dim)
+
+    def _fallback(self):
+        if self.fallback_factory is None:
+            raise RuntimeError(f"Embedding server {self.url} is unavailable and no fallback is configured")
+        with self._fallback_lock:
+            if self._fallback_model is None:
+                logger.warning(f"Embedding server {self.url} unavailable; loading the model in-process")
+                self._fallback_model = self.fallback_factory()
+        return self._fallback_model
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        """Encode texts on the server (or the in-process fallback while it is down)"""
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+
+        if time.monotonic() >= self._server_down_until:
+            try:
+                embeddings = self._encode_remote(texts, batch_size)
+                return embeddings[0] if single else embeddings
+            except (OSError, http.client.HTTPException, RuntimeError) as e:
+                logger.warning(f"Embedding server request failed: {e}")
+                self._server_down_until = time.monotonic() + SERVER_RETRY_INTERVAL
+
+        embeddings = np.asarray(
+            self._fallback().encode(texts, batch_size=batch_size, show_progress_bar=False), dtype=np.float32
+        )
+        return embeddings[0] if single else embeddings
+
+
+class _EncodeHandler(BaseHTTPRequestHandler):
+    """Request handler; self.server.engine is the MatchingEngine owning the model"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: dict):
+        self._send(status, json.dumps(payload).encode('utf-8'), 'application/json')
+
+    def do_GET(self):
+        if self.path != '/health':
+            return self._send_json(404, {'error': 'Not found'})
+        engine = self.server.engine
+        self._send_json(200, {'model': engine.model_name, 'loaded': engine.is_model_loaded,
+                              'encode_batching': engine.status()['encode_batching']})
+
+    def do_POST(self):
+        if self.path != '/encode':
+            return self._send_json(404, {'error': 'Not found'})
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length))
+            texts = payload['texts']
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise ValueError("'texts' must be a list of strings")
+            batch_size = int(payload.get('batch_size') or self.server.batch_size)
+        except (ValueError, KeyError, TypeError) as e:
+            return self._send_json(400, {'error': str(e)})
+
+        try:
+            # Texts arrive preprocessed by the client's encode_many
+            model = self.server.engine.model
+            if isinstance(model, BatchingEncoder):
+                # Concurrent requests from all workers share model calls
+                encoded = model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+            else:
+                with self.server.encode_lock:
+                    encoded = model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+            embeddings = np.asarray(encoded, dtype='<f4').reshape(len(texts), -1)
+        except Exception as e:
+            logger.error(f"Encode request failed: {e}")
+            return self._send_json(500, {'error': str(e)})
+
+        self._send(200, embeddings.tobytes(), 'application/octet-stream',
+                   {'X-Embedding-Shape': f'{embeddings.shape[0]},{embeddings.shape[1]}'})
+
+    def address_string(self):
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def create_embedding_server(engine, url: str, batch_size: int = 32):
+    """
+    Build (but don't start) an embedding server for an engine.
+
+    Args:
+        engine: MatchingEngine whose model serves the requests (use the local backend)
+        url: 'unix:///path/to.sock' or 'http://127.0.0.1:8765'
+        batch_size: Default texts per model call
+
+    Returns:
+        Server instance; call serve_forever() to run it
+    """
+    import os
+
+    parsed = urlparse(url)
+    if parsed.scheme == 'unix':
+        if os.path.exists(parsed.path):
+            os.remove(parsed.path)  # stale socket from a previous run
+        server = _UnixHTTPServer(parsed.path, _EncodeHandler)
+    else:
+        if parsed.hostname not in ('127.0.0.1', 'localhost', '::1'):
+            logger.warning(f"Embedding server bound to {parsed.hostname}: it has no authentication")
+        server = ThreadingHTTPServer((parsed.hostname, parsed.port or 8765), _EncodeHandler)
+
+    server.engine = engine
+    server.batch_size = batch_size
+    server.encode_lock = threading.Lock()
+    return server
@@ -0,0 +1,164 @@
+"""
+Micro-batching coalescer in front of the sentence-transformer.
+
+Under concurrent load every request thread calls model.encode with one or a
+few short texts (typically a keyword string); those calls serialize on the
+model and each pays the full per-call overhead. BatchingEncoder wraps the
+model with the same encode() call: callers' texts are queued and a single
+dispatcher thread sends them to the model together, once max_batch texts
+are waiting or the oldest request has waited max_wait_ms
+(EMBEDDING_COALESCE_MAX_BATCH / EMBEDDING_COALESCE_WAIT_MS). Requests of at
+least half a batch are sent without waiting, since they already amortize
+the call overhead. A coalesced call uses the smallest batch_size its callers
+asked for (max_batch if none did).
+
+stats() reports batch sizes and queue waits for tuning.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Queue waits kept for the wait percentiles in stats()
+_WAIT_SAMPLES = 1000
+
+
+class _Request:
+    __slots__ = ('texts', 'batch_size', 'future', 'enqueued')
+
+    def __init__(self, texts: List[str], batch_size: Optional[int] = None):
+        self.texts = texts
+        self.batch_size = batch_size
+        self.future = Future()
+        self.enqueued = time.monotonic()
+
+
+class BatchingEncoder:
+    """SentenceTransformer-compatible wrapper that coalesces concurrent encode calls"""
+
+    def __init__(self, model, max_batch: int = 64, max_wait_ms: float = 5.0):
+        """
+        Args:
+            model: Object with a SentenceTransformer-style encode() (local or remote)
+            max_batch: Texts that trigger an immediate flush
+            max_wait_ms: Longest a request waits for others to join its batch
+        """
+        self.model = model
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        self._dispatcher = None
+        self._dispatcher_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._requests = 0
+        self._texts = 0
+        self._largest_batch = 0
+        self._waits = deque(maxlen=_WAIT_SAMPLES)
+
+    def __getattr__(self, name):
+        # Everything but encode() (e.g. get_sentence_embedding_dimension) goes to the model
+        if name == 'model':
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def submit(self, texts: List[str], batch_size: Optional[int] = None) -> Future:
+        """
+        Queue texts for the next batch.
+
+        Args:
+            texts: Texts to encode
+            batch_size: Largest model batch_size these texts may be encoded with
+
+        Returns:
+            Future resolving to a float32 matrix with one row per text
+        """
+        request = _Request(list(texts), batch_size)
+        if not request.texts:
+            request.future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return request.future
+        self._ensure_dispatcher()
+        self._queue.put(request)
+        return request.future
+
+    def encode(self, texts, batch_size: Optional[int] = None, show_progress_bar: bool = False,
+               **kwargs) -> np.ndarray:
+        """Encode texts as part of a coalesced batch (blocks until it is done)"""
+        single = isinstance(texts, str)
+        embeddings = self.submit([texts] if single else texts, batch_size).result()
+        return embeddings[0] if single else embeddings
+
+    def _ensure_dispatcher(self):
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            with self._dispatcher_lock:
+                if self._dispatcher is None or not self._dispatcher.is_alive():
+                    self._dispatcher = threading.Thread(target=self._run, name='encode-batcher', daemon=True)
+                    self._dispatcher.start()
+
+    def _collect(self) -> List[_Request]:
+        """Block for one request, then gather more until the batch is full or its wait expires"""
+        batch = [self._queue.get()]
+        count = len(batch[0].texts)
+        # Large requests don't wait for company, but take whatever is already queued
+        deadline = batch[0].enqueued + (0 if count * 2 >= self.max_batch else self.max_wait)
+        while count < self.max_batch:
+            try:
+                remaining = deadline - time.monotonic()
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(request)
+            count += len(request.texts)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.monotonic()
+            texts = [text for request in batch for text in request.texts]
+            batch_size = min([request.batch_size for request in batch if request.batch_size] or [self.max_batch])
+            try:
+                embeddings = np.asarray(
+                    self.model.encode(texts, batch_size=max(1, batch_size), show_progress_bar=False),
+                    dtype=np.float32
+                ).reshape(len(texts), -1)
+            except Exception as e:
+                logger.error(f"Batched encode of {len(texts)} texts failed: {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+
+            start = 0
+            for request in batch:
+                request.future.set_result(embeddings[start:start + len(request.texts)])
+                start += len(request.texts)
+
+            with self._stats_lock:
+                self._batches += 1
+                self._requests += len(batch)
+                self._texts += len(texts)
+                self._largest_batch = max(self._largest_batch, len(texts))
+                self._waits.extend(started - request.enqueued for request in batch)
+
+    def stats(self) -> Dict:
+        """Batch size and queue wait metrics since start"""
+        with self._stats_lock:
+            waits = np.asarray(self._waits) * 1000
+            return {
+                'batches': self._batches,
+                'requests': self._requests,
+                'texts': self._texts,
+                'mean_batch_texts': round(self._texts / self._batches, 2) if self._batches else 0.0,
+                'mean_batch_requests': round(self._requests / self._batches, 2) if self._batches else 0.0,
+                'largest_batch': self._largest_batch,
+                'queue_wait_p50_ms': round(float(np.percentile(waits, 50)), 3) if waits.size else 0.0,
+                'queue_wait_p95_ms': round(float(np.percentile(waits, 95)), 3) if waits.size else 0.0,
+                'queued': self._queue.qsize(),
+            }
@@ -0,0 +1,419 @@
+"""
+Process-level cache of per-event profile matrices for matching.
+
+Building the candidate data for an event means querying every membership and
+resume and decoding every embedding. The result only changes when someone
+joins, leaves, edits keywords or changes their resume, so it is cached here
+keyed by event id and tagged with Event.profile_version. Those changes bump
+the version (see utils.profile_embeddings.bump_profile_version), so a stale
+entry is detected on the next lookup in every worker process.
+
+Entries hold L2-normalized keyword/document matrices plus the user-id index
+and the display fields the matching page needs, so a request for a hot event
+only filters and scores in memory. Total size is bounded by
+EVENT_MATRIX_CACHE_MB with least-recently-used eviction across events.
+
+Events with at least ANN_MIN_EVENT_SIZE members also get an approximate
+nearest-neighbour index (utils.ann_index.IVFIndex) over the combined profile
+vectors. When an entry is rebuilt after a profile change, the previous index
+is updated incrementally (new/changed members are inserted, departed members
+removed) instead of being retrained.
+
+Every entry also carries an inverted keyword index (utils.keyword_index), so
+exact keyword overlaps are counted from posting lists instead of per-candidate
+sets. A single member's keyword edit patches it along with their matrix row.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.keyword_index import KeywordIndex
+
+logger = logging.getLogger(__name__)
+
+
+class EventProfileMatrices:
+    """Scoring-ready profile data for every member of one event"""
+
+    def __init__(self, event_id: int, version: int, user_ids: List[int],
+                 matrices: Dict, profiles: List[Dict], keyword_index: Optional[KeywordIndex] = None):
+        self.event_id = event_id
+        self.version = version
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        self.row_index = {user_id: row for row, user_id in enumerate(user_ids)}
+        self.matrices = matrices
+        self.profiles = profiles
+        self.keyword_index = (keyword_index if keyword_index is not None
+                              else KeywordIndex.build(matrices['keywords']))
+        self.ann_index = None
+        self.nbytes = self._estimate_nbytes()
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def _estimate_nbytes(self) -> int:
+        """Approximate memory footprint (arrays exactly, Python objects roughly)"""
+        array_bytes = sum(value.nbytes for value in self.matrices.values() if isinstance(value, np.ndarray))
+        # Profiles, keyword lists and index entries: a few hundred bytes per member
+        return array_bytes + self.user_ids.nbytes + self.keyword_index.nbytes + 512 * len(self.profiles)
+    
+    def index_parts(self, rows=None) -> List[np.ndarray]:
+        """Combined profile vectors ([keyword, document] parts) for the ANN index"""
+        parts = [self.matrices['keyword'], self.matrices['document']]
+        return parts if rows is None else [part[rows] for part in parts]
+    
+    def ann_shortlist(self, query_parts: List[np.ndarray], eligible: np.ndarray,
+                      nprobe: int, min_size: int) -> Optional[np.ndarray]:
+        """
+        Candidate rows from the ANN index, or None when the event isn't indexed.
+        
+        Starts by probing nprobe lists and widens the search until at least
+        min_size eligible rows are found (or every list has been probed).
+        
+        Args:
+            query_parts: Query vector parts (MatchingEngine.profile_query_vectors)
+            eligible: Boolean mask of rows that may be recommended
+            nprobe: Initial number of inverted lists to probe (recall knob)
+            min_size: Minimum number of eligible rows wanted in the shortlist
+            
+        Returns:
+            Array of rows, or None if there is no index
+        """
+        if self.ann_index is None:
+            return None
+        
+        while True:
+            user_ids = self.ann_index.probe(query_parts, nprobe)
+            rows = np.fromiter((self.row_index[user_id] for user_id in user_ids.tolist()),
+                               dtype=np.int64, count=len(user_ids))
+            if np.count_nonzero(eligible[rows]) >= min_size or nprobe >= self.ann_index.n_lists:
+                return rows
+            nprobe *= 2
+
+
+class EventMatrixCache:
+    """Thread-safe LRU cache of EventProfileMatrices with a memory budget"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.nbytes for entry in self._entries.values())
+
+    def get(self, event_id: int, version: int) -> Optional[EventProfileMatrices]:
+        """Return the cached entry for event_id if it was built at this version"""
+        with self._lock:
+            entry = self._entries.get(event_id)
+            if entry is None or entry.version != version:
+                # Stale entries stay until replaced, so their ANN index can be reused
+                self.misses += 1
+                return None
+            self._entries.move_to_end(event_id)
+            self.hits += 1
+            return entry
+    
+    def peek(self, event_id: int) -> Optional[EventProfileMatrices]:
+        """Return the cached entry for event_id regardless of version (no LRU update)"""
+        with self._lock:
+            return self._entries.get(event_id)
+
+    def put(self, entry: EventProfileMatrices) -> None:
+        """Insert an entry, evicting least-recently-used events to stay within budget"""
+        with self._lock:
+            self._entries.pop(entry.event_id, None)
+            if entry.nbytes > self.max_bytes:
+                logger.warning(
+                    f"Event {entry.event_id} profile matrices ({entry.nbytes} bytes) exceed the cache budget; not cached"
+                )
+                return
+            self._entries[entry.event_id] = entry
+            while self.total_bytes > self.max_bytes:
+                evicted_id, _ = self._entries.popitem(last=False)
+                self.evictions += 1
+                logger.info(f"Evicted event {evicted_id} profile matrices from cache")
+
+    def invalidate(self, event_id: int) -> None:
+        """Drop the entry for event_id (if cached in this process)"""
+        with self._lock:
+            self._entries.pop(event_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'events': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_event_matrix_cache() -> EventMatrixCache:
+    """Return the process-wide cache, sized from EVENT_MATRIX_CACHE_MB on first use"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from flask import current_app
+                max_mb = current_app.config.get('EVENT_MATRIX_CACHE_MB', 256)
+                _cache = EventMatrixCache(max_bytes=max_mb * 1024 * 1024)
+    return _cache
+
+
+def _member_data(membership, user, resume):
+    """
+    Scoring data (cached embeddings, no model calls) and display profile of one member.
+
+    Stored vectors of another model are never scored: a stale keyword vector
+    is recomputed from the keywords, a stale document is left out until it
+    is re-embedded (see utils.profile_embeddings).
+
+    The resume's extracted text is deferred and only loaded here for a
+    document that has no stored embedding yet; otherwise has_document stands
+    in for it.
+    """
+    from matching_engine import matching_engine
+    from utils.matching_data import candidate_profile
+
+    document_text = ""
+    doc_embedding = None
+    has_document = False
+    if resume and resume.has_document:
+        doc_embedding = resume.get_embedding()
+        if doc_embedding is None:
+            document_text = resume.extracted_text or ""
+        elif matching_engine.is_current_embedding(
+                doc_embedding, resume.embedding_model, resume.embedding_normalized):
+            has_document = True
+        else:
+            doc_embedding = None
+
+    keyword_embedding = membership.get_keyword_embedding()
+    if not matching_engine.is_current_embedding(keyword_embedding, membership.keyword_embedding_model,
+                                                membership.keyword_embedding_normalized):
+        keyword_embedding = None
+
+    profile = candidate_profile(membership, user, resume)
+    user_data = {
+        'user_id': membership.user_id,
+        'keywords': profile['keywords'],
+        'document_text': document_text,
+        'has_document': has_document,
+        'cached_doc_embedding': doc_embedding,
+        'cached_keyword_embedding': keyword_embedding,
+    }
+    return user_data, profile
+
+
+def build_event_profile_matrices(event, refresh_stale: bool = True) -> EventProfileMatrices:
+    """
+    Load every member of an event and build their scoring matrices.
+
+    Keyword embeddings missing on legacy memberships, or stale after a model
+    change, are (re)computed and committed here, so later builds never run
+    the model for them. Up to EMBEDDING_LAZY_REEMBED_LIMIT stale document
+    embeddings are re-embedded too; the profile version is then bumped so
+    every worker rebuilds with the new vectors.
+
+    Args:
+        event: Event instance
+        refresh_stale: Re-embed stale document vectors first
+
+    Returns:
+        EventProfileMatrices at the event's current profile_version
+    """
+    from flask import current_app
+    from models import db
+    from matching_engine import matching_engine
+    from utils.matching_data import load_event_members
+    from utils.profile_embeddings import (backfill_keyword_embeddings, refresh_stale_document_embeddings,
+                                          bump_profile_version)
+
+    # Read the version first: if profiles change while we build, the next
+    # lookup sees a newer version and rebuilds.
+    version = event.profile_version or 0
+
+    # Members, users and resumes in one query
+    members = load_event_members(event.id)
+    memberships = [membership for membership, _, _ in members]
+
+    if refresh_stale:
+        refreshed, remaining = refresh_stale_document_embeddings(
+            [resume for _, _, resume in members if resume is not None],
+            current_app.config.get('EMBEDDING_LAZY_REEMBED_LIMIT', 64)
+        )
+        if remaining:
+            logger.warning(f"Event {event.id}: {remaining} document embedding(s) from another model are "
+                           f"ignored until re-embedded (scripts/reembed.py --stale-only)")
+        if refreshed:
+            backfill_keyword_embeddings(memberships)
+            bump_profile_version(event.id)
+            db.session.commit()
+            logger.info(f"Event {event.id}: re-embedded {refreshed} stale document embedding(s)")
+            # Reload at the new version
+            return build_event_profile_matrices(event, refresh_stale=False)
+
+    if backfill_keyword_embeddings(memberships):
+        db.session.commit()
+
+    users_data = []
+    profiles = []
+    for membership, user, resume in members:
+        user_data, profile = _member_data(membership, user, resume)
+        users_data.append(user_data)
+        profiles.append(profile)
+
+    # Matrices keep only vectors and masks - document text is dropped here
+    matrices = matching_engine.build_profile_matrices(users_data)
+
+    return EventProfileMatrices(
+        event_id=event.id,
+        version=version,
+        user_ids=[profile['user_id'] for profile in profiles],
+        matrices=matrices,
+        profiles=profiles
+    )
+
+
+def get_event_profile_matrices(event) -> EventProfileMatrices:
+    """
+    Return scoring matrices for an event, from the process cache when current.
+
+    Args:
+        event: Event instance
+
+    Returns:
+        EventProfileMatrices for every member of the event
+    """
+    cache = get_event_matrix_cache()
+    entry = cache.get(event.id, event.profile_version or 0)
+    if entry is None:
+        previous = cache.peek(event.id)
+        entry = build_event_profile_matrices(event)
+        attach_ann_index(entry, previous)
+        cache.put(entry)
+    return entry
+
+
+def patch_event_profile_matrices(event, user_id: int) -> EventProfileMatrices:
+    """
+    Bring an event's cached matrices up to date after one member's profile changed.
+    
+    If this process holds the entry from just before the change (one version
+    behind), only that member's row is reloaded and replaced; otherwise the
+    entry is rebuilt as usual.
+    
+    Args:
+        event: Event instance (profile_version already bumped for the change)
+        user_id: Member whose keywords or resume changed
+        
+    Returns:
+        EventProfileMatrices at the event's current profile_version
+    """
+    from matching_engine import matching_engine
+    from utils.matching_data import load_event_members
+    
+    cache = get_event_matrix_cache()
+    version = event.profile_version or 0
+    previous = cache.peek(event.id)
+    if previous is None or previous.version != version - 1 or user_id not in previous.row_index:
+        return get_event_profile_matrices(event)
+    
+    members = load_event_members(event.id, [user_id])
+    if not members:
+        return get_event_profile_matrices(event)
+    
+    user_data, profile = _member_data(*members[0])
+    member_matrices = matching_engine.build_profile_matrices([user_data])
+    row = previous.row_index[user_id]
+    
+    matrices = {}
+    for key, value in previous.matrices.items():
+        value = value.copy() if isinstance(value, np.ndarray) else list(value)
+        value[row] = member_matrices[key][0]
+        matrices[key] = value
+    profiles = list(previous.profiles)
+    profiles[row] = profile
+    keyword_index = previous.keyword_index.replace(
+        row, previous.matrices['keywords'][row], member_matrices['keywords'][0]
+    )
+    
+    entry = EventProfileMatrices(
+        event_id=event.id,
+        version=version,
+        user_ids=previous.user_ids.tolist(),
+        matrices=matrices,
+        profiles=profiles,
+        keyword_index=keyword_index
+    )
+    attach_ann_index(entry, previous)
+    cache.put(entry)
+    return entry
+
+
+def attach_ann_index(entry: EventProfileMatrices, previous: Optional[EventProfileMatrices] = None) -> None:
+    """
+    Give large events an ANN index, reusing the previous entry's index when possible.
+    
+    The previous index is copied and patched: members who left are removed,
+    members who joined or whose vectors changed are (re)inserted. The centroids
+    are retrained only once the event has doubled or halved in size since
+    training.
+    
+    Args:
+        entry: Freshly built entry
+        previous: Entry for the same event built at an older version, if any
+    """
+    from flask import current_app
+    from utils.ann_index import IVFIndex
+    
+    if len(entry) < current_app.config.get('ANN_MIN_EVENT_SIZE', 2000):
+        return
+    
+    previous_index = previous.ann_index if previous is not None else None
+    if (previous_index is not None
+            and previous_index.trained_size / 2 <= len(entry) <= previous_index.trained_size * 2):
+        index = previous_index.copy()
+        previous_rows = previous.row_index
+        
+        departed = [user_id for user_id in previous_rows if user_id not in entry.row_index]
+        index.remove(departed)
+        
+        common = [user_id for user_id in entry.user_ids.tolist() if user_id in previous_rows]
+        new_rows = np.array([entry.row_index[user_id] for user_id in common], dtype=np.int64)
+        old_rows = np.array([previous_rows[user_id] for user_id in common], dtype=np.int64)
+        changed = np.zeros(len(common), dtype=bool)
+        for new_part, old_part in zip(entry.index_parts(new_rows), previous.index_parts(old_rows)):
+            changed |= np.any(new_part != old_part, axis=1)
+        
+        joined_rows = [row for row, user_id in enumerate(entry.user_ids.tolist()) if user_id not in previous_rows]
+        update_rows = np.concatenate([np.asarray(joined_rows, dtype=np.int64), new_rows[changed]])
+        index.add(entry.user_ids[update_rows].tolist(), entry.index_parts(update_rows))
+        logger.info(
+            f"Updated ANN index for event {entry.event_id}: "
+            f"{len(joined_rows)} joined, {int(changed.sum())} changed, {len(departed)} left"
+        )
+    else:
+        index = IVFIndex.train(entry.index_parts())
+        index.add(entry.user_ids.tolist(), entry.index_parts())
+        logger.info(f"Trained ANN index for event {entry.event_id} ({len(entry)} members, {index.n_lists} lists)")
+    
+    entry.ann_index = index
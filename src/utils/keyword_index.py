@@ -0,0 +1,116 @@
+"""
+Inverted keyword index for exact-overlap candidate generation (pure NumPy).
+
+The keyword component of the match score is boosted for every exact
+(case-insensitive) keyword a pair shares. Counting those overlaps by
+building a set per candidate costs O(N·k) per request; KeywordIndex keeps,
+per event, a posting list of member rows for every normalized keyword, so
+the candidates sharing a keyword with a user and their overlap counts come
+from merging that user's few posting lists.
+
+Rows are positions in the event's EventProfileMatrices. The index is built
+with the entry and, when one member edits their keywords, replaced
+copy-on-write (replace()) since cached entries are shared between threads.
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+_NO_ROWS = np.zeros(0, dtype=np.int64)
+
+
+def normalize_keywords(keywords: List[str]) -> set:
+    """Distinct lowercased keywords (what counts as an exact match)"""
+    return {keyword.lower() for keyword in keywords}
+
+
+class KeywordIndex:
+    """Posting lists of member rows per normalized keyword"""
+
+    def __init__(self, n_rows: int, postings: Dict[str, np.ndarray]):
+        self.n_rows = n_rows
+        self._postings = postings
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def n_terms(self) -> int:
+        return len(self._postings)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory footprint (posting arrays exactly, dict entries roughly)"""
+        return sum(rows.nbytes for rows in self._postings.values()) + 128 * len(self._postings)
+
+    @classmethod
+    def build(cls, keywords_lists: List[List[str]]) -> 'KeywordIndex':
+        """
+        Index the keyword list of every row.
+
+        Args:
+            keywords_lists: Keyword list of each row (e.g. matrices['keywords'])
+
+        Returns:
+            KeywordIndex over len(keywords_lists) rows
+        """
+        postings = {}
+        for row, keywords in enumerate(keywords_lists):
+            for term in normalize_keywords(keywords):
+                postings.setdefault(term, []).append(row)
+        return cls(len(keywords_lists), {
+            term: np.asarray(rows, dtype=np.int64) for term, rows in postings.items()
+        })
+
+    def overlaps(self, keywords: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rows sharing at least one keyword, with the number of shared keywords.
+
+        Args:
+            keywords: The user's keywords
+
+        Returns:
+            Tuple of (rows, counts) arrays, rows ascending
+        """
+        lists = [self._postings[term] for term in normalize_keywords(keywords) if term in self._postings]
+        if not lists:
+            return _NO_ROWS, _NO_ROWS
+        if len(lists) == 1:
+            return lists[0], np.ones(len(lists[0]), dtype=np.int64)
+        return np.unique(np.concatenate(lists), return_counts=True)
+
+    def overlap_counts(self, keywords: List[str]) -> np.ndarray:
+        """Shared-keyword count for every row (zeros outside the posting lists)"""
+        counts = np.zeros(self.n_rows, dtype=np.int64)
+        rows, row_counts = self.overlaps(keywords)
+        counts[rows] = row_counts
+        return counts
+
+    def replace(self, row: int, old_keywords: List[str], new_keywords: List[str]) -> 'KeywordIndex':
+        """
+        Copy of the index with one row's keywords changed.
+
+        Only the posting lists of added or removed keywords are rebuilt; the
+        others are shared with this index.
+
+        Args:
+            row: Row whose keywords changed
+            old_keywords: Keywords the row was indexed with
+            new_keywords: The row's new keywords
+
+        Returns:
+            New KeywordIndex (this one is left untouched)
+        """
+        old_terms, new_terms = normalize_keywords(old_keywords), normalize_keywords(new_keywords)
+        postings = dict(self._postings)
+        for term in old_terms - new_terms:
+            rows = postings[term]
+            rows = rows[rows != row]
+            if len(rows):
+                postings[term] = rows
+            else:
+                del postings[term]
+        for term in new_terms - old_terms:
+            rows = postings.get(term, _NO_ROWS)
+            postings[term] = np.insert(rows, np.searchsorted(rows, row), row)
+        return KeywordIndex(self.n_rows, postings)
@@ -0,0 +1,217 @@
+"""
+Background match computation for the matching loading page.
+
+event_matching scores the whole event inside the request. The loading page
+instead starts a job for (user, event, cross_session) on a small thread
+pool (MATCH_JOB_WORKERS) and polls its status endpoint; the finished result
+(the first page of the attendee's swipe deck, see utils.swipe_deck) is kept
+for MATCH_RESULT_TTL_SECONDS, so the deck render that follows only filters
+it.
+
+Submitting while a job for the same key is running, or while its result is
+still fresh, returns that job: refreshing the loading page never starts a
+second scoring run. A result is only served at the event profile_version it
+was computed for.
+
+Jobs run in the worker process that started them, but every worker sees
+them through a MatchJobRecord row per key (as RecommendationBuild does for
+builds): a status poll that lands on another gunicorn worker reports the
+job's state instead of starting a second one, and a conditional UPDATE
+lets only one worker claim a key. A job still 'running' after
+MATCH_JOB_TIMEOUT_SECONDS is assumed lost with its worker and may be
+claimed again. Only the worker that ran a job holds its result; the others
+serve the deck it stored (utils.swipe_deck), which is fresh by then.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _get_executor(app) -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=app.config.get('MATCH_JOB_WORKERS', 2),
+                    thread_name_prefix='match-job'
+                )
+    return _executor
+
+
+class MatchJob:
+    """One background computation of a user's first deck page"""
+
+    def __init__(self, key: Tuple, profile_version: int, ttl: float, started_at: Optional[datetime] = None,
+                 status: str = 'running'):
+        self.key = key
+        self.profile_version = profile_version
+        self.ttl = ttl
+        self.started_at = started_at  # its MatchJobRecord's, if this worker runs it
+        self.status = status  # running -> ready | failed
+        self.result = None
+        self.error = None
+        self.expires_at = None
+        self.future = None
+
+    @property
+    def is_expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def reusable(self, profile_version: int) -> bool:
+        """True if a new submission for this key should share this job"""
+        if self.status == 'running':
+            return True
+        return self.status == 'ready' and self.profile_version == profile_version and not self.is_expired
+
+
+def _claim(key: Tuple, profile_version: int, ttl: float, timeout: float) -> Tuple[Optional[datetime], str]:
+    """
+    Claim key's MatchJobRecord for a new run, unless a job any worker started can be reused.
+
+    Returns:
+        (started_at of the claimed run, 'running'), or (None, status of the job to reuse)
+    """
+    from sqlalchemy.exc import IntegrityError
+    from models import db, MatchJobRecord
+
+    user_id, event_id, cross_session = key
+    now = datetime.utcnow()
+    record = MatchJobRecord.query.filter_by(user_id=user_id, event_id=event_id, cross_session=cross_session).first()
+    if record is None:
+        db.session.add(MatchJobRecord(user_id=user_id, event_id=event_id, cross_session=cross_session,
+                                      profile_version=profile_version, status='running', started_at=now))
+        try:
+            db.session.commit()
+            return now, 'running'
+        except IntegrityError:
+            # Another worker created it first: decide from that one
+            db.session.rollback()
+            return _claim(key, profile_version, ttl, timeout)
+
+    if record.status == 'running' and record.started_at > now - timedelta(seconds=timeout):
+        return None, 'running'
+    if (record.status == 'ready' and record.profile_version == profile_version
+            and record.finished_at and record.finished_at > now - timedelta(seconds=ttl)):
+        return None, 'ready'
+
+    # Failed, expired, for an older profile_version or lost with its worker: run it again
+    claimed = MatchJobRecord.query.filter_by(id=record.id, status=record.status, started_at=record.started_at).update(
+        {MatchJobRecord.status: 'running', MatchJobRecord.profile_version: profile_version,
+         MatchJobRecord.started_at: now, MatchJobRecord.finished_at: None, MatchJobRecord.error: None},
+        synchronize_session=False
+    )
+    db.session.commit()
+    return (now, 'running') if claimed else (None, 'running')
+
+
+def _finish(job: 'MatchJob') -> None:
+    """Record the outcome on the job's MatchJobRecord (unless another worker has claimed it since)"""
+    from models import db, MatchJobRecord
+
+    user_id, event_id, cross_session = job.key
+    try:
+        MatchJobRecord.query.filter_by(
+            user_id=user_id, event_id=event_id, cross_session=cross_session, started_at=job.started_at
+        ).update({MatchJobRecord.status: job.status, MatchJobRecord.finished_at: datetime.utcnow(),
+                  MatchJobRecord.error: job.error}, synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Failed to record the outcome of match job {job.key}: {e}")
+
+
+def submit_match_job(app, key: Tuple, profile_version: int,
+                     compute: Callable[[], Any], ttl: float = 60) -> MatchJob:
+    """
+    Start computing a deck page, unless a job for key can be reused.
+
+    Requires an application context (the job's MatchJobRecord is read and
+    claimed here).
+
+    Args:
+        app: Flask application (the job pushes its own app context)
+        key: (user_id, event_id, show_cross_session)
+        profile_version: Event profile_version the result will be valid for
+        compute: Returns the result; runs in the job thread
+        ttl: Seconds a finished result is kept
+
+    Returns:
+        The running or fresh MatchJob for key; for a job another worker runs,
+        a MatchJob carrying only its status (no future or result here)
+    """
+    with _jobs_lock:
+        for stale_key in [k for k, job in _jobs.items() if job.is_expired]:
+            del _jobs[stale_key]
+        job = _jobs.get(key)
+        if job is not None and job.reusable(profile_version):
+            return job
+
+    started_at, status = _claim(key, profile_version, ttl, app.config.get('MATCH_JOB_TIMEOUT_SECONDS', 300))
+    if started_at is None:
+        return MatchJob(key, profile_version, ttl, status=status)
+
+    job = MatchJob(key, profile_version, ttl, started_at=started_at)
+    with _jobs_lock:
+        _jobs[key] = job
+    job.future = _get_executor(app).submit(_run_job, app, job, compute)
+    return job
+
+
+def _run_job(app, job: MatchJob, compute) -> str:
+    with app.app_context():
+        try:
+            job.result = compute()
+            job.expires_at = time.monotonic() + job.ttl
+            job.status = 'ready'
+        except Exception as e:
+            from models import db
+            db.session.rollback()
+            logger.warning(f"Match job {job.key} failed: {e}", exc_info=True)
+            job.error = 'Match computation failed'
+            job.expires_at = time.monotonic() + job.ttl
+            job.status = 'failed'
+        _finish(job)
+    return job.status
+
+
+def get_match_job(key: Tuple) -> Optional[MatchJob]:
+    """The current job for key (None if there is none or its result expired)"""
+    with _jobs_lock:
+        job = _jobs.get(key)
+    return None if job is None or job.is_expired else job
+
+
+def get_match_result(key: Tuple, profile_version: int) -> Optional[Any]:
+    """
+    A finished, fresh result for key.
+
+    Args:
+        key: (user_id, event_id, show_cross_session)
+        profile_version: Event's current profile_version
+
+    Returns:
+        The compute() result, or None if it is missing, still running, failed,
+        expired or from another profile_version
+    """
+    job = get_match_job(key)
+    if job is None or job.status != 'ready' or job.profile_version != profile_version:
+        return None
+    return job.result
+
+
+def clear_match_jobs() -> None:
+    """Forget every job of this process (running ones still finish; MatchJobRecord rows are kept)"""
+    with _jobs_lock:
+        _jobs.clear()
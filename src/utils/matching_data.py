@@ -0,0 +1,95 @@
+"""
+Data access helpers for the matching pages.
+
+Builds the candidate "profile" dicts rendered on the swipe deck from
+Membership/User/Resume rows, without touching embeddings or document text.
+
+load_event_members() is the one query behind an event's matching data:
+members, their users and resumes in a single joined SELECT of only the
+columns matching reads, so the page costs the same number of round trips
+whatever the event size.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def candidate_profile(membership, user, resume) -> Dict:
+    """
+    Display fields for one candidate card.
+    
+    Args:
+        membership: Candidate's Membership in the event
+        user: Candidate's User
+        resume: Candidate's Resume for the event (or None)
+        
+    Returns:
+        Dict with user_id, name, email, keywords, has_resume, resume_name, joined_at
+    """
+    return {
+        'user_id': user.id,
+        'name': user.name,
+        'email': user.email,
+        'keywords': membership.get_keywords_list(),
+        'has_resume': resume is not None,
+        'resume_name': resume.original_name if resume else None,
+        'joined_at': membership.joined_at.strftime('%B %Y') if membership.joined_at else 'Recently'
+    }
+
+
+def load_candidate_profiles(event_id: int, user_ids: Iterable[int]) -> Dict[int, Dict]:
+    """
+    Load display profiles for a handful of event members.
+    
+    Args:
+        event_id: Event ID
+        user_ids: Members to load
+        
+    Returns:
+        Dict of user_id -> candidate_profile() (members not found are omitted)
+    """
+    return {
+        user.id: candidate_profile(membership, user, resume)
+        for membership, user, resume in load_event_members(event_id, user_ids)
+    }
+
+
+def load_event_members(event_id: int, user_ids: Optional[Iterable[int]] = None) -> List[Tuple]:
+    """
+    Load members of an event with their user and resume, in one query.
+    
+    Only the columns used for matching and display are selected: keywords
+    and keyword embedding (Membership), name and email (User), resume
+    metadata, has_document flag and embedding (Resume - never the extracted
+    text). Other columns are deferred and would be loaded on access.
+    
+    Args:
+        event_id: Event ID
+        user_ids: Optional members to load (default: everyone)
+        
+    Returns:
+        List of (membership, user, resume or None) tuples ordered by membership id
+    """
+    from sqlalchemy.orm import load_only
+    from models import db, Membership, User, Resume
+    
+    query = (
+        db.session.query(Membership, User, Resume)
+        .join(User, User.id == Membership.user_id)
+        .outerjoin(Resume, db.and_(Resume.user_id == Membership.user_id, Resume.event_id == Membership.event_id))
+        .options(
+            load_only(Membership.id, Membership.user_id, Membership.event_id, Membership.keywords,
+                      Membership.joined_at, Membership.keyword_embedding, Membership.keyword_embedding_dim,
+                      Membership.keyword_embedding_dtype, Membership.keyword_embedding_model,
+                      Membership.keyword_embedding_normalized),
+            load_only(User.id, User.name, User.email),
+            load_only(Resume.id, Resume.user_id, Resume.event_id, Resume.original_name, Resume.processing_status,
+                      Resume.has_document, Resume.embedding, Resume.embedding_vector, Resume.embedding_dim,
+                      Resume.embedding_dtype, Resume.embedding_model, Resume.embedding_normalized),
+        )
+        .filter(Membership.event_id == event_id)
+    )
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        if not user_ids:
+            return []
+        query = query.filter(Membership.user_id.in_(user_ids))
+    return query.order_by(Membership.id).all()
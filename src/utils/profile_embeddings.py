@@ -0,0 +1,162 @@
+"""
+Maintenance of the cached profile embeddings stored on Membership rows.
+
+Keyword embeddings are computed when a user joins an event or edits their
+keywords, so the matching route can score every attendee from stored vectors
+without running the sentence-transformer.
+
+Every stored vector is tagged with the model that produced it. After a model
+change, stale keyword vectors (cheap) and a bounded number of stale document
+vectors per event are re-embedded lazily when the event's matrices are built;
+scripts/reembed.py --stale-only converts the rest in bulk.
+
+Any change to an event's attendee profiles must also bump the event's
+profile_version so cached matching data is rebuilt.
+"""
+import logging
+from typing import Iterable, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def refresh_keyword_embedding(membership) -> bool:
+    """
+    Recompute membership.keyword_embedding from its current keywords.
+    
+    The caller is responsible for committing the session. On failure the
+    embedding is cleared so stale vectors are never used for matching.
+    
+    Args:
+        membership: Membership instance whose keywords were set or changed
+        
+    Returns:
+        True if an embedding was stored, False otherwise
+    """
+    membership.set_keyword_embedding(None)
+    
+    keywords = membership.get_keywords_list()
+    if not keywords:
+        return False
+    
+    try:
+        from matching_engine import matching_engine
+        membership.set_keyword_embedding(matching_engine.embed_keywords(keywords),
+                                         model_name=matching_engine.model_name,
+                                         normalized=matching_engine.normalize_embeddings)
+    except Exception as e:
+        # Non-fatal: the matching route backfills missing embeddings lazily
+        logger.warning(f"Failed to compute keyword embedding for membership {membership.id}: {e}")
+    
+    return membership.keyword_embedding is not None
+
+
+def backfill_keyword_embeddings(memberships: Iterable) -> int:
+    """
+    Compute keyword embeddings that are missing or stale.
+    
+    Backfills rows created before keyword embeddings were stored and lazily
+    re-embeds vectors of another model (after an EMBEDDING_MODEL change),
+    in one batched encode. The caller is responsible for committing the session.
+    
+    Args:
+        memberships: Membership instances to check
+        
+    Returns:
+        Number of embeddings computed
+    """
+    from matching_engine import matching_engine
+    
+    pending = [
+        membership for membership in memberships
+        if membership.keywords and membership.get_keywords_list() and not matching_engine.is_current_embedding(
+            membership.get_keyword_embedding(), membership.keyword_embedding_model,
+            membership.keyword_embedding_normalized
+        )
+    ]
+    if not pending:
+        return 0
+    
+    try:
+        # Joined exactly like MatchingEngine.embed_keywords
+        vectors = matching_engine.encode_many([", ".join(m.get_keywords_list()) for m in pending])
+    except Exception as e:
+        logger.warning(f"Failed to compute {len(pending)} keyword embedding(s): {e}")
+        return 0
+    
+    computed = 0
+    for membership, vector in zip(pending, vectors):
+        if np.any(vector):
+            membership.set_keyword_embedding(vector, model_name=matching_engine.model_name,
+                                             normalized=matching_engine.normalize_embeddings)
+            computed += 1
+    return computed
+
+
+def refresh_stale_document_embeddings(resumes: Iterable, limit: int) -> Tuple[int, int]:
+    """
+    Re-embed up to limit resumes whose stored vector comes from another model.
+    
+    Stale resumes beyond the limit are left for scripts/reembed.py --stale-only
+    (matching ignores their document meanwhile). The (deferred) extracted text
+    is loaded in one query, for the re-embedded batch only. The caller is
+    responsible for committing the session.
+    
+    Args:
+        resumes: Resume instances to check
+        limit: Maximum number of documents to re-embed now
+        
+    Returns:
+        Tuple of (documents re-embedded, stale documents left)
+    """
+    from matching_engine import matching_engine
+    
+    stale = [
+        resume for resume in resumes
+        if resume.has_document and resume.has_embedding and not matching_engine.is_current_embedding(
+            resume.get_embedding(), resume.embedding_model, resume.embedding_normalized
+        )
+    ]
+    batch = stale[:max(0, limit)]
+    if not batch:
+        return 0, len(stale)
+    
+    from models import db, Resume
+    texts = dict(
+        db.session.query(Resume.id, Resume.extracted_text).filter(Resume.id.in_([resume.id for resume in batch]))
+    )
+    
+    try:
+        vectors = matching_engine.embed_documents([texts.get(resume.id) or "" for resume in batch])
+    except Exception as e:
+        logger.warning(f"Failed to re-embed {len(batch)} stale document(s): {e}")
+        return 0, len(stale)
+    
+    refreshed = 0
+    for resume, vector in zip(batch, vectors):
+        if np.any(vector):
+            resume.set_embedding(vector, model_name=matching_engine.model_name,
+                                 normalized=matching_engine.normalize_embeddings)
+            refreshed += 1
+    return refreshed, len(stale) - refreshed
+
+
+def bump_profile_version(event_id) -> None:
+    """
+    Mark an event's attendee profiles as changed.
+    
+    Called on join/leave and keyword/resume changes. Cached matching data built
+    at an older version is rebuilt on next use. Uses an atomic UPDATE so
+    concurrent bumps from different workers are never lost. The caller is
+    responsible for committing the session.
+    
+    Args:
+        event_id: ID of the event whose profiles changed
+    """
+    from models import db, Event
+    
+    Event.query.filter_by(id=event_id).update(
+        {Event.profile_version: Event.profile_version + 1},
+        synchronize_session=False
+    )
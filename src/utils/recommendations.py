@@ -0,0 +1,415 @@
+"""
+Precomputed per-attendee recommendation lists.
+
+An event-wide batch job scores every pair of attendees once and stores each
+attendee's top-N candidates in the Recommendation table, together with a
+RecommendationBuild row recording the Event.profile_version it was built
+from. The matching page then only reads and filters a short list, so its
+latency no longer depends on event size; when a profile change has bumped
+the event's version the lists are stale and the page scores live instead.
+
+The job tiles the attendee x attendee score matrix into blocks of
+RECOMMENDATIONS_BLOCK_SIZE and, because the match score is symmetric, only
+computes the tiles on and above the diagonal: each tile updates the running
+top-N of both its row and its column attendees.
+
+Builds are started from scripts/build_recommendations.py or the admin events
+page (in a background thread). When a single attendee edits their keywords or
+resume, or joins or leaves the event, update_member_recommendations patches
+the lists in place (one row and column of scores) instead of waiting for the
+next full build; refresh_member_recommendations falls back to a background
+rebuild when the lists missed a change and can no longer be patched.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Event ids with a build running in this process (a second trigger is ignored)
+_builds_in_progress = set()
+_builds_lock = threading.Lock()
+
+# Rows per INSERT statement when writing a build
+_INSERT_CHUNK_SIZE = 5000
+
+
+def _merge_top_n(best_scores: np.ndarray, best_rows: np.ndarray, targets: np.ndarray,
+                 scores: np.ndarray, candidates: np.ndarray) -> None:
+    """Merge a score tile into the running top-N of the target rows (in place)"""
+    top_n = best_scores.shape[1]
+    merged_scores = np.concatenate([best_scores[targets], scores], axis=1)
+    merged_rows = np.concatenate(
+        [best_rows[targets], np.broadcast_to(candidates, scores.shape)], axis=1
+    )
+    keep = np.argpartition(-merged_scores, top_n - 1, axis=1)[:, :top_n]
+    best_scores[targets] = np.take_along_axis(merged_scores, keep, axis=1)
+    best_rows[targets] = np.take_along_axis(merged_rows, keep, axis=1)
+
+
+def compute_top_n(matrices: Dict, top_n: int, block_size: int = 512,
+                  engine=None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-N candidates of every row of a profile matrix set.
+
+    Args:
+        matrices: build_profile_matrices() result for all attendees of an event
+        top_n: Candidates to keep per attendee
+        block_size: Rows/columns per score tile
+        engine: MatchingEngine to score with (default: the global engine)
+
+    Returns:
+        Tuple of (rows, scores) arrays of shape (N, top_n), best first per row.
+        Slots without a candidate above MATCH_THRESHOLD have row -1 and score -inf.
+    """
+    from matching_engine import MATCH_THRESHOLD
+    if engine is None:
+        from matching_engine import matching_engine as engine
+
+    n = len(matrices['keywords'])
+    best_scores = np.full((n, top_n), -np.inf)
+    best_rows = np.full((n, top_n), -1, dtype=np.int64)
+    if n == 0 or top_n <= 0:
+        return best_rows, best_scores
+
+    terms = engine.keyword_term_matrix(matrices['keywords'])
+
+    for row_start in range(0, n, block_size):
+        row_ids = np.arange(row_start, min(row_start + block_size, n))
+        row_block = engine.subset_profile_matrices(matrices, row_ids)
+
+        for col_start in range(row_start, n, block_size):
+            col_ids = np.arange(col_start, min(col_start + block_size, n))
+            col_block = row_block if col_start == row_start else engine.subset_profile_matrices(matrices, col_ids)
+
+            scores = engine.score_profile_block(row_block, col_block, terms[row_ids], terms[col_ids])
+            scores[scores <= MATCH_THRESHOLD] = -np.inf
+
+            if col_start == row_start:
+                np.fill_diagonal(scores, -np.inf)  # no self-matches
+                _merge_top_n(best_scores, best_rows, row_ids, scores, col_ids)
+            else:
+                # Symmetric score: the same tile serves both sides
+                _merge_top_n(best_scores, best_rows, row_ids, scores, col_ids)
+                _merge_top_n(best_scores, best_rows, col_ids, scores.T, row_ids)
+
+    order = np.argsort(-best_scores, axis=1, kind='stable')
+    best_scores = np.take_along_axis(best_scores, order, axis=1)
+    best_rows = np.take_along_axis(best_rows, order, axis=1)
+    best_rows[~np.isfinite(best_scores)] = -1
+    return best_rows, best_scores
+
+
+def build_event_recommendations(event_id: int, top_n: Optional[int] = None,
+                                block_size: Optional[int] = None) -> Dict:
+    """
+    Rebuild the stored recommendation lists of one event.
+
+    The old lists are replaced in a single transaction, so readers see either
+    the previous build or the new one. Requires an application context.
+
+    Args:
+        event_id: Event ID
+        top_n: Candidates per attendee (default: RECOMMENDATIONS_TOP_N)
+        block_size: Score tile size (default: RECOMMENDATIONS_BLOCK_SIZE)
+
+    Returns:
+        Dict with event_id, profile_version, attendees, recommendations and seconds
+    """
+    from flask import current_app
+    from models import db, Event, Recommendation, RecommendationBuild
+    from utils.event_matrix_cache import get_event_profile_matrices
+
+    event = Event.query.get(event_id)
+    if not event:
+        raise ValueError(f"Event {event_id} not found")
+
+    top_n = top_n or current_app.config.get('RECOMMENDATIONS_TOP_N', 50)
+    block_size = block_size or current_app.config.get('RECOMMENDATIONS_BLOCK_SIZE', 512)
+
+    started = time.perf_counter()
+    event_profiles = get_event_profile_matrices(event)
+    best_rows, best_scores = compute_top_n(event_profiles.matrices, top_n, block_size)
+
+    built_at = datetime.utcnow()
+    user_ids = event_profiles.user_ids
+    records = []
+    for row in range(len(event_profiles)):
+        for rank, (candidate_row, score) in enumerate(zip(best_rows[row].tolist(), best_scores[row].tolist()), 1):
+            if candidate_row < 0:
+                break
+            records.append({
+                'event_id': event.id,
+                'user_id': int(user_ids[row]),
+                'candidate_user_id': int(user_ids[candidate_row]),
+                'score': score,
+                'rank': rank,
+                'built_at': built_at,
+            })
+
+    try:
+        db.session.execute(Recommendation.__table__.delete().where(Recommendation.event_id == event.id))
+        for start in range(0, len(records), _INSERT_CHUNK_SIZE):
+            db.session.execute(Recommendation.__table__.insert(), records[start:start + _INSERT_CHUNK_SIZE])
+
+        build = RecommendationBuild.query.filter_by(event_id=event.id).first()
+        if not build:
+            build = RecommendationBuild(event_id=event.id)
+            db.session.add(build)
+        build.profile_version = event_profiles.version
+        build.top_n = top_n
+        build.attendee_count = len(event_profiles)
+        build.duration_seconds = time.perf_counter() - started
+        build.built_at = built_at
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    stats = {
+        'event_id': event.id,
+        'profile_version': event_profiles.version,
+        'attendees': len(event_profiles),
+        'recommendations': len(records),
+        'seconds': round(build.duration_seconds, 3),
+    }
+    logger.info(f"Built recommendations for event {event.id}: {stats}")
+    return stats
+
+
+def start_recommendation_build(app, event_id: int) -> bool:
+    """
+    Run build_event_recommendations in a background thread.
+
+    Args:
+        app: Flask application (the thread pushes its own app context)
+        event_id: Event ID
+
+    Returns:
+        False if a build for this event is already running in this process
+    """
+    with _builds_lock:
+        if event_id in _builds_in_progress:
+            return False
+        _builds_in_progress.add(event_id)
+
+    def run():
+        try:
+            with app.app_context():
+                build_event_recommendations(event_id)
+        except Exception as e:
+            logger.exception(f"Recommendation build failed for event {event_id}: {e}")
+        finally:
+            with _builds_lock:
+                _builds_in_progress.discard(event_id)
+
+    threading.Thread(target=run, daemon=True).start()
+    return True
+
+
+def get_stored_recommendations(event, user_id: int) -> Optional[Tuple[List[Tuple[int, float]], bool]]:
+    """
+    Read an attendee's precomputed list if it is current.
+
+    Args:
+        event: Event instance
+        user_id: Attendee's user ID
+
+    Returns:
+        None if the event has no build or it is stale (fall back to live scoring).
+        Otherwise (candidates, complete): candidates is a list of
+        (candidate_user_id, score) best first, and complete is True when the list
+        holds every candidate above the threshold (fewer than top_n were kept).
+    """
+    from models import Recommendation, RecommendationBuild
+
+    build = RecommendationBuild.query.filter_by(event_id=event.id).first()
+    if not build or not build.is_fresh(event):
+        return None
+
+    rows = (
+        Recommendation.query
+        .with_entities(Recommendation.candidate_user_id, Recommendation.score)
+        .filter_by(event_id=event.id, user_id=user_id)
+        .order_by(Recommendation.rank)
+        .all()
+    )
+    candidates = [(candidate_user_id, score) for candidate_user_id, score in rows]
+    return candidates, len(candidates) < build.top_n
+
+
+def update_member_recommendations(event_id: int, user_id: int) -> bool:
+    """
+    Patch the stored lists after one attendee changed their keywords or resume,
+    joined the event or left it.
+
+    Only that attendee's row and column of the score matrix change, so their
+    scores against the event are recomputed with one matrix-vector product
+    (the score is symmetric). Their own list is replaced, and another
+    attendee's list is patched only if the attendee entered it, moved within
+    it or dropped out of it; a full list that loses them is rescored for that
+    owner alone. An attendee who left loses their own list and drops out of
+    every other. The build is then moved to the event's new profile_version.
+
+    Must be called after the change (and its profile_version bump) has been
+    committed. Failures are logged, never raised: the lists simply stay
+    stale and the matching page scores live until the next full build.
+
+    Args:
+        event_id: Event ID
+        user_id: Attendee whose profile changed
+
+    Returns:
+        True if the stored lists are current again
+    """
+    from models import db, Event, Recommendation, RecommendationBuild
+    from matching_engine import matching_engine, MATCH_THRESHOLD
+    from utils.event_matrix_cache import patch_event_profile_matrices
+
+    try:
+        event = Event.query.get(event_id)
+        build = RecommendationBuild.query.filter_by(event_id=event_id).first()
+        version = (event.profile_version or 0) if event else 0
+        if not event or not build or build.profile_version != version - 1:
+            # No lists, or other changes happened since they were built
+            return False
+
+        entry = patch_event_profile_matrices(event, user_id)
+        row = entry.row_index.get(user_id)
+        top_n = build.top_n
+        user_ids = entry.user_ids.tolist()
+        matrices = entry.matrices
+
+        def score_row(owner_row):
+            scores = matching_engine.score_profile_matrices(
+                matching_engine.subset_profile_matrices(matrices, np.array([owner_row])), matrices,
+                entry.keyword_index.overlap_counts(matrices['keywords'][owner_row])
+            )
+            scores[owner_row] = -np.inf
+            return scores
+
+        def top_list(scores):
+            return [(user_ids[i], float(scores[i])) for i in matching_engine.select_top_k(scores, top_n)]
+
+        if row is None:
+            # Left the event: no scores of their own, every list they were in loses them
+            scores = None
+            new_lists = {user_id: []}
+        else:
+            scores = score_row(row)
+            new_lists = {user_id: top_list(scores)}
+
+        # Lists that may change: those holding the attendee, those not full yet,
+        # and those whose weakest entry the attendee now beats
+        list_stats = (
+            db.session.query(Recommendation.user_id, db.func.count(Recommendation.id), db.func.min(Recommendation.score))
+            .filter(Recommendation.event_id == event_id)
+            .group_by(Recommendation.user_id)
+            .all()
+        )
+        stats_by_owner = {owner: (count, min_score) for owner, count, min_score in list_stats}
+        holders = {
+            owner for (owner,) in db.session.query(Recommendation.user_id)
+            .filter_by(event_id=event_id, candidate_user_id=user_id)
+        }
+        affected = set(holders)
+        for owner_row in (np.flatnonzero(scores > MATCH_THRESHOLD).tolist() if scores is not None else []):
+            count, min_score = stats_by_owner.get(user_ids[owner_row], (0, None))
+            if count < top_n or scores[owner_row] > min_score:
+                affected.add(user_ids[owner_row])
+        affected.discard(user_id)
+
+        current_lists = {owner: [] for owner in affected}
+        owners = list(affected)
+        for start in range(0, len(owners), 500):
+            for owner, candidate, score in (
+                db.session.query(Recommendation.user_id, Recommendation.candidate_user_id, Recommendation.score)
+                .filter(Recommendation.event_id == event_id, Recommendation.user_id.in_(owners[start:start + 500]))
+                .order_by(Recommendation.user_id, Recommendation.rank)
+            ):
+                current_lists[owner].append((candidate, score))
+
+        rescored = 0
+        for owner, current in current_lists.items():
+            owner_row = entry.row_index.get(owner)
+            if owner_row is None:
+                continue
+            others = [(candidate, score) for candidate, score in current if candidate != user_id]
+            new_score = float(scores[owner_row]) if scores is not None else -np.inf
+            qualifies = new_score > MATCH_THRESHOLD
+            was_full = len(current) >= top_n
+
+            # Everyone not stored scores at most the list's old minimum
+            if len(others) < len(current) and was_full and not (qualifies and new_score >= current[-1][1]):
+                # Fell out of a full list: the owner's next-best candidate isn't stored
+                new_lists[owner] = top_list(score_row(owner_row))
+                rescored += 1
+                continue
+            if qualifies:
+                others.append((user_id, new_score))
+                others.sort(key=lambda item: item[1], reverse=True)
+            new_lists[owner] = others[:top_n]
+
+        built_at = datetime.utcnow()
+        changed_owners = list(new_lists)
+        for start in range(0, len(changed_owners), 500):
+            db.session.execute(Recommendation.__table__.delete().where(
+                Recommendation.event_id == event_id,
+                Recommendation.user_id.in_(changed_owners[start:start + 500])
+            ))
+        records = [
+            {'event_id': event_id, 'user_id': owner, 'candidate_user_id': candidate,
+             'score': score, 'rank': rank, 'built_at': built_at}
+            for owner, candidates in new_lists.items()
+            for rank, (candidate, score) in enumerate(candidates, 1)
+        ]
+        for start in range(0, len(records), _INSERT_CHUNK_SIZE):
+            db.session.execute(Recommendation.__table__.insert(), records[start:start + _INSERT_CHUNK_SIZE])
+
+        # Conditional: if another change already moved the build, leave the lists stale
+        moved = RecommendationBuild.query.filter_by(event_id=event_id, profile_version=version - 1).update(
+            {RecommendationBuild.profile_version: version}, synchronize_session=False
+        )
+        if not moved:
+            db.session.rollback()
+            return False
+        db.session.commit()
+
+        logger.info(
+            f"Patched recommendations for event {event_id} after user {user_id} changed: "
+            f"{len(new_lists)} lists updated, {rescored} rescored"
+        )
+        return True
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Incremental recommendation update failed for event {event_id}, user {user_id}: {e}")
+        return False
+
+
+def refresh_member_recommendations(app, event_id: int, user_id: int) -> bool:
+    """
+    Bring the stored lists up to date after one attendee's change.
+
+    Patches them with update_member_recommendations; if they exist but can't
+    be patched (e.g. they already missed another change), rebuilds them in a
+    background thread so they don't stay stale until someone rebuilds by hand.
+
+    Args:
+        app: Flask application (for the background build)
+        event_id: Event ID
+        user_id: Attendee whose profile or membership changed
+
+    Returns:
+        True if the lists were patched, False if there are none or a rebuild was started
+    """
+    from models import RecommendationBuild
+
+    if update_member_recommendations(event_id, user_id):
+        return True
+    if RecommendationBuild.query.filter_by(event_id=event_id).first() is not None:
+        start_recommendation_build(app, event_id)
+    return False
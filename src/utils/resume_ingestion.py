@@ -0,0 +1,193 @@
+"""
+Background resume ingestion.
+
+upload_resume only saves the file and marks the Resume 'pending'; text
+extraction and the document embedding run here, on a small thread pool
+(RESUME_INGEST_WORKERS), so a large PDF never holds a web request. The
+upload page polls the resume status endpoint until the row is 'ready' or
+'failed'.
+
+Each job is tagged with the stored filename it was queued for: if the user
+uploads again before it finishes, the stale result is discarded and only
+the newest upload is applied.
+
+Jobs live in the memory of the process that queued them. One lost with its
+worker (a restart, a gunicorn worker recycled) is queued again by the
+status endpoint once the upload has been pending or processing for
+RESUME_PROCESSING_TIMEOUT seconds (requeue_stalled_resume).
+"""
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(app) -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=app.config.get('RESUME_INGEST_WORKERS', 2),
+                    thread_name_prefix='resume-ingest'
+                )
+    return _executor
+
+
+def submit_resume_processing(app, resume_id: int, filename: str) -> Future:
+    """
+    Queue extraction and embedding of an uploaded resume.
+
+    Args:
+        app: Flask application (jobs push their own app context)
+        resume_id: Resume ID (must be committed as 'pending')
+        filename: Stored filename the job is for
+
+    Returns:
+        Future resolving to the final status ('ready', 'failed' or 'superseded')
+    """
+    return _get_executor(app).submit(_process_resume, app, resume_id, filename)
+
+
+def _process_resume(app, resume_id: int, filename: str) -> str:
+    from models import db, Resume
+    from utils.profile_embeddings import bump_profile_version
+    from utils.recommendations import refresh_member_recommendations
+
+    with app.app_context():
+        resume = Resume.query.get(resume_id)
+        if resume is None or resume.filename != filename:
+            return 'superseded'
+        from matching_engine import matching_engine
+        from utils.document_store import find_document_content, apply_document_content, store_document_content
+        
+        user_id, event_id = resume.user_id, resume.event_id
+        
+        # Another upload of the same bytes may have been processed meanwhile
+        content = find_document_content(resume.content_hash, matching_engine.model_name)
+        if content is not None:
+            apply_document_content(resume, content)
+            bump_profile_version(event_id)
+            db.session.commit()
+            refresh_member_recommendations(app, event_id, user_id)
+            return 'ready'
+        
+        resume.processing_status = 'processing'
+        resume.processing_started_at = datetime.utcnow()
+        db.session.commit()
+        file_path = os.path.join(app.config['UPLOAD_FOLDER'], str(user_id), filename)
+
+        extracted_text, embedding, error, note = "", None, None, None
+        try:
+            extraction = matching_engine.extract_document(file_path)
+            extracted_text, note = extraction['text'], extraction['note']
+            if extraction['error']:
+                error = extraction['error']
+            elif extracted_text:
+                embedding = matching_engine.embed_document(extracted_text)
+            else:
+                error = 'No text could be extracted from this document'
+        except Exception as e:
+            logger.warning(f"Failed to extract text/embedding for resume {resume_id}: {e}")
+            error = 'Document processing failed'
+
+        try:
+            # Re-read: the user may have re-uploaded or deleted while we worked
+            resume = Resume.query.get(resume_id)
+            if resume is None or resume.filename != filename:
+                return 'superseded'
+
+            resume.extracted_text = extracted_text
+            resume.set_embedding(embedding, model_name=matching_engine.model_name,
+                                 normalized=matching_engine.normalize_embeddings)
+            resume.processing_status = 'failed' if error else 'ready'
+            resume.processing_error = error
+            resume.extraction_note = note
+            bump_profile_version(event_id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to store processed resume {resume_id}: {e}")
+            return 'failed'
+
+        status = resume.processing_status
+        logger.info(f"Processed resume {resume_id} ({len(extracted_text)} chars): {status}")
+        if status == 'ready':
+            store_document_content(resume, matching_engine.model_name)
+        refresh_member_recommendations(app, event_id, user_id)
+        return status
+
+
+def requeue_unfinished_resumes(app) -> int:
+    """
+    Queue resumes left 'pending' or 'processing' (e.g. by a restart).
+
+    Args:
+        app: Flask application
+
+    Returns:
+        Number of resumes queued
+    """
+    from models import Resume
+
+    with app.app_context():
+        unfinished = Resume.query.filter(Resume.processing_status.in_(['pending', 'processing'])).all()
+        for resume in unfinished:
+            submit_resume_processing(app, resume.id, resume.filename)
+        return len(unfinished)
+
+
+def requeue_stalled_resume(app, resume) -> Optional[Future]:
+    """
+    Queue a resume again if its job looks lost.
+
+    A resume counts as stalled once it has been 'pending' or 'processing' for
+    RESUME_PROCESSING_TIMEOUT seconds since it was queued (or uploaded). The
+    claim is a conditional UPDATE of processing_started_at, so of several
+    workers polling the same resume only one queues it.
+
+    Args:
+        app: Flask application
+        resume: Resume instance
+
+    Returns:
+        Future of the new job, or None if the resume was not stalled
+    """
+    from models import db, Resume
+
+    if resume is None or resume.is_processed:
+        return None
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=app.config.get('RESUME_PROCESSING_TIMEOUT', 300))
+    queued_at = db.func.coalesce(Resume.processing_started_at, Resume.uploaded_at)
+    claimed = Resume.query.filter(
+        Resume.id == resume.id,
+        Resume.processing_status.in_(['pending', 'processing']),
+        queued_at < cutoff
+    ).update({Resume.processing_started_at: now}, synchronize_session=False)
+    db.session.commit()
+    if not claimed:
+        return None
+    logger.warning(f"Resume {resume.id} stalled in '{resume.processing_status}': queued again")
+    return submit_resume_processing(app, resume.id, resume.filename)
+
+
+def resume_status(resume) -> Optional[dict]:
+    """JSON-ready processing status of a resume (None if there is no resume)"""
+    if resume is None:
+        return None
+    return {
+        'resume_id': resume.id,
+        'status': resume.processing_status,
+        'error': resume.processing_error,
+        'note': resume.extraction_note,
+        'original_name': resume.original_name,
+        'uploaded_at': resume.uploaded_at.isoformat() if resume.uploaded_at else None,
+    }
@@ -0,0 +1,119 @@
+"""
+Persistent ranked swipe decks.
+
+Ranking an attendee's candidates scores the whole event, so doing it on
+every load of the matching page (and having no way to fetch more cards
+after like/pass) does not scale. A SwipeDeck row stores an attendee's
+ranked candidates for an event (SWIPE_DECK_SIZE of them, best first) and a
+cursor; next_deck_page() serves the next page from the cursor, skipping
+anyone the attendee interacted with since the deck was ranked, so paging
+costs O(page size) whatever the event size.
+
+A deck is re-ranked only when the event's profile_version has moved on
+(see utils.profile_embeddings.bump_profile_version) or when it runs dry
+while more candidates may exist. Ranking itself is left to the caller
+(routes.matching), which applies the session filter and scoring path.
+"""
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _rebuild(deck, event, rank: Callable, deck_size: int) -> Dict[int, Dict]:
+    """Re-rank a deck from the top; returns the ranked profiles by user id"""
+    profiles, no_matches_reason = rank(deck_size)
+    profiles = profiles[:deck_size]
+    deck.profile_version = event.profile_version or 0
+    deck.set_candidate_ids(profile['user_id'] for profile in profiles)
+    deck.cursor = 0
+    deck.no_matches_reason = None if profiles else no_matches_reason
+    deck.built_at = datetime.utcnow()
+    logger.info(f"Ranked swipe deck of user {deck.user_id} in event {event.id}: {len(profiles)} candidates")
+    return {profile['user_id']: profile for profile in profiles}
+
+
+def _take_page(deck, candidate_ids: List[int], limit: int) -> List[int]:
+    """Advance the cursor past the next limit candidates not interacted with yet"""
+    from models import db, UserInteraction
+
+    page_ids = []
+    while len(page_ids) < limit and deck.cursor < len(candidate_ids):
+        window = candidate_ids[deck.cursor:deck.cursor + limit - len(page_ids)]
+        interacted = {
+            target_user_id for (target_user_id,) in db.session.query(UserInteraction.target_user_id).filter(
+                UserInteraction.user_id == deck.user_id,
+                UserInteraction.event_id == deck.event_id,
+                UserInteraction.target_user_id.in_(window)
+            )
+        }
+        page_ids.extend(user_id for user_id in window if user_id not in interacted)
+        deck.cursor += len(window)
+    return page_ids
+
+
+def next_deck_page(event, user_id: int, cross_session: bool, limit: int,
+                   rank: Callable[[int], Tuple[List[Dict], Optional[str]]],
+                   deck_size: int = 50, cursor: Optional[int] = None) -> Dict:
+    """
+    Serve the next page of an attendee's deck, ranking it first if needed.
+
+    Args:
+        event: Event instance
+        user_id: Attendee the deck belongs to
+        cross_session: Deck ranked without the shared-session filter
+        limit: Candidates to return
+        rank: rank(n) -> (up to n candidate profiles best first, no_matches_reason);
+            called to (re)build the deck and expected to leave out interacted users
+        deck_size: Candidates ranked per deck
+        cursor: Deck position to serve from instead of the stored cursor (ignored when
+            the deck is re-ranked; 0 re-serves cards not swiped yet, e.g. on a page reload)
+
+    Returns:
+        Dict with 'candidates' (candidate_profile() dicts), 'no_matches_reason',
+        'has_more' and 'cursor' (position after this page)
+    """
+    from sqlalchemy.exc import IntegrityError
+    from models import db, SwipeDeck
+    from utils.matching_data import load_candidate_profiles
+
+    deck = SwipeDeck.query.filter_by(user_id=user_id, event_id=event.id, cross_session=cross_session).first()
+    ranked_profiles, rebuilt = {}, False
+    if deck is None:
+        deck = SwipeDeck(user_id=user_id, event_id=event.id, cross_session=cross_session)
+        ranked_profiles, rebuilt = _rebuild(deck, event, rank, deck_size), True
+        # Added once ranked: ranking queries (and commits) would flush it half-filled
+        db.session.add(deck)
+    elif not deck.is_fresh(event):
+        ranked_profiles, rebuilt = _rebuild(deck, event, rank, deck_size), True
+    elif cursor is not None:
+        deck.cursor = max(0, cursor)
+
+    candidate_ids = deck.get_candidate_ids()
+    page_ids = _take_page(deck, candidate_ids, limit)
+    # A full deck that ran dry may have more candidates past it: rank the next ones
+    if not page_ids and not rebuilt and len(candidate_ids) >= deck_size:
+        ranked_profiles = _rebuild(deck, event, rank, deck_size)
+        candidate_ids = deck.get_candidate_ids()
+        page_ids = _take_page(deck, candidate_ids, limit)
+
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request created this deck first: serve from that one
+        db.session.rollback()
+        return next_deck_page(event, user_id, cross_session, limit, rank, deck_size, cursor)
+
+    missing = [candidate_id for candidate_id in page_ids if candidate_id not in ranked_profiles]
+    profiles = dict(ranked_profiles)
+    if missing:
+        profiles.update(load_candidate_profiles(event.id, missing))
+    # Members who left since the deck was ranked have no profile any more
+    candidates = [dict(profiles[candidate_id]) for candidate_id in page_ids if candidate_id in profiles]
+    return {
+        'candidates': candidates,
+        'no_matches_reason': deck.no_matches_reason if not candidate_ids else None,
+        'has_more': deck.cursor < len(candidate_ids) or len(candidate_ids) >= deck_size,
+        'cursor': deck.cursor,
+    }
@@ -0,0 +1,61 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import numpy as np
+from utils.ann_index import IVFIndex
+
+
+def make_profiles(rng, n, dim=64, n_topics=20):
+    """Clustered, L2-normalized keyword/document vectors like real event profiles"""
+    topics = rng.normal(size=(n_topics, dim))
+    topic_of = rng.integers(0, n_topics, size=n)
+    parts = []
+    for _ in range(2):
+        vectors = topics[topic_of] + 0.5 * rng.normal(size=(n, dim))
+        parts.append((vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32))
+    return parts
+
+
+def exact_scores(parts, query_parts, ids):
+    return sum(part[ids] @ query for part, query in zip(parts, query_parts))
+
+
+def test_search_recall_improves_with_nprobe():
+    rng = np.random.default_rng(3)
+    parts = make_profiles(rng, 4000)
+    index = IVFIndex.train(parts, seed=0)
+    index.add(range(4000), parts)
+
+    recalls = []
+    for nprobe in (1, 8, index.n_lists):
+        hits = 0
+        for q in rng.choice(4000, size=20, replace=False):
+            query_parts = [part[q] for part in parts]
+            truth = set(np.argsort(-exact_scores(parts, query_parts, np.arange(4000)))[:10].tolist())
+            found, _ = index.search(query_parts, 10, nprobe,
+                                    lambda ids: exact_scores(parts, query_parts, ids))
+            hits += len(truth & set(found.tolist()))
+        recalls.append(hits / 200)
+
+    assert recalls[0] <= recalls[1] <= recalls[2]
+    assert recalls[1] >= 0.8
+    assert recalls[2] == 1.0
+
+
+def test_incremental_insert_and_remove():
+    rng = np.random.default_rng(5)
+    parts = make_profiles(rng, 1000)
+    index = IVFIndex.train([part[:900] for part in parts], seed=0)
+    index.add(range(900), [part[:900] for part in parts])
+
+    # Someone joins: inserted without retraining, and findable by their own vector
+    index.add([950], [part[950:951] for part in parts])
+    query_parts = [part[950] for part in parts]
+    assert 950 in index.probe(query_parts, nprobe=1).tolist()
+
+    # Copies are independent (cached entries are updated copy-on-write)
+    clone = index.copy()
+    clone.remove([950])
+    assert 950 in index and 950 not in clone
+    assert len(clone) == 900
@@ -0,0 +1,88 @@
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import numpy as np
+from matching_engine import MatchingEngine
+from utils.embedding_service import RemoteEmbeddingModel, create_embedding_server
+from utils.encode_batcher import BatchingEncoder
+from test_matching_engine import RecordingModel
+
+
+def test_remote_backend_matches_local_encoding(tmp_path):
+    server_engine = MatchingEngine(backend='local')
+    server_engine.model = RecordingModel()
+    url = f"unix://{tmp_path / 'embed.sock'}"
+    server = create_embedding_server(server_engine, url)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        client_engine = MatchingEngine(backend='server', server_url=url)
+        texts = ['Python, Finance', '', 'a much longer resume text']
+
+        np.testing.assert_array_equal(client_engine.encode_many(texts), server_engine.encode_many(texts))
+        assert RemoteEmbeddingModel(url).health()['loaded'] is True
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_unreachable_server_falls_back_to_local_model(tmp_path):
+    local_model = RecordingModel()
+    model = RemoteEmbeddingModel(f"unix://{tmp_path / 'missing.sock'}", fallback_factory=lambda: local_model)
+
+    embeddings = model.encode(['hello world'])
+
+    assert embeddings.shape == (1, 768)
+    assert local_model.batches == [['hello world']]
+
+
+def test_concurrent_encodes_are_coalesced_into_shared_batches():
+    class SlowModel(RecordingModel):
+        def encode(self, texts, batch_size=32, show_progress_bar=False):
+            time.sleep(0.02)  # per-call overhead that batching amortizes
+            return super().encode(texts, batch_size, show_progress_bar)
+
+    model = SlowModel()
+    encoder = BatchingEncoder(model, max_batch=64, max_wait_ms=20)
+    texts = [f'keyword {"x " * i}' for i in range(40)]
+    results = [None] * len(texts)
+
+    def encode(i):
+        results[i] = encoder.encode([texts[i]])
+
+    threads = [threading.Thread(target=encode, args=(i,)) for i in range(len(texts))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for text, embedding in zip(texts, results):
+        np.testing.assert_array_equal(embedding, RecordingModel().encode([text]))
+    stats = encoder.stats()
+    assert stats['requests'] == 40 and stats['texts'] == 40
+    assert len(model.batches) == stats['batches'] < 40
+    assert stats['mean_batch_texts'] > 1 and stats['queue_wait_p95_ms'] > 0
+
+
+def test_coalesced_call_uses_the_smallest_requested_batch_size():
+    class BatchSizeModel(RecordingModel):
+        def __init__(self):
+            super().__init__()
+            self.batch_sizes = []
+
+        def encode(self, texts, batch_size=32, show_progress_bar=False):
+            self.batch_sizes.append(batch_size)
+            return super().encode(texts, batch_size, show_progress_bar)
+
+    model = BatchSizeModel()
+    encoder = BatchingEncoder(model, max_batch=64, max_wait_ms=200)
+    futures = [encoder.submit(['python'], batch_size) for batch_size in (16, 8, None)]
+    for future in futures:
+        future.result()
+    encoder.encode(['robotics'])
+
+    assert model.batches == [['python'] * 3, ['robotics']]
+    assert model.batch_sizes == [8, 64]  # nobody asked for the second one: max_batch
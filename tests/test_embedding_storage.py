@@ -0,0 +1,84 @@
+import sys
+import os
+import json
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import numpy as np
+from sqlalchemy import text
+from app import create_app
+from models import db, User, Event, Resume
+from utils.embedding_codec import encode_embedding, decode_embedding
+from utils.db_migrations import upgrade_resume_embedding_storage
+
+
+def test_binary_roundtrip_is_compact_and_zero_copy():
+    vector = np.random.default_rng(0).normal(size=768).astype(np.float32)
+
+    data, dim, dtype_name = encode_embedding(vector, 'float32')
+    decoded = decode_embedding(data, dim, dtype_name)
+
+    assert len(data) == 768 * 4
+    assert len(data) * 4 < len(json.dumps(vector.tolist()))
+    assert not decoded.flags.owndata
+    np.testing.assert_array_equal(decoded, vector)
+
+    data16, dim16, dtype16 = encode_embedding(vector, 'float16')
+    assert len(data16) == 768 * 2
+    np.testing.assert_allclose(decode_embedding(data16, dim16, dtype16), vector, atol=1e-2)
+
+
+def test_migration_converts_json_embeddings():
+    app = create_app('testing')
+    vector = np.random.default_rng(1).normal(size=768).astype(np.float32)
+
+    with app.app_context():
+        db.create_all()
+        user = User(name='Legacy', email='legacy@test.com', password_hash='hash')
+        event = Event(name='Legacy Event', code='LEGACY1')
+        db.session.add_all([user, event])
+        db.session.commit()
+
+        resume = Resume(user_id=user.id, event_id=event.id, filename='cv.pdf', original_name='cv.pdf',
+                        mime_type='application/pdf', file_size=1, extracted_text='cv',
+                        embedding=json.dumps(vector.tolist()))
+        db.session.add(resume)
+        db.session.commit()
+
+        success, _ = upgrade_resume_embedding_storage()
+        resume = Resume.query.get(resume.id)
+
+        assert success
+        assert resume.embedding is None
+        assert resume.embedding_dim == 768
+        np.testing.assert_allclose(resume.get_embedding(), vector, atol=1e-6)
+
+
+def test_migration_runs_before_later_resume_columns_exist():
+    app = create_app('testing')
+    vector = np.random.default_rng(2).normal(size=384).astype(np.float32)
+
+    with app.app_context():
+        db.create_all()
+        # A resume table as it was before the columns added by later migrations
+        with db.engine.begin() as conn:
+            conn.execute(text('DROP TABLE resume'))
+            conn.execute(text(
+                'CREATE TABLE resume (id INTEGER PRIMARY KEY, user_id INTEGER, event_id INTEGER, '
+                'filename VARCHAR(255), original_name VARCHAR(255), mime_type VARCHAR(100), file_size INTEGER, '
+                'uploaded_at DATETIME, extracted_text TEXT, embedding TEXT, embedding_vector BLOB, '
+                'embedding_dim INTEGER, embedding_dtype VARCHAR(10))'
+            ))
+            conn.execute(text(
+                "INSERT INTO resume (id, user_id, event_id, filename, original_name, mime_type, file_size, embedding) "
+                "VALUES (1, 1, 1, 'cv.pdf', 'cv.pdf', 'application/pdf', 1, :embedding)"
+            ), {'embedding': json.dumps(vector.tolist())})
+
+        success, message = upgrade_resume_embedding_storage()
+        with db.engine.connect() as conn:
+            row = conn.execute(text('SELECT embedding, embedding_vector, embedding_dim, embedding_dtype FROM resume')).one()
+
+    assert success, message
+    assert row.embedding is None
+    assert row.embedding_dim == 384
+    np.testing.assert_allclose(decode_embedding(row.embedding_vector, row.embedding_dim, row.embedding_dtype),
+                               vector, atol=1e-6)
@@ -0,0 +1,59 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import numpy as np
+from test_matching_engine import make_engine, make_user
+from utils.event_matrix_cache import EventMatrixCache, EventProfileMatrices
+
+
+def make_entry(event_id, version=0, size=20):
+    rng = np.random.default_rng(event_id)
+    users = [make_user(rng, i, with_doc=i % 2 == 0) for i in range(size)]
+    return EventProfileMatrices(
+        event_id=event_id,
+        version=version,
+        user_ids=list(range(size)),
+        matrices=make_engine().build_profile_matrices(users),
+        profiles=[{'user_id': i} for i in range(size)]
+    )
+
+
+def test_least_recently_used_event_is_evicted_over_budget():
+    entries = [make_entry(event_id) for event_id in (1, 2, 3)]
+    # Room for two events of this size, not three
+    cache = EventMatrixCache(max_bytes=entries[0].nbytes * 2 + entries[0].nbytes // 2)
+    cache.put(entries[0])
+    cache.put(entries[1])
+    assert cache.get(1, 0) is entries[0]  # event 2 is now the least recently used
+
+    cache.put(entries[2])
+
+    assert cache.get(2, 0) is None
+    assert cache.get(1, 0) is entries[0] and cache.get(3, 0) is entries[2]
+    stats = cache.stats()
+    assert stats['events'] == 2 and stats['evictions'] == 1
+    assert stats['bytes'] <= stats['max_bytes']
+
+
+def test_entry_larger_than_the_budget_is_not_cached():
+    entry = make_entry(1)
+    cache = EventMatrixCache(max_bytes=entry.nbytes - 1)
+    cache.put(entry)
+    assert cache.peek(1) is None and cache.stats()['events'] == 0
+
+
+def test_newer_profile_version_misses_until_replaced():
+    cache = EventMatrixCache(max_bytes=64 * 1024 * 1024)
+    old = make_entry(1, version=3)
+    cache.put(old)
+    assert cache.get(1, 3) is old
+
+    # A bump (join, leave, profile edit) makes the cached entry stale
+    assert cache.get(1, 4) is None
+    assert cache.peek(1) is old  # kept so a rebuild can reuse its ANN index
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+    new = make_entry(1, version=4)
+    cache.put(new)
+    assert cache.get(1, 4) is new and cache.get(1, 3) is None
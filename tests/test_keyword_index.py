@@ -0,0 +1,50 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import numpy as np
+from matching_engine import MatchingEngine
+from utils.keyword_index import KeywordIndex
+from test_matching_engine import VOCABULARY, make_user
+
+
+def random_keywords(rng, n):
+    return [[k.upper() if rng.random() < 0.3 else k
+             for k in rng.choice(VOCABULARY, size=rng.integers(0, 4), replace=False)] for _ in range(n)]
+
+
+def test_posting_merge_counts_exact_overlaps():
+    rng = np.random.default_rng(11)
+    keywords_lists = random_keywords(rng, 300)
+    index = KeywordIndex.build(keywords_lists)
+
+    for keywords in random_keywords(rng, 20):
+        expected = MatchingEngine._exact_keyword_overlaps(keywords, keywords_lists)
+        rows, counts = index.overlaps(keywords)
+        assert rows.tolist() == np.flatnonzero(expected).tolist()
+        assert (counts == expected[rows]).all()
+        assert (index.overlap_counts(keywords) == expected).all()
+
+
+def test_replace_is_copy_on_write_and_ranking_is_unchanged():
+    rng = np.random.default_rng(12)
+    keywords_lists = random_keywords(rng, 100)
+    index = KeywordIndex.build(keywords_lists)
+
+    updated = index.replace(7, keywords_lists[7], ['Robotics', 'music'])
+    edited = list(keywords_lists)
+    edited[7] = ['Robotics', 'music']
+    rebuilt = KeywordIndex.build(edited)
+    for keywords in random_keywords(rng, 20) + [['robotics']]:
+        assert (updated.overlap_counts(keywords) == rebuilt.overlap_counts(keywords)).all()
+        assert (index.overlap_counts(keywords) == KeywordIndex.build(keywords_lists).overlap_counts(keywords)).all()
+
+    engine = MatchingEngine()
+    users = [make_user(rng, i, with_doc=rng.random() < 0.5) for i in range(200)]
+    matrices = engine.build_profile_matrices(users)
+    index = KeywordIndex.build(matrices['keywords'])
+    current = engine.build_profile_matrices([users[0]])
+    shortlist = rng.choice(200, size=30, replace=False)
+    for kwargs in ({}, {'shortlist': shortlist}):
+        assert (engine.rank_profile_matrices(current, matrices, top_k=15, keyword_index=index, **kwargs)
+                == engine.rank_profile_matrices(current, matrices, top_k=15, **kwargs))
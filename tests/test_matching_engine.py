@@ -0,0 +1,243 @@
+import sys
+import os
+import json
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import numpy as np
+from docx import Document
+from matching_engine import MatchingEngine, MATCH_THRESHOLD
+from utils.document_extraction import collect_text, extract_text_sandboxed
+
+VOCABULARY = ['python', 'machine learning', 'finance', 'design', 'robotics',
+              'marketing', 'biology', 'startups', 'data science', 'music']
+
+
+def make_engine():
+    """Engine whose model is never loaded: every test user carries cached embeddings"""
+    return MatchingEngine()
+
+
+def make_user(rng, user_id, with_doc):
+    keywords = list(rng.choice(VOCABULARY, size=rng.integers(0, 4), replace=False))
+    user_data = {
+        'user_id': user_id,
+        'keywords': keywords,
+        'document_text': '',
+        'cached_doc_embedding': None,
+        'cached_keyword_embedding': json.dumps(rng.normal(size=768).tolist()) if keywords else None,
+    }
+    if with_doc:
+        user_data['document_text'] = f'resume of user {user_id}'
+        user_data['cached_doc_embedding'] = json.dumps(rng.normal(size=768).tolist())
+    return user_data
+
+
+def test_score_candidates_matches_scalar_path():
+    engine = make_engine()
+    rng = np.random.default_rng(7)
+
+    for current_has_doc in (False, True):
+        current_user = make_user(rng, 0, current_has_doc)
+        current_user['keywords'] = ['python', 'finance']
+        current_user['cached_keyword_embedding'] = json.dumps(rng.normal(size=768).tolist())
+        candidates = [make_user(rng, i, with_doc=i % 2 == 0) for i in range(1, 80)]
+
+        batch_scores = engine.score_candidates(current_user, candidates)
+        scalar_scores = [engine.calculate_match_score(current_user, c) for c in candidates]
+
+        np.testing.assert_allclose(batch_scores, scalar_scores, rtol=0, atol=1e-5)
+
+
+def test_find_best_matches_returns_top_k_above_threshold():
+    engine = make_engine()
+    rng = np.random.default_rng(11)
+    current_user = make_user(rng, 0, True)
+    current_user['keywords'] = ['python', 'robotics', 'music']
+    current_user['cached_keyword_embedding'] = json.dumps(rng.normal(size=768).tolist())
+    candidates = [make_user(rng, i, with_doc=i % 3 == 0) for i in range(1, 120)]
+    candidates.append(dict(current_user))  # self must never be recommended
+
+    matches = engine.find_best_matches(current_user, candidates, top_k=5)
+
+    scalar = sorted(
+        ((c['user_id'], engine.calculate_match_score(current_user, c)) for c in candidates[:-1]),
+        key=lambda x: x[1], reverse=True
+    )
+    expected = [score for _, score in scalar if score > MATCH_THRESHOLD][:5]
+
+    assert len(matches) == len(expected)
+    assert all(user_data['user_id'] != 0 for user_data, _ in matches)
+    np.testing.assert_allclose([score for _, score in matches], expected, atol=1e-5)
+
+
+def test_pruned_ranking_matches_full_scoring():
+    engine = make_engine()
+    rng = np.random.default_rng(21)
+    # A shared direction spreads scores around the threshold
+    topic = rng.normal(size=768)
+    users = [make_user(rng, i, with_doc=i % 2 == 0) for i in range(600)]
+    for user in users:
+        for key in ('cached_keyword_embedding', 'cached_doc_embedding'):
+            if user[key]:
+                user[key] = (np.asarray(json.loads(user[key])) + rng.uniform(0, 3) * topic).astype(np.float32)
+    matrices = engine.build_profile_matrices(users)
+
+    for row in range(0, 600, 75):
+        current = engine.subset_profile_matrices(matrices, np.array([row]))
+        eligible = np.ones(600, dtype=bool)
+        eligible[row] = False
+        for shortlist in (None, rng.choice(600, size=150, replace=False)):
+            full = engine.rank_profile_matrices(current, matrices, top_k=10, eligible=eligible,
+                                                shortlist=shortlist, prune=False)
+            pruned = engine.rank_profile_matrices(current, matrices, top_k=10, eligible=eligible,
+                                                  shortlist=shortlist, prune=True)
+            np.testing.assert_allclose([s for _, s in pruned], [s for _, s in full], atol=1e-6)
+            # Candidates tied with the k-th score may be swapped (argpartition picks among them)
+            if full:
+                kth = full[-1][1]
+                assert {r for r, s in pruned if s > kth + 1e-6} == {r for r, s in full if s > kth + 1e-6}
+
+    assert engine.pruned_pairs > engine.scored_pairs > 0
+    assert engine.status()['pruned_pairs'] == engine.pruned_pairs
+
+
+class RecordingModel:
+    """Deterministic stand-in for the sentence-transformer that records each call"""
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        self.batches.append(list(texts))
+        return np.array([[len(text), text.count(' '), 1.0] + [0.0] * 765 for text in texts], dtype=np.float32)
+
+
+def test_encode_many_batches_by_length_and_keeps_order():
+    engine = make_engine()
+    engine.model = RecordingModel()
+    texts = ['a b c d e', '', 'a', 'a b c', 'a b', 'a b c d']
+
+    embeddings = engine.encode_many(texts, batch_size=2)
+
+    assert embeddings.dtype == np.float32 and embeddings.shape == (6, 768)
+    assert [len(batch) for batch in engine.model.batches] == [2, 2, 1]
+    assert engine.model.batches[0] == ['a b c d e', 'a b c d']
+    np.testing.assert_array_equal(embeddings[:, 0], [9, 0, 1, 5, 3, 7])
+    assert not embeddings[1].any()
+    np.testing.assert_array_equal(embeddings[3], engine.get_text_embedding('a b c'))
+
+
+def test_long_documents_are_chunked_capped_and_pooled():
+    engine = make_engine()
+    engine.model = RecordingModel()
+    engine.document_chunk_words = 3
+    engine.document_max_chunks = 3
+    document = ' '.join(f'w{i}' for i in range(14))  # 5 chunks of up to 3 words
+
+    assert engine.chunk_document(document) == ['w0 w1 w2', 'w6 w7 w8', 'w12 w13']
+
+    embeddings = engine.embed_documents([document, '', 'short text'])
+    assert len(engine.model.batches) == 1 and len(engine.model.batches[0]) == 4
+    np.testing.assert_allclose(embeddings[0, :2], [(8 + 8 + 7) / 3, (2 + 2 + 1) / 3])
+    assert not embeddings[1].any()
+
+    engine.document_pooling = 'max'
+    np.testing.assert_array_equal(engine.embed_document(document)[:2], [8, 2])
+    assert engine.embed_document('') is None
+
+
+def test_extraction_stops_at_page_and_character_budgets(tmp_path):
+    engine = make_engine()
+    pages_read = []
+
+    def pages():
+        for i in range(200):
+            pages_read.append(i)
+            yield f'page {i}'
+
+    result = collect_text(pages(), 3, 10000)
+    assert result == {'text': 'page 0\npage 1\npage 2', 'truncated': True,
+                      'note': 'Only the first 3 pages were read'}
+    assert len(pages_read) == 4
+
+    document = Document()
+    for i in range(50):
+        document.add_paragraph(f'paragraph {i:02d}')
+    document.save(tmp_path / 'cv.docx')
+
+    engine.document_max_chars = 30
+    engine.extraction_sandbox = False
+    result = engine.extract_document(str(tmp_path / 'cv.docx'))
+    assert result['text'] == 'paragraph 00\nparagraph 01\npara'
+    assert result['truncated'] and result['error'] is None
+
+    # The sandboxed child process returns the same result
+    engine.extraction_sandbox = True
+    assert engine.extract_document(str(tmp_path / 'cv.docx')) == result
+
+
+def test_sandboxed_extraction_reports_killed_jobs_as_failures(tmp_path):
+    document = Document()
+    document.add_paragraph('Some resume text')
+    document.save(tmp_path / 'cv.docx')
+
+    timed_out = extract_text_sandboxed(str(tmp_path / 'cv.docx'), 10, 1000, timeout=0.001)
+    assert timed_out['error'] == 'Document processing timed out' and timed_out['text'] == ''
+
+    (tmp_path / 'broken.pdf').write_bytes(b'%PDF-1.4 not really a pdf')
+    assert extract_text_sandboxed(str(tmp_path / 'broken.pdf'), 10, 1000)['error'] == 'Document could not be read'
+
+
+def test_model_is_loaded_lazily():
+    engine = MatchingEngine()
+    assert engine.status()['loaded'] is False
+
+    engine.model = RecordingModel()
+    assert engine.warmup()
+    assert engine.status()['loaded'] is True
+    assert engine.model.batches == [['warmup']]
+
+
+def test_readiness_probe_starts_the_warmup_without_main(monkeypatch):
+    import time
+    from app import create_app
+    from matching_engine import matching_engine
+
+    # As under gunicorn: nothing started the warmup at boot
+    monkeypatch.setattr(matching_engine, '_model', None)
+    monkeypatch.setattr(matching_engine, '_load_model', RecordingModel)
+    client = create_app('testing').test_client()
+
+    deadline = time.monotonic() + 10
+    response = client.get('/api/ready')
+    while response.status_code != 200 and time.monotonic() < deadline:
+        time.sleep(0.05)
+        response = client.get('/api/ready')
+
+    assert response.status_code == 200
+    assert matching_engine.model.batches == [['warmup']]
+
+
+def test_smaller_model_is_known_without_loading_it():
+    engine = MatchingEngine(model_name='all-MiniLM-L6-v2', inference='torch-int8')
+    assert engine.embedding_dim == 384 and not engine.is_model_loaded
+    assert engine.status()['inference'] == 'torch-int8'
+    assert engine.get_text_embedding('').shape == (384,)
+    # Profiles without any vector still get rows of the model's width
+    empty = engine.build_profile_matrices([{'user_id': 1, 'keywords': [], 'document_text': ''}])
+    assert empty['keyword'].shape == empty['document'].shape == (1, 384)
+    assert not engine.is_model_loaded
+
+
+def test_vectors_of_another_model_are_stale():
+    engine = MatchingEngine()
+    mpnet_vector = np.ones(768, dtype=np.float32)
+    assert engine.is_current_embedding(mpnet_vector, None)  # legacy rows predate the tags
+    assert engine.is_current_embedding(mpnet_vector, 'all-mpnet-base-v2', False)
+    assert not engine.is_current_embedding(mpnet_vector, 'all-mpnet-base-v2', True)
+    assert not engine.is_current_embedding(None, 'all-mpnet-base-v2')
+
+    small_engine = MatchingEngine(model_name='all-MiniLM-L6-v2')
+    assert not small_engine.is_current_embedding(mpnet_vector, 'all-mpnet-base-v2')
+    assert not small_engine.is_current_embedding(np.ones(384, dtype=np.float32), 'all-mpnet-base-v2')
+    assert small_engine.is_current_embedding(np.ones(384, dtype=np.float32), 'all-MiniLM-L6-v2')
@@ -0,0 +1,231 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import event as sqlalchemy_event
+from app import create_app
+from models import db, User, Event, Membership, Resume, UserInteraction, SwipeDeck, MatchJobRecord
+from matching_engine import matching_engine
+from utils.event_matrix_cache import get_event_matrix_cache
+from utils.match_jobs import clear_match_jobs, get_match_job
+from utils.profile_embeddings import bump_profile_version
+
+
+def add_event(rng, code, members):
+    event = Event(name=f'Route Event {code}', code=code)
+    db.session.add(event)
+    db.session.flush()
+    for user in members:
+        membership = Membership(user_id=user.id, event_id=event.id, keywords='python, robotics')
+        membership.set_keyword_embedding(rng.normal(size=768), model_name=matching_engine.model_name)
+        db.session.add(membership)
+        if user.id % 2:
+            resume = Resume(user_id=user.id, event_id=event.id, filename='cv.pdf', original_name='cv.pdf',
+                            mime_type='application/pdf', file_size=1, extracted_text='Robotics engineer')
+            resume.set_embedding(rng.normal(size=768), model_name=matching_engine.model_name)
+            db.session.add(resume)
+    db.session.commit()
+    return event.id
+
+
+def test_matching_page_query_count_does_not_grow_with_event_size():
+    app = create_app('testing')
+    rng = np.random.default_rng(4)
+
+    with app.app_context():
+        db.create_all()
+        users = [User(name=f'Attendee {i}', email=f'route{i}@test.com', password_hash='hash') for i in range(40)]
+        db.session.add_all(users)
+        db.session.commit()
+        small_event = add_event(rng, 'ROUTESMALL', users[:5])
+        large_event = add_event(rng, 'ROUTELARGE', users)
+        current_user_id = users[0].id
+
+        statements = []
+        sqlalchemy_event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(current_user_id)
+        session['_fresh'] = True
+
+    counts = {}
+    for event_id in (small_event, large_event):
+        with app.app_context():
+            get_event_matrix_cache().clear()
+        statements.clear()
+        response = client.get(f'/event/{event_id}')
+        assert response.status_code == 200
+        counts[event_id] = len(statements)
+
+    assert counts[small_event] == counts[large_event]
+
+
+def test_matching_page_never_loads_resume_text():
+    app = create_app('testing')
+    rng = np.random.default_rng(5)
+
+    with app.app_context():
+        db.create_all()
+        users = [User(name=f'Attendee {i}', email=f'text{i}@test.com', password_hash='hash') for i in range(10)]
+        db.session.add_all(users)
+        db.session.commit()
+        event_id = add_event(rng, 'ROUTETEXT', users)
+        current_user_id = users[0].id
+        assert Resume.query.filter_by(user_id=current_user_id).one().has_document
+
+        statements = []
+        sqlalchemy_event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(current_user_id)
+        session['_fresh'] = True
+
+    response = client.get(f'/event/{event_id}')
+    assert response.status_code == 200
+    assert any('resume.has_document' in statement for statement in statements)
+    assert not any('extracted_text' in statement for statement in statements)
+
+
+def test_loading_page_computes_matches_once_in_the_background():
+    app = create_app('testing')
+    rng = np.random.default_rng(6)
+    clear_match_jobs()
+
+    with app.app_context():
+        db.create_all()
+        users = [User(name=f'Attendee {i}', email=f'job{i}@test.com', password_hash='hash') for i in range(12)]
+        db.session.add_all(users)
+        db.session.commit()
+        event_id = add_event(rng, 'ROUTEJOB', users)
+        current_user_id = users[0].id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(current_user_id)
+        session['_fresh'] = True
+
+    # A refresh of the loading page joins the finished job while its result is fresh
+    # (waited for first: in-memory sqlite shares one connection between the threads)
+    assert client.get(f'/event/{event_id}/loading').status_code == 200
+    job = get_match_job((current_user_id, event_id, False))
+    assert job.future.result(timeout=30) == 'ready'
+    assert client.get(f'/event/{event_id}/loading').status_code == 200
+    assert get_match_job((current_user_id, event_id, False)) is job
+
+    status = client.get(f'/event/{event_id}/loading/status').get_json()
+    assert status['status'] == 'ready'
+    assert status['matching_url'] == f'/event/{event_id}'
+
+    with app.app_context():
+        liked = job.result['candidates'][0]['user_id']
+        db.session.add(UserInteraction(user_id=current_user_id, target_user_id=liked, event_id=event_id, action='like'))
+        db.session.commit()
+
+    # The deck is served from the job's result, minus anyone interacted with since
+    response = client.get(f'/event/{event_id}')
+    assert response.status_code == 200
+    assert get_match_job((current_user_id, event_id, False)) is job
+    served = [match['name'] for match in job.result['candidates'] if match['user_id'] != liked]
+    assert all(name.encode() in response.data for name in served)
+
+
+def test_deck_endpoint_pages_through_the_stored_deck():
+    app = create_app('testing')
+    app.config['SWIPE_DECK_SIZE'] = 8
+    rng = np.random.default_rng(7)
+    clear_match_jobs()
+
+    with app.app_context():
+        db.create_all()
+        users = [User(name=f'Attendee {i}', email=f'deck{i}@test.com', password_hash='hash') for i in range(12)]
+        db.session.add_all(users)
+        db.session.commit()
+        event_id = add_event(rng, 'ROUTEDECK', users)
+        current_user_id = users[0].id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(current_user_id)
+        session['_fresh'] = True
+
+    first = client.get(f'/event/{event_id}/deck?limit=3').get_json()
+    assert first['success'] and len(first['candidates']) == 3 and first['has_more']
+    first_ids = [card['user_id'] for card in first['candidates']]
+
+    # Swiping someone from the next page hides them without re-ranking the deck
+    with app.app_context():
+        deck = SwipeDeck.query.filter_by(user_id=current_user_id, event_id=event_id).one()
+        deck_ids, built_at = deck.get_candidate_ids(), deck.built_at
+        assert deck_ids[:3] == first_ids
+        db.session.add(UserInteraction(user_id=current_user_id, target_user_id=deck_ids[3],
+                                       event_id=event_id, action='pass'))
+        db.session.commit()
+
+    second = client.get(f'/event/{event_id}/deck?limit=3').get_json()
+    assert [card['user_id'] for card in second['candidates']] == deck_ids[4:7]
+    assert second['cursor'] == 7
+
+    # Re-serving from a cursor, and re-ranking once the event's profiles change
+    again = client.get(f'/event/{event_id}/deck?limit=3&cursor=0').get_json()
+    assert [card['user_id'] for card in again['candidates']] == first_ids
+    with app.app_context():
+        assert SwipeDeck.query.filter_by(user_id=current_user_id, event_id=event_id).one().built_at == built_at
+        bump_profile_version(event_id)
+        db.session.commit()
+    rebuilt = client.get(f'/event/{event_id}/deck?limit=20').get_json()
+    assert deck_ids[3] not in [card['user_id'] for card in rebuilt['candidates']]
+    with app.app_context():
+        deck = SwipeDeck.query.filter_by(user_id=current_user_id, event_id=event_id).one()
+        assert deck.profile_version == Event.query.get(event_id).profile_version
+
+
+def test_status_poll_on_another_worker_does_not_start_a_second_job():
+    app = create_app('testing')
+    rng = np.random.default_rng(9)
+    clear_match_jobs()
+
+    with app.app_context():
+        db.create_all()
+        users = [User(name=f'Attendee {i}', email=f'worker{i}@test.com', password_hash='hash') for i in range(12)]
+        db.session.add_all(users)
+        db.session.commit()
+        event_id = add_event(rng, 'ROUTEWORKER', users)
+        current_user_id = users[0].id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(current_user_id)
+        session['_fresh'] = True
+    key = (current_user_id, event_id, False)
+
+    def set_record(**values):
+        with app.app_context():
+            MatchJobRecord.query.filter_by(user_id=current_user_id, event_id=event_id).update(values)
+            db.session.commit()
+
+    assert client.get(f'/event/{event_id}/loading').status_code == 200
+    assert get_match_job(key).future.result(timeout=30) == 'ready'
+
+    # A worker that never saw the job: its record says it is still running elsewhere
+    clear_match_jobs()
+    set_record(status='running', started_at=datetime.utcnow())
+    assert client.get(f'/event/{event_id}/loading/status').get_json()['status'] == 'running'
+    assert get_match_job(key) is None
+
+    # Finished elsewhere: reported ready, and the matching page serves the stored deck
+    set_record(status='ready', finished_at=datetime.utcnow())
+    assert client.get(f'/event/{event_id}/loading/status').get_json()['status'] == 'ready'
+    assert get_match_job(key) is None
+    assert client.get(f'/event/{event_id}').status_code == 200
+
+    # Running for too long: lost with its worker, so this one takes it over
+    set_record(status='running', started_at=datetime.utcnow() - timedelta(hours=1))
+    client.get(f'/event/{event_id}/loading/status')
+    assert get_match_job(key).future.result(timeout=30) == 'ready'
+    with app.app_context():
+        assert MatchJobRecord.query.filter_by(user_id=current_user_id, event_id=event_id).one().status == 'ready'
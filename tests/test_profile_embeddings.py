@@ -0,0 +1,80 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import numpy as np
+from app import create_app
+from models import db, User, Event, Membership
+from matching_engine import matching_engine
+from test_matching_engine import RecordingModel
+from utils.profile_embeddings import backfill_keyword_embeddings
+
+
+def encoded(model, keywords):
+    """What the model returns for a keyword list, joined and preprocessed like embed_keywords"""
+    return model.encode([matching_engine.preprocess_text(keywords)])[0]
+
+
+def test_join_and_keyword_edits_store_the_keyword_embedding(monkeypatch):
+    model = RecordingModel()
+    monkeypatch.setattr(matching_engine, '_model', model)
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        user = User(name='Joiner', email='joiner@test.com', password_hash='hash')
+        event = Event(name='Keyword Event', code='KEYWORDS1')
+        db.session.add_all([user, event])
+        db.session.commit()
+        user_id, event_id = user.id, event.id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+    client.post('/join_event', data={'event_code': 'KEYWORDS1', 'keywords': 'python, robotics'})
+    with app.app_context():
+        membership = Membership.query.filter_by(user_id=user_id, event_id=event_id).one()
+        np.testing.assert_allclose(membership.get_keyword_embedding(), encoded(model, 'python, robotics'))
+        assert membership.keyword_embedding_model == matching_engine.model_name
+
+    client.post('/update_keywords', data={'event_id': str(event_id), 'keywords': 'finance, design, music'})
+    with app.app_context():
+        membership = Membership.query.filter_by(user_id=user_id, event_id=event_id).one()
+        np.testing.assert_allclose(membership.get_keyword_embedding(), encoded(model, 'finance, design, music'))
+
+    # Saving the same keywords again keeps the stored vector without encoding
+    model.batches.clear()
+    client.post('/update_keywords', data={'event_id': str(event_id), 'keywords': 'finance, design, music'})
+    assert model.batches == []
+
+
+def test_backfill_fills_memberships_without_an_embedding(monkeypatch):
+    model = RecordingModel()
+    monkeypatch.setattr(matching_engine, '_model', model)
+    app = create_app('testing')
+
+    with app.app_context():
+        db.create_all()
+        users = [User(name=f'Legacy {i}', email=f'legacy{i}@test.com', password_hash='hash') for i in range(3)]
+        event = Event(name='Legacy Event', code='LEGACY1')
+        db.session.add_all(users + [event])
+        db.session.commit()
+        # Rows from before keyword embeddings were stored, and one already current
+        memberships = [Membership(user_id=user.id, event_id=event.id, keywords=keywords)
+                       for user, keywords in zip(users, ['python, finance', 'design, music', 'biology, startups'])]
+        memberships[2].set_keyword_embedding(np.ones(768), model_name=matching_engine.model_name)
+        db.session.add_all(memberships)
+        db.session.commit()
+
+        assert backfill_keyword_embeddings(memberships) == 2
+        db.session.commit()
+
+        # The two missing ones, in one batched encode
+        assert len(model.batches) == 1
+        assert sorted(model.batches[0]) == sorted(matching_engine.preprocess_text(m.keywords) for m in memberships[:2])
+        for membership in memberships[:2]:
+            np.testing.assert_allclose(membership.get_keyword_embedding(), encoded(model, membership.keywords))
+        np.testing.assert_allclose(memberships[2].get_keyword_embedding(), np.ones(768))
+        assert backfill_keyword_embeddings(memberships) == 0
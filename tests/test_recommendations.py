@@ -0,0 +1,135 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import numpy as np
+from app import create_app
+from models import db, User, Event, Membership, Resume, Recommendation, RecommendationBuild
+from matching_engine import matching_engine
+from test_matching_engine import make_engine, make_user, RecordingModel
+from utils.event_matrix_cache import get_event_matrix_cache
+from utils.profile_embeddings import refresh_keyword_embedding, bump_profile_version
+from utils.recommendations import compute_top_n, build_event_recommendations, refresh_member_recommendations
+
+
+def test_blocked_top_n_matches_per_user_ranking():
+    engine = make_engine()
+    rng = np.random.default_rng(13)
+    users = [make_user(rng, i, with_doc=i % 3 == 0) for i in range(90)]
+    matrices = engine.build_profile_matrices(users)
+
+    # Small blocks so most pairs come from off-diagonal (mirrored) tiles
+    rows, scores = compute_top_n(matrices, top_n=5, block_size=16, engine=engine)
+
+    for i in range(len(users)):
+        current = engine.subset_profile_matrices(matrices, np.array([i]))
+        live = engine.score_profile_matrices(current, matrices)
+        live[i] = -np.inf
+        expected = engine.select_top_k(live, 5)
+
+        found = rows[i][rows[i] >= 0]
+        assert i not in found
+        np.testing.assert_allclose(scores[i][:len(found)], live[expected], atol=1e-6)
+        np.testing.assert_allclose(live[found], live[expected], atol=1e-6)
+
+
+def stored_lists(event_id):
+    lists = {}
+    for owner, candidate, score in (
+        db.session.query(Recommendation.user_id, Recommendation.candidate_user_id, Recommendation.score)
+        .filter_by(event_id=event_id).order_by(Recommendation.user_id, Recommendation.rank)
+    ):
+        lists.setdefault(owner, []).append((candidate, round(score, 5)))
+    return lists
+
+
+def test_join_and_leave_patch_the_stored_lists(monkeypatch):
+    monkeypatch.setattr(matching_engine, '_model', RecordingModel())
+    app = create_app('testing')
+    rng = np.random.default_rng(21)
+
+    with app.app_context():
+        db.create_all()
+        get_event_matrix_cache().clear()
+        users = [User(name=f'Member {i}', email=f'patch{i}@test.com', password_hash='hash') for i in range(12)]
+        event = Event(name='Patch Event', code='PATCH1')
+        db.session.add_all(users + [event])
+        db.session.commit()
+        # Near the newcomer's keyword embedding, so they enter other lists
+        base = RecordingModel().encode(['python, robotics'])[0]
+        base = base / np.linalg.norm(base)
+        for i, user in enumerate(users[:10]):
+            # Distinct keywords: no exact-overlap boost, so scores (and ranks) differ
+            membership = Membership(user_id=user.id, event_id=event.id, keywords=f'field{i}, area{i}')
+            membership.set_keyword_embedding(base + rng.normal(scale=0.05, size=768), model_name=matching_engine.model_name)
+            db.session.add(membership)
+        db.session.commit()
+        build_event_recommendations(event.id, top_n=3)
+        event_id, newcomer_id, leaver_id = event.id, users[10].id, users[0].id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(newcomer_id)
+        session['_fresh'] = True
+    client.post('/join_event', data={'event_code': 'PATCH1', 'keywords': 'python, robotics'})
+    with client.session_transaction() as session:
+        session['_user_id'] = str(leaver_id)
+    client.post('/leave_event', data={'event_id': str(event_id)})
+
+    with app.app_context():
+        event = Event.query.get(event_id)
+        assert RecommendationBuild.query.filter_by(event_id=event_id).one().is_fresh(event)
+        patched = stored_lists(event_id)
+        assert newcomer_id in patched and leaver_id not in patched
+        assert all(leaver_id not in [candidate for candidate, _ in candidates] for candidates in patched.values())
+        assert any(newcomer_id in [candidate for candidate, _ in candidates] for candidates in patched.values())
+
+        build_event_recommendations(event_id, top_n=3)
+        assert patched == stored_lists(event_id)
+
+
+def test_keyword_and_resume_edits_patch_the_stored_lists(monkeypatch):
+    monkeypatch.setattr(matching_engine, '_model', RecordingModel())
+    app = create_app('testing')
+    rng = np.random.default_rng(8)
+
+    with app.app_context():
+        db.create_all()
+        get_event_matrix_cache().clear()
+        users = [User(name=f'Editor {i}', email=f'edit{i}@test.com', password_hash='hash') for i in range(12)]
+        event = Event(name='Edit Event', code='EDIT1')
+        db.session.add_all(users + [event])
+        db.session.commit()
+        base = RecordingModel().encode(['python, robotics'])[0]
+        base = base / np.linalg.norm(base)
+        for i, user in enumerate(users):
+            membership = Membership(user_id=user.id, event_id=event.id, keywords=f'field{i}, area{i}')
+            membership.set_keyword_embedding(base + rng.normal(scale=0.05, size=768), model_name=matching_engine.model_name)
+            db.session.add(membership)
+        db.session.commit()
+        build_event_recommendations(event.id, top_n=3)
+        event_id, editor_id = event.id, users[4].id
+
+        # Keyword edit (as update_keywords does)
+        membership = Membership.query.filter_by(user_id=editor_id, event_id=event_id).one()
+        membership.keywords = 'python, robotics'
+        refresh_keyword_embedding(membership)
+        bump_profile_version(event_id)
+        db.session.commit()
+        assert refresh_member_recommendations(app, event_id, editor_id)
+        patched = stored_lists(event_id)
+        build_event_recommendations(event_id, top_n=3)
+        assert patched == stored_lists(event_id)
+
+        # Resume re-upload (as the ingestion job stores it)
+        resume = Resume(user_id=editor_id, event_id=event_id, filename='cv.pdf', original_name='cv.pdf',
+                        mime_type='application/pdf', file_size=1, extracted_text='Robotics engineer')
+        resume.set_embedding(base + rng.normal(scale=0.05, size=768), model_name=matching_engine.model_name)
+        db.session.add(resume)
+        bump_profile_version(event_id)
+        db.session.commit()
+        assert refresh_member_recommendations(app, event_id, editor_id)
+        patched = stored_lists(event_id)
+        build_event_recommendations(event_id, top_n=3)
+        assert patched == stored_lists(event_id)
+        assert RecommendationBuild.query.filter_by(event_id=event_id).one().is_fresh(Event.query.get(event_id))
@@ -0,0 +1,198 @@
+import sys
+import os
+import shutil
+from datetime import datetime, timedelta
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from docx import Document
+from app import create_app
+from models import db, User, Event, Membership, Resume, DocumentContent
+from matching_engine import matching_engine
+from utils.resume_ingestion import submit_resume_processing, requeue_stalled_resume, resume_status
+from utils.document_store import hash_file, link_document_content, release_document_content
+from test_matching_engine import RecordingModel
+import routes.user
+import utils.resume_ingestion
+
+
+def record_jobs(monkeypatch):
+    """Futures of the jobs routes queue, so a test waits on them instead of polling the shared database"""
+    futures = []
+
+    def submit(app, resume_id, filename):
+        futures.append(submit_resume_processing(app, resume_id, filename))
+        return futures[-1]
+
+    monkeypatch.setattr(utils.resume_ingestion, 'submit_resume_processing', submit)
+    monkeypatch.setattr(routes.user, 'submit_resume_processing', submit)
+    return futures
+
+
+def test_background_processing_marks_resume_ready(tmp_path, monkeypatch):
+    monkeypatch.setattr(matching_engine, '_model', RecordingModel())
+    app = create_app('testing')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+
+    with app.app_context():
+        db.create_all()
+        user = User(name='Ingest', email='ingest@test.com', password_hash='hash')
+        event = Event(name='Ingest Event', code='INGEST1')
+        db.session.add_all([user, event])
+        db.session.commit()
+        db.session.add(Membership(user_id=user.id, event_id=event.id, keywords='python, finance'))
+
+        os.makedirs(tmp_path / str(user.id))
+        document = Document()
+        document.add_paragraph('Quantitative finance and Python tooling')
+        document.save(tmp_path / str(user.id) / 'cv.docx')
+
+        resume = Resume(user_id=user.id, event_id=event.id, filename='cv.docx', original_name='cv.docx',
+                        mime_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+                        file_size=1, processing_status='pending')
+        db.session.add(resume)
+        db.session.commit()
+        resume_id = resume.id
+
+    # A job queued for an older upload of the same resume is discarded
+    assert submit_resume_processing(app, resume_id, 'old.docx').result(timeout=30) == 'superseded'
+    assert submit_resume_processing(app, resume_id, 'cv.docx').result(timeout=30) == 'ready'
+
+    with app.app_context():
+        resume = Resume.query.get(resume_id)
+        assert resume_status(resume)['status'] == 'ready'
+        assert 'finance' in resume.extracted_text.lower()
+        assert resume.get_embedding() is not None
+
+
+def test_identical_uploads_reuse_stored_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(matching_engine, '_model', RecordingModel())
+    app = create_app('testing')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+
+    with app.app_context():
+        db.create_all()
+        user = User(name='Dedupe', email='dedupe@test.com', password_hash='hash')
+        events = [Event(name=f'Dedupe Event {i}', code=f'DEDUPE{i}') for i in range(2)]
+        db.session.add_all([user] + events)
+        db.session.commit()
+
+        os.makedirs(tmp_path / str(user.id))
+        document = Document()
+        document.add_paragraph('Robotics and embedded systems')
+        document.save(tmp_path / 'cv.docx')
+        resume_ids = []
+        for event in events:
+            filename = f'cv_{event.id}.docx'
+            shutil.copyfile(tmp_path / 'cv.docx', tmp_path / str(user.id) / filename)
+            db.session.add(Membership(user_id=user.id, event_id=event.id, keywords='robotics'))
+            resume = Resume(user_id=user.id, event_id=event.id, filename=filename, original_name='cv.docx',
+                            mime_type='application/octet-stream', file_size=1, processing_status='pending')
+            link_document_content(resume, hash_file(tmp_path / str(user.id) / filename))
+            db.session.add(resume)
+            db.session.commit()
+            resume_ids.append((resume.id, filename))
+        content_hash = Resume.query.get(resume_ids[0][0]).content_hash
+
+    assert submit_resume_processing(app, *resume_ids[0]).result(timeout=30) == 'ready'
+    encode_calls = len(matching_engine.model.batches)
+    assert submit_resume_processing(app, *resume_ids[1]).result(timeout=30) == 'ready'
+    assert len(matching_engine.model.batches) == encode_calls  # served from the store
+
+    with app.app_context():
+        first, second = (Resume.query.get(resume_id) for resume_id, _ in resume_ids)
+        assert second.extracted_text == first.extracted_text
+        assert (second.get_embedding() == first.get_embedding()).all()
+        assert DocumentContent.query.filter_by(content_hash=content_hash).one().ref_count == 2
+
+        for resume in (first, second):
+            release_document_content(resume.content_hash)
+            db.session.delete(resume)
+            db.session.commit()
+            remaining = DocumentContent.query.filter_by(content_hash=content_hash).first()
+        assert remaining is None
+
+
+def test_status_poll_requeues_a_stalled_upload(tmp_path, monkeypatch):
+    monkeypatch.setattr(matching_engine, '_model', RecordingModel())
+    # Jobs are only recorded here and run below, after the polls (one shared sqlite connection)
+    queued = []
+    monkeypatch.setattr(utils.resume_ingestion, 'submit_resume_processing',
+                        lambda app, resume_id, filename: queued.append((resume_id, filename)))
+    app = create_app('testing')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+
+    with app.app_context():
+        db.create_all()
+        user = User(name='Stalled', email='stalled@test.com', password_hash='hash')
+        event = Event(name='Stalled Event', code='STALL1')
+        db.session.add_all([user, event])
+        db.session.commit()
+        db.session.add(Membership(user_id=user.id, event_id=event.id, keywords='python'))
+
+        os.makedirs(tmp_path / str(user.id))
+        document = Document()
+        document.add_paragraph('Distributed systems engineer')
+        document.save(tmp_path / str(user.id) / 'cv.docx')
+
+        # Queued by a worker that went away before processing it
+        resume = Resume(user_id=user.id, event_id=event.id, filename='cv.docx', original_name='cv.docx',
+                        mime_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+                        file_size=1, processing_status='pending',
+                        uploaded_at=datetime.utcnow() - timedelta(hours=1))
+        db.session.add(resume)
+        db.session.commit()
+        user_id, event_id, resume_id = user.id, event.id, resume.id
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    assert client.get(f'/resume_status/{event_id}').status_code == 200
+    # The first poll claimed it: later polls (from any worker) leave the new job alone
+    assert client.get(f'/resume_status/{event_id}').status_code == 200
+    assert queued == [(resume_id, 'cv.docx')]
+
+    with app.app_context():
+        resume = Resume.query.get(resume_id)
+        assert resume.processing_started_at > datetime.utcnow() - timedelta(minutes=1)
+        assert requeue_stalled_resume(app, resume) is None
+
+    assert submit_resume_processing(app, *queued[0]).result(timeout=30) == 'ready'
+    with app.app_context():
+        assert Resume.query.get(resume_id).processing_status == 'ready'
+
+
+def test_new_upload_changes_the_profile_once_it_is_processed(tmp_path, monkeypatch):
+    monkeypatch.setattr(matching_engine, '_model', RecordingModel())
+    jobs = record_jobs(monkeypatch)
+    app = create_app('testing')
+    app.config['UPLOAD_FOLDER'] = str(tmp_path)
+
+    with app.app_context():
+        db.create_all()
+        user = User(name='Uploader', email='uploader@test.com', password_hash='hash')
+        event = Event(name='Upload Event', code='UPLOAD1')
+        db.session.add_all([user, event])
+        db.session.commit()
+        db.session.add(Membership(user_id=user.id, event_id=event.id, keywords='python'))
+        db.session.commit()
+        user_id, event_id, start_version = user.id, event.id, event.profile_version or 0
+
+    document = Document()
+    document.add_paragraph('Compiler engineer')
+    document.save(tmp_path / 'upload.docx')
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    with open(tmp_path / 'upload.docx', 'rb') as handle:
+        response = client.post(f'/upload_resume/{event_id}', data={'resume': (handle, 'upload.docx')},
+                               content_type='multipart/form-data')
+    assert response.status_code == 302
+
+    assert [future.result(timeout=30) for future in jobs] == ['ready']
+    with app.app_context():
+        assert Resume.query.filter_by(user_id=user_id).first().processing_status == 'ready'
+        # Bumped by the job that stored the document, not also by the upload request
+        assert Event.query.get(event_id).profile_version == start_version + 1